@@ -8,6 +8,19 @@ from .security import SecurityConfig
 from .database import DatabaseConfig
 from .gpt import GPTConfig
 from .project import ProjectConfig
+from .upload import UploadConfig
+from .download import DownloadConfig
+from .compression import CompressionConfig
+from .history import HistoryConfig
+from .ingestion import IngestionConfig
+from .retrieval import RetrievalConfig
+from .cache import CacheConfig
+from .user_cache import UserCacheConfig
+from .access_cache import AccessCacheConfig
+from .storage_gc import StorageGCConfig
+from .metrics import MetricsConfig
+from .profiling import ProfilingConfig
+from .admission import AdmissionConfig
 
 DEFAULT_SETTINGS_NAME = "config.yaml"
 DEFAULT_SETTINGS_PATH = f"../{DEFAULT_SETTINGS_NAME}"
@@ -19,6 +32,19 @@ class Settings(BaseSettings):
     database: DatabaseConfig
     gpt: GPTConfig
     project: Optional[ProjectConfig] = None
+    upload: UploadConfig = UploadConfig()
+    download: DownloadConfig = DownloadConfig()
+    compression: CompressionConfig = CompressionConfig()
+    history: HistoryConfig = HistoryConfig()
+    ingestion: IngestionConfig = IngestionConfig()
+    retrieval: RetrievalConfig = RetrievalConfig()
+    retrieval_cache: CacheConfig = CacheConfig()
+    user_cache: UserCacheConfig = UserCacheConfig()
+    access_cache: AccessCacheConfig = AccessCacheConfig()
+    storage_gc: StorageGCConfig = StorageGCConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    profiling: ProfilingConfig = ProfilingConfig()
+    admission: AdmissionConfig = AdmissionConfig()
 
     @staticmethod
     def check_yaml_path() -> str:
@@ -35,7 +61,28 @@ class Settings(BaseSettings):
     def get_settings(cls) -> "Settings":
         yaml_path = cls.check_yaml_path()
         with open(yaml_path, 'r') as f:
-            config_data = yaml.safe_load(f)
+            # the libyaml parser when PyYAML was built with it
+            config_data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
         return cls(**config_data)
-        
-settings = Settings.get_settings()
+
+class LazySettings:
+    """The settings, loaded from config.yaml when an attribute is first read.
+
+    Modules import this as `config` and only read it in their functions, so
+    importing the app does not need config.yaml.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(Settings.get_settings(), name)
+
+config = LazySettings()
+
+def settings_loaded() -> bool:
+    """Whether config.yaml was read already, for code that must not be the one to read it"""
+    return Settings.get_settings.cache_info().currsize > 0
+
+def __getattr__(name: str):
+    # `settings` is read on first use, so importing app.config does not parse config.yaml
+    if name == "settings":
+        return Settings.get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class AccessCacheConfig(BaseModel):
+    enabled: bool = True
+    max_entries: int = 10000
+    # bounds how long a grant or revoke made by another worker can go unnoticed, unless redis_url is set
+    ttl_seconds: int = 60
+    # Redis holding a version per user, checked on every hit so revokes apply at once in every worker
+    redis_url: Optional[str] = None
@@ -0,0 +1,45 @@
+from typing import Dict, List
+from pydantic import BaseModel
+
+class RouteClassLimit(BaseModel):
+    # requests of the class served at once by a worker
+    concurrency: int
+    # requests waiting for one of those slots, the rest are refused at once
+    queue: int
+    # a queued request is refused after waiting this long
+    queue_timeout_seconds: float
+
+class RouteClassRule(BaseModel):
+    # regular expression searched in the request path
+    pattern: str
+    route_class: str
+
+class ReadinessConfig(BaseModel):
+    # a probe result is reused this long, load balancers probe every worker often
+    cache_seconds: float = 2
+    # not ready when less than this fraction of a pool's connections is free
+    min_pool_headroom: float = 0.1
+    db_timeout_seconds: float = 1
+    # the upstream model is asked for its model list and its health reported in the
+    # body; it is shared by every worker, so it only fails the probe with require_llm
+    check_llm: bool = True
+    require_llm: bool = False
+    llm_timeout_seconds: float = 2
+
+class AdmissionConfig(BaseModel):
+    enabled: bool = True
+    classes: Dict[str, RouteClassLimit] = {
+        "chat": RouteClassLimit(concurrency=32, queue=32, queue_timeout_seconds=5),
+        "upload": RouteClassLimit(concurrency=4, queue=16, queue_timeout_seconds=10),
+        "crud": RouteClassLimit(concurrency=64, queue=128, queue_timeout_seconds=2),
+    }
+    # checked in order, paths no rule matches are default_class
+    rules: List[RouteClassRule] = [
+        RouteClassRule(pattern=r"/chat/message", route_class="chat"),
+        RouteClassRule(pattern=r"/documents/upload$", route_class="upload"),
+    ]
+    default_class: str = "crud"
+    # probes and metrics are never queued or refused
+    exempt_paths: List[str] = ["/health", "/ready", "/metrics"]
+    retry_after_seconds: int = 2
+    readiness: ReadinessConfig = ReadinessConfig()
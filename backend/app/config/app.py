@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class AppConfig(BaseModel):
     env: str
@@ -14,4 +14,8 @@ class AppConfig(BaseModel):
     debug: bool
     api_prefix: str
     docs_url: str
-    timeout: int
\ No newline at end of file
+    timeout: int
+    # serialize responses with FastJSONRoute, skipping the intermediate dict
+    fast_json: bool = False
+    # threads running the sync (def) routes and dependencies, anyio's default of 40 when unset
+    threadpool_size: Optional[int] = None
@@ -0,0 +1,8 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class CacheConfig(BaseModel):
+    backend: str = "memory"  # "memory" (per worker) or "redis" (shared)
+    max_entries: int = 10000
+    ttl_seconds: int = 600
+    redis_url: Optional[str] = None
@@ -0,0 +1,22 @@
+from typing import Dict, List
+from pydantic import BaseModel
+
+class CompressionConfig(BaseModel):
+    enabled: bool = True
+    # smaller bodies gain less than the encoding costs
+    minimum_size: int = 1024
+    # server preference among the encodings a client accepts; zstd and br need
+    # the 'compression' extra (zstandard, brotli), missing ones are skipped
+    encodings: List[str] = ["zstd", "br", "gzip"]
+    # level per encoding of each compressed content type; an exact media type wins
+    # over a prefix ending in "/", unlisted types (PDFs, images, archives) are sent as is
+    levels: Dict[str, Dict[str, int]] = {
+        "application/json": {"zstd": 3, "br": 4, "gzip": 6},
+        # rendered once per page view, worth a denser encoding
+        "text/html": {"zstd": 9, "br": 6, "gzip": 6},
+        "text/": {"zstd": 3, "br": 4, "gzip": 6},
+        "application/javascript": {"zstd": 9, "br": 6, "gzip": 6},
+        "image/svg+xml": {"zstd": 9, "br": 6, "gzip": 6},
+    }
+    # matched like levels; streamed events must reach the client unbuffered
+    excluded_content_types: List[str] = ["text/event-stream"]
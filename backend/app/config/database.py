@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class DatabaseConfig(BaseModel):
@@ -6,4 +7,10 @@ class DatabaseConfig(BaseModel):
     ssl_key_file: str
     pool_size: int
     max_overflow: int
-    pool_timeout: int
\ No newline at end of file
+    pool_timeout: int
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # optional read replica, get_* repository methods are routed to it
+    replica_url: Optional[str] = None
+    # apply pending app.migrations when the server starts
+    migrate_on_startup: bool = True
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+class DownloadConfig(BaseModel):
+    # documents are private; clients may keep a copy but revalidate it (a cheap 304) on every use
+    cache_control: str = "private, no-cache"
+    # bytes per read, each read is a threadpool round trip
+    chunk_size: int = 1024 * 1024
@@ -0,0 +1,9 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class HistoryConfig(BaseModel):
+    backend: str = "memory"  # "memory" or "sql"
+    max_conversations: int = 10000
+    max_messages: int = 20
+    ttl_seconds: int = 3600
+    url: Optional[str] = None  # sql backend only, defaults to the app database
@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class IngestionConfig(BaseModel):
+    enabled: bool = True
+    # extraction processes of each web worker, every worker starts its own pool;
+    # defaults to the CPUs divided by WEB_CONCURRENCY, the worker count uvicorn and gunicorn read
+    max_workers: Optional[int] = None
+    # a running document whose worker has not renewed its claim for this long is re-queued
+    lease_seconds: int = 300
@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class MetricsConfig(BaseModel):
+    # request latency middleware and query timing hooks; /metrics is served either way
+    enabled: bool = True
@@ -0,0 +1,23 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class ProfilingConfig(BaseModel):
+    # installs the middleware; requests are profiled only when signed or sampled
+    enabled: bool = False
+    # key of the X-Profile header tokens, header triggering is off without it
+    secret: Optional[str] = None
+    header: str = "X-Profile"
+    # fraction of requests profiled without a header, 0 to never sample
+    sample_rate: float = 0.0
+    # path prefixes sampling is limited to, all paths when empty
+    sample_paths: List[str] = []
+    interval_seconds: float = 0.005
+    # a streamed response keeps being sampled at most this long
+    max_seconds: float = 60
+    # tracemalloc traceback depth, and allocation sites written per profile
+    traceback_frames: int = 8
+    top_allocations: int = 30
+    # defaults to .profiles in the project storage root
+    directory: Optional[str] = None
+    # profiles kept, the oldest are removed first
+    max_profiles: int = 50
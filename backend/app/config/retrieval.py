@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class RetrievalConfig(BaseModel):
+    embedder: str = "hashing"  # "hashing" (local, deterministic) or "openai"
+    dimension: int = 256
+    embedding_model: Optional[str] = None  # openai embedder only, served from gpt.url
+    chunk_words: int = 200
+    chunk_overlap: int = 40
+    top_k: int = 5
@@ -4,3 +4,6 @@ class SecurityConfig(BaseModel):
     jwt_secret: str
     algorithm: str
     access_token_expire_minutes: int
+    bcrypt_rounds: int = 12
+    # threads doing bcrypt work; bcrypt releases the GIL, so about one per core
+    hash_workers: int = 2
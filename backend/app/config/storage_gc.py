@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+class StorageGCConfig(BaseModel):
+    enabled: bool = True
+    interval_seconds: float = 30
+    # tombstones younger than this are left alone, e.g. while an ingestion still writes chunks
+    grace_seconds: float = 60
+    # documents purged per transaction
+    batch_size: int = 200
+    # paces file deletes so purging a large project does not saturate the disk
+    max_files_per_second: float = 200
+    reconcile_interval_seconds: float = 600
+    # top-level blob directories (of 256) checked per reconcile pass
+    reconcile_prefixes: int = 16
+    # a file without a row, or a row without a file, younger than this may be an upload in flight
+    orphan_age_seconds: float = 3600
+    # orphaned files are only reported unless enabled
+    delete_orphans: bool = False
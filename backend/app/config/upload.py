@@ -0,0 +1,9 @@
+from typing import List
+from pydantic import BaseModel
+
+class UploadConfig(BaseModel):
+    chunk_size: int = 1024 * 1024  # 1 MiB per read
+    max_file_size: int = 100 * 1024 * 1024  # 100 MiB
+    allowed_extensions: List[str] = [".pdf"]
+    # files of one batch written to disk concurrently, shared by all requests
+    write_workers: int = 4
@@ -0,0 +1,172 @@
+import asyncio, collections, json, re, time
+from typing import Deque, Dict, Iterable, List
+import anyio.to_thread
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config.admission import AdmissionConfig, RouteClassLimit
+from app.core.lazy import Lazy
+from app.core.metrics import Gauge, Metric, registry
+
+from app.config import config
+
+ADMISSION_REJECTED = registry.counter(
+    "admission_rejected_total", "Requests refused with 503, because the queue was full or the wait timed out", ("route_class", "reason")
+)
+ADMISSION_WAIT_SECONDS = registry.histogram(
+    "admission_wait_seconds", "Time admitted requests spent queued for a slot", ("route_class",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+class RouteClassLimiter:
+    """At most concurrency requests at once, and at most queue more waiting in order.
+
+    A released slot is handed straight to the oldest waiter, so a request
+    arriving meanwhile cannot overtake the queue. Per worker and per event
+    loop, like the connection pools it protects.
+    """
+
+    def __init__(self, name: str, limit: RouteClassLimit):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self.__waiters: Deque[asyncio.Future] = collections.deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self.__waiters)
+
+    @property
+    def saturated(self) -> bool:
+        return self.active >= self.limit.concurrency and self.waiting >= self.limit.queue
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit.concurrency and not self.__waiters:
+            self.active += 1
+            return True
+        if len(self.__waiters) >= self.limit.queue:
+            ADMISSION_REJECTED.inc(self.name, "queue_full")
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.limit.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTED.inc(self.name, "timeout")
+            return False
+        except asyncio.CancelledError:
+            # the client left; a slot handed over just before is passed on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self.__waiters:
+                self.__waiters.remove(waiter)
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, self.name)
+        return True
+
+    def release(self):
+        while self.__waiters:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot stays taken, by the waiter now
+                return
+        self.active -= 1
+
+class AdmissionController:
+    """Route classes, their limiters and which class a request path belongs to"""
+
+    def __init__(self, admission_config: AdmissionConfig):
+        self.config = admission_config
+        self.limiters: Dict[str, RouteClassLimiter] = {
+            name: RouteClassLimiter(name, limit) for name, limit in admission_config.classes.items()
+        }
+        self.__rules = [(re.compile(rule.pattern), rule.route_class) for rule in admission_config.rules]
+        self.__exempt = tuple(admission_config.exempt_paths)
+
+    def route_class(self, path: str):
+        """Name of the class limiting the path, None when it is exempt or its class has no limit"""
+        if path.startswith(self.__exempt):
+            return None
+        for pattern, route_class in self.__rules:
+            if pattern.search(path):
+                return route_class if route_class in self.limiters else None
+        return self.config.default_class if self.config.default_class in self.limiters else None
+
+    def saturated(self) -> List[str]:
+        return [name for name, limiter in self.limiters.items() if limiter.saturated]
+
+    def status(self) -> dict:
+        return {
+            name: {"active": limiter.active, "waiting": limiter.waiting, **limiter.limit.model_dump()}
+            for name, limiter in self.limiters.items()
+        }
+
+admission: AdmissionController = Lazy(lambda: AdmissionController(config.admission))
+
+class AdmissionMiddleware:
+    """Admits each request through the limiter of its route class, or refuses it.
+
+    A request over its class's concurrency waits in a bounded queue; when
+    the queue is full or the wait times out it gets 503 with Retry-After at
+    once, instead of piling onto the database pool or the upstream model
+    and timing out there. A streamed response keeps its slot until it ends.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+        self.busy_body = json.dumps({"detail": "Server is busy, please retry later"}).encode()
+        self.retry_after = str(controller.config.retry_after_seconds).encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route_class = self.controller.route_class(scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.limiters[route_class]
+        if not await limiter.acquire():
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(self.busy_body)).encode()),
+                    (b"retry-after", self.retry_after),
+                ],
+            })
+            await send({"type": "http.response.body", "body": self.busy_body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+def configure_threadpool():
+    """Size the threadpool of sync routes; called on the event loop, the limiter is per loop"""
+    if config.app.threadpool_size:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = config.app.threadpool_size
+
+@registry.collector
+def _admission_metrics() -> Iterable[Metric]:
+    active = Gauge("admission_active", "Requests holding a slot of their route class", ("route_class",))
+    waiting = Gauge("admission_waiting", "Requests queued for a slot of their route class", ("route_class",))
+    limit = Gauge("admission_concurrency_limit", "Slots of each route class", ("route_class",))
+    for name, limiter in admission.limiters.items():
+        active.set(limiter.active, name)
+        waiting.set(limiter.waiting, name)
+        limit.set(limiter.limit.concurrency, name)
+    metrics = [active, waiting, limit]
+
+    try:
+        statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+    except RuntimeError:
+        return metrics  # rendered outside the event loop, e.g. by a script
+    size = Gauge("threadpool_size", "Threads available to sync routes and dependencies")
+    busy = Gauge("threadpool_busy", "Threads running a sync route or dependency")
+    queued = Gauge("threadpool_waiting", "Sync calls waiting for a thread")
+    size.set(statistics.total_tokens)
+    busy.set(statistics.borrowed_tokens)
+    queued.set(statistics.tasks_waiting)
+    return [*metrics, size, busy, queued]
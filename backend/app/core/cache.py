@@ -0,0 +1,181 @@
+import json, time, threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Union
+from app.config.cache import CacheConfig
+
+_MISSING = object()
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU with an optional per-entry TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.__entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__max_entries = max_entries
+        self.__ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.__lock:
+            entry = self.__entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.__entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.__ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self.__lock:
+            self.__entries[key] = (value, expires_at)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "backend": "memory",
+                "entries": len(self.__entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+class RedisCache:
+    """JSON values in Redis, shared by every worker.
+
+    Eviction is left to Redis (configure maxmemory-policy allkeys-lru);
+    keys carry a TTL so abandoned entries age out. Hit/miss counters are
+    per process.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl_seconds: Optional[float] = None):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis cache backend requires the 'redis' package") from e
+
+        self.__client = redis.Redis.from_url(url)
+        self.__prefix = prefix
+        self.__ttl = ttl_seconds
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def __key(self, key: Hashable) -> str:
+        return f"{self.__prefix}:{key}"
+
+    def __count(self, counter: str):
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            raw = self.__client.get(self.__key(key))
+        except Exception:
+            # a cache outage degrades to a miss instead of failing the request
+            self.__count("errors")
+            return default
+        if raw is None:
+            self.__count("misses")
+            return default
+        self.__count("hits")
+        return json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.__ttl
+        try:
+            self.__client.set(self.__key(key), json.dumps(value), ex=int(ttl) if ttl else None)
+        except Exception:
+            self.__count("errors")
+
+    def delete(self, key: Hashable):
+        try:
+            self.__client.delete(self.__key(key))
+        except Exception:
+            self.__count("errors")
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "backend": "redis",
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+            }
+
+class SharedVersions:
+    """Version counters in Redis, shared by every worker.
+
+    A cache remembers the version each entry was loaded under and treats
+    the entry as stale once the current version differs, so bump() by any
+    worker invalidates it everywhere. An outage reads as no version, which
+    callers treat as a miss.
+    """
+
+    def __init__(self, client, prefix: str):
+        self.__client = client
+        self.__prefix = prefix
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str) -> "SharedVersions":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Shared cache versions require the 'redis' package") from e
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def __key(self, key: Hashable) -> str:
+        return f"{self.__prefix}:version:{key}"
+
+    def get(self, key: Hashable) -> Optional[int]:
+        try:
+            return int(self.__client.get(self.__key(key)) or 0)
+        except Exception:
+            self.errors += 1
+            return None
+
+    def bump(self, key: Hashable):
+        try:
+            self.__client.incr(self.__key(key))
+        except Exception:
+            # the entries of other workers then age out with their TTL
+            self.errors += 1
+
+def create_cache(cache_config: CacheConfig, prefix: str) -> Union[LRUCache, RedisCache]:
+    if cache_config.backend == "memory":
+        return LRUCache(cache_config.max_entries, cache_config.ttl_seconds)
+    if cache_config.backend == "redis":
+        if not cache_config.redis_url:
+            raise ValueError("redis_url is required for the redis cache backend")
+        return RedisCache(cache_config.redis_url, prefix, cache_config.ttl_seconds)
+    raise ValueError(f"Unknown cache backend: {cache_config.backend}")
@@ -0,0 +1,216 @@
+import logging, zlib
+from typing import Iterable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config.compression import CompressionConfig
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits 31: a gzip header and trailer around the deflate stream
+        self.__compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush(zlib.Z_FINISH)
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self.__compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.__compressor.finish()
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self.__compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush()
+
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+def negotiate(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    """The encoding to use from those the server offers, in its order of preference"""
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def match_content_type(patterns: Iterable[str], content_type: str) -> Optional[str]:
+    """The pattern equal to the media type, else the longest "type/" prefix of it"""
+    media_type = content_type.partition(";")[0].strip().lower()
+    best = None
+    for pattern in patterns:
+        if pattern == media_type:
+            return pattern
+        if pattern.endswith("/") and media_type.startswith(pattern) and (best is None or len(pattern) > len(best)):
+            best = pattern
+    return best
+
+class CompressionMiddleware:
+    """Compresses response bodies with zstd, brotli or gzip, as Accept-Encoding allows.
+
+    Only content types listed in config.levels are compressed, each at its
+    own level per encoding; bodies under minimum_size, event streams, ranges
+    and responses that already carry a Content-Encoding go out untouched.
+    A body sent in several messages is compressed as it streams, flushing
+    after each message so the client is not kept waiting.
+    """
+
+    def __init__(self, app: ASGIApp, config: CompressionConfig):
+        self.app = app
+        self.config = config
+        self.encodings = [encoding for encoding in config.encodings if encoding in ENCODERS]
+        missing = [encoding for encoding in config.encodings if encoding not in ENCODERS]
+        if missing:
+            logger.warning(f"Compression encodings not available, install the 'compression' extra to enable them: {', '.join(missing)}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressedResponder(self.app, self.config, encoding)(scope, receive, send)
+
+class CompressedResponder:
+    def __init__(self, app: ASGIApp, config: CompressionConfig, encoding: str):
+        self.app = app
+        self.config = config
+        self.encoding = encoding
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.level: Optional[int] = None
+        self.encoder = None
+        self.buffer = bytearray()
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def __level(self, message: Message) -> Optional[int]:
+        status_code = message["status"]
+        if status_code < 200 or status_code in (204, 304):
+            return None
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers or "content-range" in headers:
+            return None
+        content_type = headers.get("content-type")
+        if not content_type or match_content_type(self.config.excluded_content_types, content_type):
+            return None
+        pattern = match_content_type(self.config.levels, content_type)
+        return self.config.levels[pattern].get(self.encoding) if pattern else None
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.level = self.__level(message)
+            if self.level is None:
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start = message
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            # a message of an ASGI extension is sent as is, after the body buffered so far
+            if self.encoder is None:
+                self.passthrough = True
+                MutableHeaders(scope=self.start).add_vary_header("Accept-Encoding")
+                await self.send(self.start)
+                if self.buffer:
+                    await self.send({"type": "http.response.body", "body": bytes(self.buffer), "more_body": True})
+                    self.buffer.clear()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            data = self.encoder.compress(body) + (self.encoder.flush() if more_body else self.encoder.finish())
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        self.buffer += body
+        if len(self.buffer) < self.config.minimum_size:
+            if more_body:
+                return  # not worth compressing yet, wait for the next message
+            self.passthrough = True
+            MutableHeaders(scope=self.start).add_vary_header("Accept-Encoding")
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": bytes(self.buffer), "more_body": False})
+            return
+
+        self.encoder = ENCODERS[self.encoding](self.level)
+        data = self.encoder.compress(bytes(self.buffer)) + (self.encoder.flush() if more_body else self.encoder.finish())
+        self.buffer.clear()
+
+        headers = MutableHeaders(scope=self.start)
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # the compressed bytes differ from those a strong ETag names
+            headers["etag"] = f"W/{etag}"
+        if more_body:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(len(data))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -1,23 +1,247 @@
-from sqlalchemy import create_engine
+import functools, inspect, time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.config import Settings  
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.metrics import Counter, Gauge, registry
+from app.core.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from app.config import config
 
-config = Settings.get_settings()
-env = config.app.env  
+# every engine created here, by name, for pool_status()
+engines: Dict[str, Engine] = {}
 
-DATABASE_URL = config.database.url
-ssl_crt_file = config.database.ssl_cert_file
-ssl_key_file = config.database.ssl_key_file
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # one shared connection, nothing to size
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": config.database.pool_size,
+        "max_overflow": config.database.max_overflow,
+        "pool_timeout": config.database.pool_timeout,
+        "pool_recycle": config.database.pool_recycle,
+        "pool_pre_ping": config.database.pool_pre_ping,
+    }
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autoflush=True, bind=engine)
+def _enable_sqlite_foreign_keys(db_engine: Engine):
+    # SQLite ignores FOREIGN KEY clauses, cascades included, unless asked per connection
+    if db_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(db_engine, "connect")
+    def set_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds",
+    "Time the database took to execute a statement, by engine and statement type",
+    ("engine", "operation"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERY_ERRORS = registry.counter("db_query_errors_total", "Statements that raised a database error", ("engine",))
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+def _instrument_queries(db_engine: Engine, name: str):
+    if not config.metrics.enabled:
+        return
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(db_engine, "after_cursor_execute")
+    def record_duration(conn, cursor, statement, parameters, context, executemany):
+        keyword = statement.lstrip()[:6].upper()
+        DB_QUERY_SECONDS.observe(
+            time.perf_counter() - conn.info["query_started"].pop(), name, keyword if keyword in OPERATIONS else "OTHER"
+        )
+
+    @event.listens_for(db_engine, "handle_error")
+    def record_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection is not None else None
+        if started:
+            started.pop()
+        DB_QUERY_ERRORS.inc(name)
+
+# pool_status() key -> metric, read when scraped
+POOL_GAUGES = {
+    "size": ("db_pool_size", "Connections the pool keeps open"),
+    "checked_out": ("db_pool_checked_out", "Connections in use"),
+    "overflow": ("db_pool_overflow", "Connections open beyond the pool size"),
+}
+POOL_COUNTERS = {
+    "checkouts": ("db_pool_checkouts_total", "Connections handed out by the pool"),
+    "wait_seconds_total": ("db_pool_wait_seconds_total", "Time spent waiting for a connection"),
+    "saturated": ("db_pool_saturated_total", "Checkouts requested while every connection was in use"),
+    "timeouts": ("db_pool_timeouts_total", "Checkouts that gave up waiting"),
+}
+
+@registry.collector
+def _pool_metrics():
+    metrics = {
+        **{key: Gauge(name, documentation, ("engine",)) for key, (name, documentation) in POOL_GAUGES.items()},
+        **{key: Counter(name, documentation, ("engine",)) for key, (name, documentation) in POOL_COUNTERS.items()},
+    }
+    for engine_name, status in pool_status().items():
+        for key, metric in metrics.items():
+            if key in status:
+                metric.inc(engine_name, amount=status[key])
+    return metrics.values()
+
+def create_db_engine(url: str, name: str) -> Engine:
+    db_engine = create_engine(url, **_engine_options(url))
+    _enable_sqlite_foreign_keys(db_engine)
+    _instrument_queries(db_engine, name)
+    engines[name] = db_engine
+    return db_engine
+
+class RoutingSession(Session):
+    """Session sending reads marked with read_only to the replica, if one is configured"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and self.info.get("read_only") and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+# created on first use, not when the module is imported, like the async engines below
+
+@lru_cache
+def get_engine() -> Engine:
+    return create_db_engine(config.database.url, "primary")
+
+@lru_cache
+def get_replica_engine() -> Optional[Engine]:
+    return create_db_engine(config.database.replica_url, "replica") if config.database.replica_url else None
+
+@lru_cache
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(autoflush=True, bind=get_engine(), class_=RoutingSession, info={"replica": get_replica_engine()})
+
+def SessionLocal(**kwargs) -> Session:
+    return get_sessionmaker()(**kwargs)
+
+def __getattr__(name: str):
+    # `from app.core.database import engine` inside a function still works
+    if name == "engine":
+        return get_engine()
+    if name == "replica_engine":
+        return get_replica_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 Base = declarative_base()
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_url(url: str) -> str:
+    """Same database as url, through the asyncio driver of its dialect"""
+    parsed = make_url(url)
+    if parsed.get_dialect().is_async:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def create_async_db_engine(url: str, name: str) -> AsyncEngine:
+    async_url = get_async_url(url)
+    db_engine = create_async_engine(async_url, **_engine_options(async_url, is_async=True))
+    _enable_sqlite_foreign_keys(db_engine.sync_engine)
+    _instrument_queries(db_engine.sync_engine, name)
+    engines[name] = db_engine.sync_engine
+    return db_engine
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    # created on first use so the asyncpg/aiosqlite import is only paid by
+    # processes that actually serve async routes
+    return create_async_db_engine(config.database.url, "primary_async")
+
+@lru_cache
+def get_async_replica_engine() -> Optional[AsyncEngine]:
+    return create_async_db_engine(config.database.replica_url, "replica_async") if config.database.replica_url else None
+
+@lru_cache
+def get_async_sessionmaker() -> async_sessionmaker:
+    replica = get_async_replica_engine()
+    return async_sessionmaker(
+        get_async_engine(),
+        # attributes stay loaded after commit, lazy loads can't run outside of await
+        expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        info={"replica": replica.sync_engine if replica is not None else None},
+    )
+
+@contextmanager
+def _reading(session: Optional[Session]):
+    if session is None or session.info.get("replica") is None or session.info.get("read_only"):
+        yield
+        return
+    session.info["read_only"] = True
+    try:
+        yield
+    finally:
+        session.info["read_only"] = False
+
+def _session_of(repo) -> Optional[Session]:
+    for value in vars(repo).values():
+        if isinstance(value, AsyncSession):
+            return value.sync_session
+        if isinstance(value, Session):
+            return value
+    return None
+
+def read_only(method):
+    """Route the queries of a repository method to the read replica.
+
+    Only for methods that never write: rows read from a lagging replica must
+    not be modified and flushed back. Write paths look rows up themselves
+    instead of calling the decorated getters.
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            with _reading(_session_of(self)):
+                return await method(self, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with _reading(_session_of(self)):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def pool_status() -> dict:
+    return {
+        name: db_engine.pool.status_dict() if hasattr(db_engine.pool, "status_dict") else {"pool": db_engine.pool.status()}
+        for name, db_engine in engines.items()
+    }
+
 def get_db():
+    # Creating a session is free, it only checks a connection out of the pool
+    # when the first query runs and returns it on commit, rollback or close.
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+async def dispose_async_engine():
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    replica = get_async_replica_engine() if get_async_replica_engine.cache_info().currsize else None
+    if replica is not None:
+        await replica.dispose()
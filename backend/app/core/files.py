@@ -0,0 +1,83 @@
+import os
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+# headers a 304 repeats from the 200 it stands for
+NOT_MODIFIED_HEADERS = ("etag", "last-modified", "cache-control", "vary", "expires")
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+class ConditionalFileResponse(FileResponse):
+    """FileResponse with a content-derived ETag and conditional GET.
+
+    A given etag (the stored SHA-256 of the file) replaces Starlette's
+    mtime/size one, so it survives copies and restores and a matching
+    If-None-Match is answered with 304 before the file is even stat'ed.
+    Range and multi-range requests are served by FileResponse.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        etag: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        **kwargs,
+    ):
+        headers = dict(kwargs.pop("headers", None) or {})
+        if etag:
+            headers["etag"] = f'"{etag}"'
+        if cache_control:
+            headers["cache-control"] = cache_control
+        super().__init__(path, headers=headers, **kwargs)
+        if chunk_size:
+            self.chunk_size = chunk_size
+
+    def __not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-Modified-Since is ignored when If-None-Match is present
+            return "etag" in self.headers and etag_matches(if_none_match, self.headers["etag"])
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None or "last-modified" not in self.headers:
+            return False
+        try:
+            return parsedate_to_datetime(self.headers["last-modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    async def __send_not_modified(self, send: Send):
+        headers = [(name, value) for name, value in self.raw_headers if name.decode("latin-1") in NOT_MODIFIED_HEADERS]
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.status_code != 200 or scope["method"].upper() not in ("GET", "HEAD"):
+            return await super().__call__(scope, receive, send)
+
+        request_headers = Headers(scope=scope)
+        if "if-none-match" in request_headers and "etag" in self.headers:
+            if self.__not_modified(request_headers):
+                return await self.__send_not_modified(send)
+
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            self.set_stat_headers(self.stat_result)
+
+        if self.__not_modified(request_headers):
+            return await self.__send_not_modified(send)
+
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,37 @@
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+class Lazy(Generic[T]):
+    """Stands in for a module-level service, built by factory when it is first used.
+
+    Services read the settings when they are created; creating them on first
+    use keeps importing a module free of config.yaml and of their startup cost.
+    Attributes are read from and written to the service, so monkeypatching
+    works as on the service itself.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_Lazy__factory", factory)
+        object.__setattr__(self, "_Lazy__lock", threading.Lock())
+        object.__setattr__(self, "_Lazy__instance", None)
+
+    def _resolve(self) -> T:
+        if self.__instance is None:
+            with self.__lock:
+                if self.__instance is None:
+                    object.__setattr__(self, "_Lazy__instance", self.__factory())
+        return self.__instance
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._resolve(), name)
+
+    def __repr__(self) -> str:
+        return f"Lazy({self.__instance!r})" if self.__instance is not None else f"Lazy({self.__factory!r})"
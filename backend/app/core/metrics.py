@@ -0,0 +1,187 @@
+import bisect, math, threading, time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds, for request and upstream call latencies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# label of requests no route matched, keeps unknown paths from adding series
+UNMATCHED_ROUTE = "<unmatched>"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+def _format_number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_number(value)}" for name, labels, value in self.samples())
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+class Histogram(Metric):
+    """Observation counts per bucket, cumulated only when rendered"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str):
+        # the bucket whose upper bound is the first >= value, the last one is +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                series = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self._values.items()]
+        for labelvalues, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(
+                    (*self.labelnames, "le"), (*labelvalues, _format_number(bound))
+                ), cumulative
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text format.
+
+    Every worker process keeps its own; a scrape sees the worker that
+    answered it, so scrape each worker or run one per pod. Collectors are
+    called at scrape time for values that are cheaper to read then than to
+    keep up to date, such as pool occupancy.
+    """
+
+    def __init__(self):
+        self.__metrics: List[Metric] = []
+        self.__collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.__metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, collect: Callable[[], Iterable[Metric]]):
+        self.__collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.__metrics:
+            lines.extend(metric.render())
+        for collect in self.__collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to the end of its response body, streamed bodies included",
+    ("method", "route", "status"),
+)
+
+def route_of(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+class MetricsMiddleware:
+    """Request latency per route template and status, and requests in flight.
+
+    The route is known only once the router has matched it, so in-flight
+    requests are kept by scope and grouped by route when scraped, which
+    also leaves a request that is still being routed visible.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.active: Dict[int, Scope] = {}
+        registry.collector(self.__in_progress)
+
+    def __in_progress(self) -> Iterable[Metric]:
+        gauge = Gauge("http_requests_in_progress", "Requests being served, by route template", ("method", "route"))
+        for scope in list(self.active.values()):
+            gauge.inc(scope["method"], route_of(scope))
+        return [gauge]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        key = id(scope)
+        self.active[key] = scope
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route_of(scope), str(status_code))
+            del self.active[key]
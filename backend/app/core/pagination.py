@@ -0,0 +1,57 @@
+"""Keyset pagination over the primary key.
+
+A cursor is the opaque, URL-safe encoding of the id of the last row on a
+page. The next page starts strictly after it, so the database seeks
+straight to it through the id index whatever the depth, where OFFSET has
+to walk and discard every earlier row. Ids are assigned in insertion order
+and never change, unlike the created_at/uploaded_at columns, which are
+bumped on every update and stored at a coarser precision than a cursor
+would carry them.
+"""
+import base64, binascii, json
+from typing import Any, List, NamedTuple, Optional
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+def encode_cursor(id: int) -> str:
+    raw = json.dumps(id).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw)
+        # cursors handed out before paging by id were [timestamp, id]
+        return int(value[-1] if isinstance(value, list) else value)
+    except (binascii.Error, ValueError, TypeError, IndexError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def keyset(statement, id_column, cursor: Optional[str], limit: int):
+    """Order a Select or Query by id and start it after cursor.
+
+    Fetches one row more than limit so paginate() can tell whether another
+    page follows.
+    """
+    if cursor:
+        statement = statement.filter(id_column > decode_cursor(cursor))
+    return statement.order_by(id_column).limit(limit + 1)
+
+def paginate(rows: List[Any], limit: int) -> Page:
+    if len(rows) <= limit:
+        return Page(rows, None)
+    return Page(rows[:limit], encode_cursor(rows[limit - 1].id))
+
+def use_offset(skip: int, cursor: Optional[str]) -> bool:
+    """Whether a list request uses the legacy skip/limit mode"""
+    if skip and cursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either skip or cursor, not both")
+    return bool(skip)
+
+def set_next_cursor(response: Response, page: Page):
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
@@ -0,0 +1,76 @@
+import threading, time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+class PoolStats:
+    """Checkout counters of one connection pool"""
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        # checkouts requested while every connection, overflow included, was in use
+        self.saturated = 0
+        self.timeouts = 0
+
+    def record(self, wait: float, saturated: bool, timed_out: bool):
+        with self.__lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.saturated += saturated
+            self.timeouts += timed_out
+
+    def as_dict(self) -> dict:
+        with self.__lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "saturated": self.saturated,
+                "timeouts": self.timeouts,
+            }
+
+class _InstrumentedMixin:
+    stats: PoolStats
+
+    def _do_get(self):
+        # max_overflow -1 means unbounded, such a pool never saturates
+        saturated = self._max_overflow >= 0 and self.checkedout() >= self.size() + self._max_overflow
+        timed_out = False
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - start, saturated, timed_out)
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool, keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def status_dict(self) -> dict:
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            **self.stats.as_dict(),
+        }
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+class InstrumentedAsyncQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
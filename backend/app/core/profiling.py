@@ -0,0 +1,218 @@
+import asyncio, collections, hashlib, hmac, logging, os, random, re, sys, sysconfig, threading, time, tracemalloc
+from functools import lru_cache
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config.profiling import ProfilingConfig
+from app.core.metrics import route_of
+from app.utils import get_profile_dir
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+# a thread whose innermost frame is one of these is parked, not working
+IDLE_FILES = {"threading.py", "queue.py", "selectors.py"}
+IDLE_FUNCTIONS = {("thread.py", "_worker")}
+
+def sign(secret: str, expires: int) -> str:
+    """Header value allowing profiling until the unix time expires"""
+    digest = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+def verify(secret: str, token: str) -> bool:
+    expires, _, _ = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(sign(secret, int(expires)), token)
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    if "site-packages" + os.sep in filename:
+        return filename.rpartition("site-packages" + os.sep)[2]
+    for root in (BACKEND_DIR, STDLIB_DIR):
+        if filename.startswith(root + os.sep):
+            return os.path.relpath(filename, root)
+    return filename
+
+def is_idle(frame) -> bool:
+    filename = os.path.basename(frame.f_code.co_filename)
+    return filename in IDLE_FILES or (filename, frame.f_code.co_name) in IDLE_FUNCTIONS
+
+def collapse(root: str, frame) -> str:
+    """One stack as root;outermost;...;innermost, the collapsed format flamegraph tools read"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of the process's threads every interval.
+
+    The event loop thread is always sampled, so the time a coroutine spends
+    awaiting shows as the loop's select(); other threads only while they run
+    something, which leaves idle pool workers out but takes in the work of
+    requests served alongside the profiled one.
+    """
+
+    def __init__(self, loop_thread: int, interval: float, max_seconds: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.__stopped = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self.__stopped.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident != self.loop_thread and is_idle(frame):
+                    continue
+                self.stacks[collapse(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self.__stopped.set()
+        self.join()
+
+class RequestProfile:
+    def __init__(self, config: ProfilingConfig, name: str):
+        self.config = config
+        self.name = name
+        self.sampler = StackSampler(threading.get_ident(), config.interval_seconds, config.max_seconds)
+        self.owns_tracemalloc = False
+        self.started = 0.0
+        self.seconds = 0.0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.config.traceback_frames)
+            self.owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self):
+        self.seconds = time.perf_counter() - self.started
+        self.sampler.stop()
+
+    def write(self, directory: str, request: str):
+        """Snapshot the allocations, write both files and trim the directory; blocking"""
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+        finally:
+            if self.owns_tracemalloc:
+                tracemalloc.stop()
+
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.name)
+        with open(f"{base}.collapsed", "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in self.sampler.stacks.most_common())
+
+        statistics = snapshot.statistics("traceback")[:self.config.top_allocations]
+        with open(f"{base}.alloc.txt", "w") as f:
+            f.write(f"{request}\n")
+            f.write(f"{self.seconds * 1000:.1f} ms, {self.sampler.samples} samples, peak traced memory {peak / 2**20:.1f} MiB\n")
+            f.write("allocations made during the request and still alive at its end, largest first\n\n")
+            for stat in statistics:
+                f.write(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                f.writelines(f"{line}\n" for line in stat.traceback.format(most_recent_first=True))
+                f.write("\n")
+        prune(directory, self.config.max_profiles)
+
+def prune(directory: str, keep: int):
+    # profile names start with their timestamp, so they sort oldest first
+    profiles = sorted({name.partition(".")[0] for name in os.listdir(directory)})
+    for profile in profiles[:max(len(profiles) - keep, 0)]:
+        for suffix in (".collapsed", ".alloc.txt"):
+            try:
+                os.remove(os.path.join(directory, profile + suffix))
+            except FileNotFoundError:
+                pass
+
+class ProfilingMiddleware:
+    """Profiles a request that carries a signed header or is sampled.
+
+    The request runs under a stack sampler and tracemalloc; its collapsed
+    stacks (for flamegraph.pl or speedscope) and top allocation sites go to
+    the profile directory, which keeps the newest max_profiles, and the
+    response names them in X-Profile-Id. One request per worker is profiled
+    at a time, others asking meanwhile are served as usual. Requests that
+    are not triggered pay for the header and sampling check only.
+    """
+
+    def __init__(self, app: ASGIApp, config: ProfilingConfig):
+        self.app = app
+        self.config = config
+        self.header = config.header.lower().encode("latin-1")
+        self.sample_paths = tuple(config.sample_paths)
+        self.directory = get_profile_dir()
+        self.__busy = threading.Lock()
+
+    def __signed(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return verify(self.config.secret, value.decode("latin-1"))
+        return False
+
+    def __sampled(self, scope: Scope) -> bool:
+        return random.random() < self.config.sample_rate and (not self.sample_paths or scope["path"].startswith(self.sample_paths))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or not ((self.config.secret and self.__signed(scope)) or (self.config.sample_rate > 0 and self.__sampled(scope)))
+            or not self.__busy.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.__profile(scope, receive, send)
+        finally:
+            self.__busy.release()
+
+    async def __profile(self, scope: Scope, receive: Receive, send: Send):
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.urandom(3).hex()}"
+        status_code = 500
+
+        async def send_with_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profile = RequestProfile(self.config, profile_id)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.stop()
+            route = route_of(scope)
+            profile.name = f"{profile_id}-{scope['method']}-{re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_')}"
+            request = f"{scope['method']} {scope['path']} ({route}) -> {status_code}"
+            try:
+                await asyncio.to_thread(profile.write, self.directory, request)
+                logger.info(f"Profiled {request} into {profile.name}")
+            except OSError as e:
+                logger.error(f"Could not write profile {profile.name}: {e}")
+
+if __name__ == "__main__":
+    # python -m app.core.profiling [ttl]: a header value good for ttl seconds, 300 by default
+    from app.config import Settings
+    config = Settings.get_settings().profiling
+    if not config.secret:
+        sys.exit("profiling.secret is not set")
+    ttl = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    print(f"{config.header}: {sign(config.secret, int(time.time()) + ttl)}")
@@ -0,0 +1,128 @@
+import functools, inspect
+from typing import Any, Callable, Optional
+import pydantic_core
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.exceptions import ResponseValidationError
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+
+from app.config import config, settings_loaded
+
+class EncodedJSON(bytes):
+    """A body already serialized to JSON, passed through by FastJSONResponse"""
+
+class FastJSONResponse(JSONResponse):
+    """JSON in one pass through pydantic-core.
+
+    Models, datetimes and enums such as UserRole are encoded by the same
+    serializer as response_model output, compact and UTF-8 like JSONResponse,
+    which it extends so the OpenAPI schema still documents the model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, EncodedJSON):
+            return bytes(content)
+        return pydantic_core.to_json(content)
+
+class FastJSONRoute(APIRoute):
+    """APIRoute whose response_model output skips the dict and json.dumps() pass.
+
+    With app.fast_json on, the endpoint is wrapped so that its return value
+    is validated and encoded by a TypeAdapter of the route's response_model,
+    with the same options FastAPI would use, and returned as a
+    FastJSONResponse that FastAPI sends as is. Headers and a status code set
+    on an injected Response are kept. The encoding runs inline, in async
+    endpoints too: pydantic-core takes less than a threadpool hop would for
+    typical pages. The route itself, its dependencies and its OpenAPI
+    schema are unchanged.
+
+    FastAPI builds request handlers from route.endpoint: for routers at
+    app.include_router() or their first request, depending on its version,
+    either way after create_app() loaded the settings. Routers define their
+    routes on import, before that, so `endpoint` is the wrapper only once
+    the settings are loaded and app.fast_json is on, and the plain endpoint
+    otherwise. The TypeAdapter is built on the first request.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        self.__adapter: Optional[TypeAdapter] = None
+        super().__init__(path, endpoint, **kwargs)
+
+    @property
+    def endpoint(self) -> Callable:
+        if not (settings_loaded() and config.app.fast_json):
+            return self.__endpoint
+        if self.__wrapper is None:
+            self.__wrapper = self.__wrap(self.__endpoint)
+        return self.__wrapper
+
+    @endpoint.setter
+    def endpoint(self, endpoint: Callable):
+        # include_router() of older FastAPI creates the route again from the wrapper
+        self.__endpoint = getattr(endpoint, "fast_json_endpoint", endpoint)
+        self.__wrapper: Optional[Callable] = None
+
+    def __fast(self, content: Any) -> bool:
+        return self.response_model is not None and not isinstance(content, Response)
+
+    def __wrap(self, endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        # FastAPI injects one Response per request into the parameter annotated with it;
+        # the endpoint's own is reused, there can only be one
+        response_name = next((name for name, parameter in signature.parameters.items() if parameter.annotation is Response), None)
+        own_response = response_name is not None
+        parameters = list(signature.parameters.values())
+        if not own_response:
+            response_name = "fast_json_response"
+            parameters.append(inspect.Parameter(response_name, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+        def call_arguments(kwargs: dict):
+            response = kwargs[response_name] if own_response else kwargs.pop(response_name)
+            return kwargs, response
+
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(**kwargs):
+                kwargs, response = call_arguments(kwargs)
+                content = await endpoint(**kwargs)
+                if not self.__fast(content):
+                    return content
+                return self.__render(content, response)
+        else:
+            @functools.wraps(endpoint)
+            def wrapper(**kwargs):
+                kwargs, response = call_arguments(kwargs)
+                content = endpoint(**kwargs)
+                if not self.__fast(content):
+                    return content
+                return self.__render(content, response)
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        wrapper.fast_json_endpoint = endpoint
+        return wrapper
+
+    def __render(self, content: Any, response: Response) -> FastJSONResponse:
+        if self.__adapter is None:
+            self.__adapter = TypeAdapter(self.response_model)
+        try:
+            value = self.__adapter.validate_python(content, from_attributes=True)
+        except ValidationError as e:
+            raise ResponseValidationError(e.errors(include_url=False), body=content)
+        # no dict of the response is built, TypeAdapter.dump_json encodes the models directly
+        body = EncodedJSON(self.__adapter.dump_json(
+            value,
+            include=self.response_model_include,
+            exclude=self.response_model_exclude,
+            by_alias=self.response_model_by_alias,
+            exclude_unset=self.response_model_exclude_unset,
+            exclude_defaults=self.response_model_exclude_defaults,
+            exclude_none=self.response_model_exclude_none,
+        ))
+        rendered = FastJSONResponse(body, status_code=response.status_code or self.status_code or 200)
+        # as FastAPI merges them into the responses it renders
+        rendered.raw_headers.extend(response.raw_headers)
+        return rendered
+
+# the route class of every router, its fast path is opted into with app.fast_json
+JSONRoute = FastJSONRoute
@@ -1,22 +1,43 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 
-from ..config import Settings
-config = Settings.get_settings()
+from ..config import config
+from .lazy import Lazy
 
-SECRET_KEY = config.security.jwt_secret
-ALGORITHM =  config.security.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min and max to the configured cost makes verify_and_update() flag
+# hashes made with any other cost, so they are rehashed on the next login.
+pwd_context: CryptContext = Lazy(lambda: CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=config.security.bcrypt_rounds,
+    bcrypt__min_rounds=config.security.bcrypt_rounds,
+    bcrypt__max_rounds=config.security.bcrypt_rounds,
+))
+
+# Every bcrypt call goes through this pool, which bounds how many cores a
+# burst of logins can take and keeps the work off the event loop.
+hash_executor: ThreadPoolExecutor = Lazy(lambda: ThreadPoolExecutor(max_workers=config.security.hash_workers, thread_name_prefix="bcrypt"))
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hash_executor.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_executor.submit(pwd_context.hash, password).result()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Return whether the password matches, and a new hash if the stored one uses an outdated cost"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -25,5 +46,5 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now() + timedelta(hours=24)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    encoded_jwt = jwt.encode(to_encode, config.security.jwt_secret, algorithm=config.security.algorithm)
+    return encoded_jwt
@@ -0,0 +1,10 @@
+from functools import lru_cache
+from pathlib import Path
+from app.config import config
+
+@lru_cache
+def get_templates():
+    """Jinja2 environment of the frontend pages, shared by every router and built on first render"""
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory=str(Path(config.app.base_path, "frontend")))
@@ -3,7 +3,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .config import Settings
-from .routers import home, health, chat, login, user, project, document
+from .routers import home, health, chat, login, user, project, document, search
+from .services.message import message_service
+from .services.ingestion import ingestion_service
+from .services.storage_gc import storage_collector
+from .core.compression import CompressionMiddleware
+from .core.metrics import MetricsMiddleware
+from .core.profiling import ProfilingMiddleware
+from .core.admission import AdmissionMiddleware, admission, configure_threadpool
+from .core.database import dispose_async_engine, get_engine
+from .migrations import run_migrations
 from .utils import init_root_project_dir
 
 
@@ -23,11 +32,25 @@ def create_app() -> FastAPI:
     async def lifespan(app: FastAPI):  
         # Startup 
         setup_logging(config)
+        configure_threadpool()
         logging.info(f"Starting chat application in {config.app.env} environment")
         logging.info(f"API prefix: {config.app.api_prefix}")
         logging.info(f"Enabled components: {config.app.components}")
+        if config.database.migrate_on_startup:
+            applied = run_migrations(get_engine())
+            if applied:
+                logging.info(f"Applied migrations: {', '.join(applied)}")
+        if config.ingestion.enabled:
+            ingestion_service.start()
+            ingestion_service.resume_pending()
+        if config.storage_gc.enabled:
+            storage_collector.start()
         yield  
         # Shutdown  
+        await message_service.close()
+        storage_collector.shutdown()
+        ingestion_service.shutdown()
+        await dispose_async_engine()
         logging.info("Shutting down and byebye...") 
     
     app = FastAPI(
@@ -41,6 +64,12 @@ def create_app() -> FastAPI:
     )
 
 
+    # the last added is the outermost
+    if config.profiling.enabled:
+        app.add_middleware(ProfilingMiddleware, config=config.profiling)
+    if config.admission.enabled:
+        # inside CORS, so the 503s it refuses requests with carry the CORS headers
+        app.add_middleware(AdmissionMiddleware, controller=admission)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],  # Change this in production to restrict domains
@@ -48,17 +77,30 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if config.compression.enabled:
+        app.add_middleware(CompressionMiddleware, config=config.compression)
+    if config.metrics.enabled:
+        # outermost, so the latency includes the other middleware
+        app.add_middleware(MetricsMiddleware)
 
+    app.include_router(health.router)
     app.include_router(home.router)
     app.include_router(login.router)
     app.include_router(user.router)
     app.include_router(project.router)
     app.include_router(document.router)
+    app.include_router(search.router)
     app.include_router(chat.router, prefix=config.app.api_prefix)
 
     return app
 
-app = create_app()
+def __getattr__(name: str):
+    # `uvicorn app.main:app` reads it; created on first access, so importing
+    # this module neither reads config.yaml nor builds the routes
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,113 @@
+"""Schema migrations for the models in app.models.
+
+Each migration is a module with an upgrade(connection) function, listed in
+MIGRATIONS in the order it applies. Applied versions are recorded in the
+schema_migrations table and every migration runs in its own transaction,
+with foreign key enforcement off on SQLite so tables can be rebuilt.
+Deployments that predate this runner created their tables by hand, and the
+baseline creates missing tables from the current models, so migrations
+check what already exists instead of assuming an exact starting schema.
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations --status   # list applied and pending versions
+"""
+import fcntl, importlib, logging
+from contextlib import contextmanager
+from typing import List, Tuple
+from sqlalchemy import Column, DateTime, MetaData, String, Table, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import func
+from app.migrations.operations import AFTER_COMMIT
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    "m0001_baseline",
+    "m0002_columns_since_baseline",
+    "m0003_indexes_and_foreign_keys",
+    "m0004_blob_store",
+    "m0005_tombstones",
+    "m0006_keyset_on_id",
+    "m0007_ingestion_lease",
+    "m0008_user_auth_version",
+    "m0009_sqlite_foreign_keys",
+    "m0010_unique_document_names",
+]
+
+# arbitrary key for pg_advisory_xact_lock, shared by every runner
+LOCK_KEY = 7_146_002
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(128), primary_key=True),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+def _lock(connection: Connection):
+    # several workers may start at once; only one migrates, the others wait
+    # and then find the versions already recorded
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+
+@contextmanager
+def _exclusive(engine: Engine):
+    # SQLite has no advisory locks, runners sharing a database file take turns on a lock file next to it
+    database = engine.url.database if engine.dialect.name == "sqlite" else None
+    if not database or database == ":memory:":
+        yield
+        return
+    with open(f"{database}.migrate.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+@contextmanager
+def _transaction(engine: Engine):
+    sqlite = engine.dialect.name == "sqlite"
+    callbacks = []
+    with engine.connect() as connection:
+        if sqlite:
+            # a no-op inside a transaction, so set before it begins
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+        try:
+            with connection.begin():
+                _lock(connection)
+                yield connection
+            callbacks = connection.info.pop(AFTER_COMMIT, [])
+        finally:
+            # a rolled back migration's callbacks must not run with the next one
+            connection.info.pop(AFTER_COMMIT, None)
+            if sqlite:
+                connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+                connection.commit()
+    for callback in callbacks:
+        callback()
+
+def _applied(connection: Connection) -> set:
+    return set(connection.scalars(select(schema_migrations.c.version)))
+
+def migration_status(engine: Engine) -> List[Tuple[str, bool]]:
+    with engine.connect() as connection:
+        applied = _applied(connection) if engine.dialect.has_table(connection, "schema_migrations") else set()
+    return [(version, version in applied) for version in MIGRATIONS]
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order and return the versions applied"""
+    with _exclusive(engine):
+        with _transaction(engine) as connection:
+            schema_migrations.create(connection, checkfirst=True)
+
+        applied_now = []
+        for version in MIGRATIONS:
+            with _transaction(engine) as connection:
+                if version in _applied(connection):
+                    continue
+                logger.info(f"Applying migration {version}")
+                importlib.import_module(f"{__name__}.{version}").upgrade(connection)
+                connection.execute(insert(schema_migrations).values(version=version))
+            applied_now.append(version)
+        return applied_now
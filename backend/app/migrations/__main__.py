@@ -0,0 +1,16 @@
+import argparse, logging
+from app.core.database import get_engine
+from app.migrations import migration_status, run_migrations
+
+parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Apply pending schema migrations")
+parser.add_argument("--status", action="store_true", help="list applied and pending migrations without applying")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s %(message)s")
+engine = get_engine()
+if args.status:
+    for version, applied in migration_status(engine):
+        print(f"{'applied' if applied else 'pending':<8} {version}")
+else:
+    applied = run_migrations(engine)
+    print(f"Applied {len(applied)} migration(s)" + (f": {', '.join(applied)}" if applied else ""))
@@ -0,0 +1,12 @@
+"""Create every missing table from the models.
+
+Databases set up by hand already have the original tables, which are left
+alone; a new database gets the complete current schema here, and the later
+migrations find nothing left to do.
+"""
+from sqlalchemy.engine import Connection
+from app.core.database import Base
+import app.models.user, app.models.project, app.models.document, app.models.blob, app.models.chat  # noqa: F401 register the tables
+
+def upgrade(connection: Connection):
+    Base.metadata.create_all(connection)
@@ -0,0 +1,10 @@
+"""Columns added to the original tables for uploads, ingestion and the retrieval cache"""
+from sqlalchemy.engine import Connection
+from app.migrations.operations import add_column
+from app.models.document import DocumentModels
+from app.models.project import ProjectModels
+
+def upgrade(connection: Connection):
+    for column_name in ("sha256", "size", "ingestion_status", "ingestion_error", "page_count"):
+        add_column(connection, DocumentModels.__table__, column_name)
+    add_column(connection, ProjectModels.__table__, "content_version")
@@ -0,0 +1,41 @@
+"""Indexes for the hot lookups and foreign keys with cascading deletes.
+
+documents.project_id was served by a (project_id, uploaded_at, id) index;
+m0006 replaced the timestamp indexes, which are no longer created here.
+projects.owner_id gets no foreign key: deleting a user must not silently
+delete their projects, whose files live on disk.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations.operations import add_foreign_key, create_index, delete_duplicates
+from app.models.document import DocumentModels, DocumentPageModels, DocumentChunkModels
+from app.models.project import ProjectModels, ProjectAccessModels
+from app.models.user import UserModels
+
+def _index(table, name):
+    return next((index for index in table.indexes if index.name == name), None)
+
+def upgrade(connection: Connection):
+    project_access = ProjectAccessModels.__table__
+    delete_duplicates(connection, project_access, "project_id", "user_id")
+
+    for table, name in (
+        (DocumentModels.__table__, "ix_documents_project_id_uploaded_at_id"),
+        (ProjectModels.__table__, "ix_projects_owner_id"),
+        (ProjectModels.__table__, "ix_projects_created_at_id"),
+        (project_access, "ux_project_access_project_id_user_id"),
+        (project_access, "ix_project_access_user_id"),
+        (UserModels.__table__, "ix_user_created_at_id"),
+    ):
+        index = _index(table, name)
+        if index is not None:
+            create_index(connection, index)
+
+    for table, name in (
+        (DocumentModels.__table__, "fk_documents_project_id"),
+        (project_access, "fk_project_access_project_id"),
+        (project_access, "fk_project_access_user_id"),
+        (DocumentPageModels.__table__, "fk_document_pages_document_id"),
+        (DocumentChunkModels.__table__, "fk_document_chunks_document_id"),
+        (DocumentChunkModels.__table__, "fk_document_chunks_project_id"),
+    ):
+        add_foreign_key(connection, table, name)
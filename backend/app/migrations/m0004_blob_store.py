@@ -0,0 +1,101 @@
+"""Move uploaded files into the content-addressed blob store.
+
+Files stored as <project name>/<filename> are hashed, linked into the blob
+store under their SHA-256 and their documents repointed at the key, with
+one blobs row per distinct content. The original paths are only removed
+once the migration committed, so a failure leaves the old layout in place
+for a retry.
+The baseline stored the bare file name, relative to the project's
+directory, later releases a path relative to the storage root; both are
+looked up as BlobStore.resolve does. Documents whose file is missing, or
+whose file_url leads out of the storage root, keep their old file_url and
+that file is neither linked nor removed.
+"""
+import hashlib, logging, os, shutil
+from collections import Counter
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Connection
+from app.migrations.operations import after_commit
+from app.models.blob import BlobModels
+from app.models.document import DocumentModels
+from app.models.project import ProjectModels
+from app.services.blob_store import blob_store
+
+logger = logging.getLogger(__name__)
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _link(source: str, key: str):
+    target = blob_store.path(key)
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        # another filesystem, or links unsupported
+        shutil.copy2(source, target)
+
+def upgrade(connection: Connection):
+    BlobModels.__table__.create(connection, checkfirst=True)
+
+    documents = connection.execute(
+        select(DocumentModels.id, DocumentModels.file_url, DocumentModels.sha256, ProjectModels.name)
+        .outerjoin(ProjectModels, ProjectModels.id == DocumentModels.project_id)
+    ).all()
+    references, sizes, moved = Counter(), {}, set()
+    for document_id, file_url, sha256, project_name in documents:
+        if not file_url or blob_store.is_key(file_url):
+            continue
+        path = blob_store.resolve(file_url, project_name)
+        if path is None:
+            logger.warning(f"File of document {document_id} is outside the storage root, left unmigrated")
+            continue
+        if os.path.isfile(path):
+            key = _sha256(path)
+            _link(path, key)
+            moved.add(path)
+        elif blob_store.is_key(sha256) and os.path.isfile(blob_store.path(sha256)):
+            key = sha256
+        else:
+            logger.warning(f"File of document {document_id} not found at {path}, left unmigrated")
+            continue
+
+        sizes[key] = os.path.getsize(blob_store.path(key))
+        references[key] += 1
+        connection.execute(
+            update(DocumentModels)
+            .where(DocumentModels.id == document_id)
+            .values(file_url=key, sha256=key, size=sizes[key], uploaded_at=DocumentModels.uploaded_at)
+        )
+
+    existing = set(connection.scalars(select(BlobModels.sha256).where(BlobModels.sha256.in_(list(references)))))
+    for key, count in references.items():
+        if key in existing:
+            connection.execute(update(BlobModels).where(BlobModels.sha256 == key).values(refcount=BlobModels.refcount + count))
+        else:
+            connection.execute(insert(BlobModels).values(sha256=key, size=sizes[key], refcount=count))
+
+    logical = sum(sizes[key] * count for key, count in references.items())
+    stored = sum(sizes.values())
+    if moved:
+        logger.info(
+            f"Moved {len(moved)} files into {len(references)} blobs: {logical} bytes stored as {stored}, "
+            f"dedup ratio {logical / stored:.2f}, {logical - stored} bytes reclaimed"
+        )
+
+    after_commit(connection, lambda: _remove(moved))
+
+def _remove(paths: set):
+    for path in paths:
+        os.remove(path)
+    for directory in {os.path.dirname(path) for path in paths}:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass  # not empty, something else lives there
@@ -0,0 +1,20 @@
+"""Tombstones for deferred deletes and the indexes the storage collector scans"""
+from sqlalchemy.engine import Connection
+from app.migrations.operations import add_column, create_index
+from app.models.document import DocumentModels
+from app.models.project import ProjectModels
+
+def _index(table, name):
+    return next(index for index in table.indexes if index.name == name)
+
+def upgrade(connection: Connection):
+    add_column(connection, ProjectModels.__table__, "deleted_at")
+    add_column(connection, DocumentModels.__table__, "deleted_at")
+
+    for table, name in (
+        (ProjectModels.__table__, "ix_projects_deleted_at"),
+        (DocumentModels.__table__, "ix_documents_deleted_at"),
+        # blob references are counted per file_url
+        (DocumentModels.__table__, "ix_documents_file_url"),
+    ):
+        create_index(connection, _index(table, name))
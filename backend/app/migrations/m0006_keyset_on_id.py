@@ -0,0 +1,17 @@
+"""Listings page by id, which replaces the (timestamp, id) indexes"""
+from sqlalchemy.engine import Connection
+from app.migrations.operations import create_index, drop_index
+from app.models.document import DocumentModels
+
+def _index(table, name):
+    return next(index for index in table.indexes if index.name == name)
+
+def upgrade(connection: Connection):
+    create_index(connection, _index(DocumentModels.__table__, "ix_documents_project_id_id"))
+
+    for table_name, index_name in (
+        ("documents", "ix_documents_project_id_uploaded_at_id"),
+        ("projects", "ix_projects_created_at_id"),
+        ("user", "ix_user_created_at_id"),
+    ):
+        drop_index(connection, table_name, index_name)
@@ -0,0 +1,7 @@
+"""Leases on running ingestions, so only one worker processes a document"""
+from sqlalchemy.engine import Connection
+from app.migrations.operations import add_column
+from app.models.document import DocumentModels
+
+def upgrade(connection: Connection):
+    add_column(connection, DocumentModels.__table__, "ingestion_claimed_at")
@@ -0,0 +1,7 @@
+"""A version per user, so every worker notices changes to a cached user"""
+from sqlalchemy.engine import Connection
+from app.migrations.operations import add_column
+from app.models.user import UserModels
+
+def upgrade(connection: Connection):
+    add_column(connection, UserModels.__table__, "auth_version")
@@ -0,0 +1,13 @@
+"""Foreign keys for SQLite databases created before m0003.
+
+m0003 could only add them on Postgres, SQLite gets them by rebuilding each
+table; databases created from the models already have them.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations.operations import rebuild_with_foreign_keys
+from app.models.document import DocumentModels, DocumentPageModels, DocumentChunkModels
+from app.models.project import ProjectAccessModels
+
+def upgrade(connection: Connection):
+    for model in (DocumentModels, DocumentPageModels, DocumentChunkModels, ProjectAccessModels):
+        rebuild_with_foreign_keys(connection, model.__table__)
@@ -0,0 +1,32 @@
+"""A unique index on the file names of a project's live documents.
+
+upload_documents checked names before inserting, so concurrent uploads of
+the same name could both pass. Of each group of live duplicates the oldest
+document is kept and the others are deleted like any document, by setting
+deleted_at; the storage collector purges them and releases their files.
+"""
+import logging
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection
+from app.migrations.operations import create_index
+from app.models.document import DocumentModels
+
+logger = logging.getLogger(__name__)
+
+def upgrade(connection: Connection):
+    documents = DocumentModels.__table__
+    live = documents.c.deleted_at.is_(None)
+    oldest = (
+        select(func.min(documents.c.id))
+        .where(live, documents.c.filename.is_not(None))
+        .group_by(documents.c.project_id, documents.c.filename)
+    )
+    duplicates = connection.execute(
+        update(documents)
+        .where(live, documents.c.filename.is_not(None), documents.c.id.not_in(oldest))
+        .values(deleted_at=func.now(), uploaded_at=documents.c.uploaded_at)
+    ).rowcount
+    if duplicates:
+        logger.warning(f"Deleted {duplicates} documents whose file name another document of their project already had")
+
+    create_index(connection, next(index for index in documents.indexes if index.name == "ux_documents_project_id_filename"))
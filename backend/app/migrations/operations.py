@@ -0,0 +1,120 @@
+"""Idempotent schema operations for migrations"""
+import logging
+from sqlalchemy import ForeignKeyConstraint, Index, MetaData, Table, delete, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import AddConstraint, CreateColumn, CreateTable
+from sqlalchemy.types import SchemaType
+
+logger = logging.getLogger(__name__)
+
+# connection.info key of the callbacks run_migrations calls once the migration committed
+AFTER_COMMIT = "migrations_after_commit"
+
+def after_commit(connection: Connection, callback):
+    """Run callback after the migration's transaction committed, e.g. to delete files it replaced"""
+    connection.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+def add_column(connection: Connection, table: Table, column_name: str) -> bool:
+    """Add a column of a model table if the database lacks it"""
+    if column_name in {column["name"] for column in inspect(connection).get_columns(table.name)}:
+        return False
+
+    column = table.c[column_name]
+    if isinstance(column.type, SchemaType):
+        # e.g. the named ENUM type a Postgres enum column needs
+        column.type.create(connection, checkfirst=True)
+    table_name = connection.dialect.identifier_preparer.format_table(table)
+    connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {CreateColumn(column).compile(dialect=connection.dialect)}")
+    return True
+
+def create_index(connection: Connection, index: Index) -> bool:
+    if index.name in {existing["name"] for existing in inspect(connection).get_indexes(index.table.name)}:
+        return False
+    index.create(connection)
+    return True
+
+def drop_index(connection: Connection, table_name: str, index_name: str) -> bool:
+    if index_name not in {existing["name"] for existing in inspect(connection).get_indexes(table_name)}:
+        return False
+    connection.exec_driver_sql(f"DROP INDEX {connection.dialect.identifier_preparer.quote(index_name)}")
+    return True
+
+def delete_duplicates(connection: Connection, table: Table, *column_names: str) -> int:
+    """Keep only the oldest row of each group of rows that are equal on column_names"""
+    oldest = select(func.min(table.c.id)).group_by(*(table.c[name] for name in column_names))
+    deleted = connection.execute(delete(table).where(table.c.id.not_in(oldest))).rowcount
+    if deleted:
+        logger.warning(f"Deleted {deleted} duplicate rows from {table.name}")
+    return deleted
+
+def _delete_orphans(connection: Connection, table: Table, constraint: ForeignKeyConstraint):
+    for element in constraint.elements:
+        column, parent = element.parent, element.column
+        orphans = connection.execute(delete(table).where(
+            column.is_not(None),
+            column.not_in(select(parent)),
+        )).rowcount
+        if orphans:
+            logger.warning(f"Deleted {orphans} rows of {table.name} whose {column.name} has no {parent.table.name} row")
+
+def add_foreign_key(connection: Connection, table: Table, name: str) -> bool:
+    """Add a named foreign key of a model table, deleting rows it would reject.
+
+    Rows pointing at a parent that no longer exists are leftovers of
+    deletes the application did before the constraint existed. SQLite cannot
+    add constraints to an existing table, there rebuild_with_foreign_keys
+    recreates the table instead.
+    """
+    if connection.dialect.name == "sqlite":
+        return False
+    if name in {existing["name"] for existing in inspect(connection).get_foreign_keys(table.name)}:
+        return False
+
+    constraint = next(c for c in table.foreign_key_constraints if c.name == name)
+    _delete_orphans(connection, table, constraint)
+    connection.execute(AddConstraint(constraint))
+    return True
+
+def rebuild_with_foreign_keys(connection: Connection, table: Table) -> bool:
+    """Recreate a SQLite table from its model when it lacks the model's foreign keys.
+
+    Follows https://www.sqlite.org/lang_altertable.html#otheralter: a new
+    table is created, filled, and renamed over the old one, then the indexes
+    the old table had are created again. Needs PRAGMA foreign_keys=OFF, which
+    run_migrations sets on SQLite, or dropping the old table would cascade
+    into its children. Tables with columns the model does not know are left
+    alone rather than losing data.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    inspector = inspect(connection)
+    existing = {foreign_key["name"] for foreign_key in inspector.get_foreign_keys(table.name)}
+    if {constraint.name for constraint in table.foreign_key_constraints} <= existing:
+        return False
+
+    columns = [column["name"] for column in inspector.get_columns(table.name)]
+    unknown = set(columns) - set(table.c.keys())
+    if unknown:
+        logger.warning(f"Not adding foreign keys to {table.name}, the model lacks its columns {sorted(unknown)}")
+        return False
+    indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+
+    for constraint in table.foreign_key_constraints:
+        _delete_orphans(connection, table, constraint)
+
+    # the copy needs the tables it references in its metadata to compile the REFERENCES clauses
+    metadata = MetaData()
+    for foreign_key in table.foreign_keys:
+        foreign_key.column.table.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name=f"_rebuild_{table.name}")
+    connection.execute(CreateTable(rebuilt))
+    connection.execute(insert(rebuilt).from_select(columns, select(*(table.c[name] for name in columns))))
+
+    preparer = connection.dialect.identifier_preparer
+    connection.exec_driver_sql(f"DROP TABLE {preparer.format_table(table)}")
+    connection.exec_driver_sql(f"ALTER TABLE {preparer.format_table(rebuilt)} RENAME TO {preparer.format_table(table)}")
+    for index in table.indexes:
+        if index.name in indexes:
+            index.create(connection)
+    logger.info(f"Rebuilt {table.name} with its foreign keys")
+    return True
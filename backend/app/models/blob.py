@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class BlobModels(Base):
+    __tablename__ = "blobs"
+
+    # hex SHA-256 of the content, also the key documents store in file_url
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    # documents pointing at the blob; the file is deleted once it drops to zero
+    refcount = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, default=func.now())
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class ChatMessageModels(Base):
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_conversation_id_id", "conversation_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(String(64), nullable=False)
+    is_user = Column(Boolean, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=func.now(), index=True)
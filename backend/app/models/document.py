@@ -1,13 +1,58 @@
-from sqlalchemy import Column, Integer, String, DateTime
+import enum
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Enum, Index, ForeignKey, text
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 
+class IngestionStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class DocumentModels(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # keyset pagination of a project's documents, and plain lookups by project
+        Index("ix_documents_project_id_id", "project_id", "id"),
+        Index("ix_documents_file_url", "file_url"),
+        Index("ix_documents_deleted_at", "deleted_at"),
+        # file names are unique among the live documents of a project, a deleted name can be reused
+        Index(
+            "ux_documents_project_id_filename", "project_id", "filename", unique=True,
+            postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE", name="fk_documents_project_id"))
     filename = Column(String)
     file_url = Column(String)
-    uploaded_at = Column(DateTime, default=func.now(), onupdate=func.now())
\ No newline at end of file
+    sha256 = Column(String(64))
+    size = Column(BigInteger)
+    ingestion_status = Column(Enum(IngestionStatus))
+    ingestion_error = Column(String)
+    # when the running ingestion last renewed its claim, stale claims are taken over
+    ingestion_claimed_at = Column(DateTime)
+    page_count = Column(Integer)
+    uploaded_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # set when the document is deleted, the storage collector purges it later
+    deleted_at = Column(DateTime)
+
+class DocumentPageModels(Base):
+    __tablename__ = "document_pages"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE", name="fk_document_pages_document_id"), index=True)
+    page_number = Column(Integer)
+    text = Column(Text)
+
+class DocumentChunkModels(Base):
+    __tablename__ = "document_chunks"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE", name="fk_document_chunks_document_id"), index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE", name="fk_document_chunks_project_id"), index=True)
+    page_number = Column(Integer)
+    position = Column(Integer)
+    text = Column(Text)
@@ -1,17 +1,24 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index, ForeignKey
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 
 class ProjectModels(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_deleted_at", "deleted_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    owner_id = Column(Integer)
+    owner_id = Column(Integer, index=True)
     name = Column(String)
     description = Column(String)
+    # bumped on every document change, keys cached search results
+    content_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # set when the project is deleted, the storage collector purges it later
+    deleted_at = Column(DateTime)
 
 class ProjectAccessLevel(str, enum.Enum):
     ADMIN = "admin"
@@ -20,9 +27,13 @@ class ProjectAccessLevel(str, enum.Enum):
 
 class ProjectAccessModels(Base):
     __tablename__ = "project_access"
+    __table_args__ = (
+        # one grant per user and project; also serves lookups by project_id
+        Index("ux_project_access_project_id_user_id", "project_id", "user_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer)
-    user_id = Column(Integer)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE", name="fk_project_access_project_id"))
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE", name="fk_project_access_user_id"), index=True)
     access_level = Column(Enum(ProjectAccessLevel))
     granted_at = Column(DateTime, default=func.now(), onupdate=func.now())
\ No newline at end of file
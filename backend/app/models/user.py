@@ -10,7 +10,6 @@ class UserRole(str, enum.Enum):
 
 class UserModels(Base):
     __tablename__ = "user"
-
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     username = Column(String, unique=True, index=True)
@@ -19,4 +18,6 @@ class UserModels(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now(), onupdate=func.now())  # Last Modified Timestamp
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())  # Last Modified Timestamp
-    status = Column(Integer, default=1)
\ No newline at end of file
+    status = Column(Integer, default=1)
+    # bumped on every update of the user
+    auth_version = Column(Integer, nullable=False, default=0, server_default="0")
\ No newline at end of file
@@ -1,42 +1,97 @@
-import os
-from typing import List, Annotated
+import os, hashlib, mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Annotated, NamedTuple, Optional
 from fastapi import Depends, HTTPException, UploadFile, File, status
-from fastapi.responses import FileResponse
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, read_only
+from app.core.files import ConditionalFileResponse
+from app.core.lazy import Lazy
+from app.core.pagination import Page, keyset, paginate
+from app.models.blob import BlobModels
 from app.models.project import ProjectModels
-from app.models.document import DocumentModels
+from app.repositories.project import bump_content_version
+from app.models.document import DocumentModels, DocumentPageModels, DocumentChunkModels, IngestionStatus
 from app.schemas.document import DocumentCreate, DocumentUpdate
-from app.utils import (
-    get_root_project_dir,
-    get_project_dir,
-    get_relative_path
-)
+from app.schemas.search import ChunkResult, SearchResult
+from app.services.blob_store import blob_store
+from app.services.ingestion import ingestion_service
+from app.services.vector_index import vector_index_service
+from app.services.search_index import search_index_service, make_snippet
+from app.services.retrieval_cache import retrieval_cache
+from app.utils import check_file_signature
 
-from app.config import Settings
-config = Settings.get_settings()
+from app.config import config
+
+def document_filters(
+    project_id: int,
+    ingestion_status: Optional[IngestionStatus] = None,
+    filename: Optional[str] = None,
+) -> list:
+    filters = [DocumentModels.project_id == project_id, DocumentModels.deleted_at.is_(None)]
+    if ingestion_status is not None:
+        filters.append(DocumentModels.ingestion_status == ingestion_status)
+    if filename:
+        filters.append(DocumentModels.filename.startswith(filename, autoescape=True))
+    return filters
+
+# bounds concurrent disk writes across all upload requests of this process
+upload_executor: ThreadPoolExecutor = Lazy(lambda: ThreadPoolExecutor(max_workers=config.upload.write_workers, thread_name_prefix="upload"))
+
+class StoredFile(NamedTuple):
+    filename: str
+    # staged in the blob store until the documents are committed
+    path: str
+    sha256: str
+    size: int
 
 class DocumentRepo:
     def __init__(self, db: Session = Depends(get_db)):  # ✅ Injects the DB session
         self.__db = db
 
-    def create_document(self, project_id: int, document_data: DocumentCreate):
+    def create_document(self, project_id: int, document_data: DocumentCreate, ingestion_status: Optional[IngestionStatus] = None):
         project = self.__db.query(ProjectModels).filter(
-            DocumentModels.project_id == project_id
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
         ).first()
         
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-        new_document = DocumentModels(**document_data.model_dump())
+
+        sha256, size = document_data.sha256, document_data.size
+        if blob_store.is_key(document_data.file_url):
+            # a new document row shares an already stored file, e.g. one copied from another project
+            blob = self.__get_blob(document_data.file_url)
+            sha256, size = blob.sha256, blob.size
+            blob_store.acquire(self.__db, [(blob.sha256, blob.size)])
+        # otherwise file_url names a file of the project's directory, as before the blob store
+        new_document = DocumentModels(
+            # the project is the one of the path, which the access check ran against
+            **document_data.model_dump(exclude={"project_id", "sha256", "size"}),
+            project_id=project_id,
+            sha256=sha256,
+            size=size,
+            ingestion_status=ingestion_status,
+        )
         self.__db.add(new_document)
+        bump_content_version(self.__db, project_id)
         self.__db.commit()
         self.__db.refresh(new_document)
         return new_document
 
+    def __get_blob(self, key: str) -> BlobModels:
+        blob = self.__db.get(BlobModels, key) if blob_store.is_key(key) else None
+        if not blob or blob.refcount <= 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="file_url must be the key of a stored file")
+        return blob
+
+    @read_only
     def get_document(self, project_id: int, document_id: int):
         project = self.__db.query(ProjectModels).filter(
-            ProjectModels.id == project_id
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
         ).first()
 
         if not project:
@@ -44,25 +99,41 @@ class DocumentRepo:
         
         document = self.__db.query(DocumentModels).filter(
             DocumentModels.project_id == project_id,
-            DocumentModels.id == document_id
+            DocumentModels.id == document_id,
+            DocumentModels.deleted_at.is_(None)
         ).first()
 
         if not document:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+        return document
 
-    def get_documents_in_project(self, project_id: int, skip: int = 0, limit: int = 10):
+    @read_only
+    def get_documents_in_project(self, project_id: int, skip: int = 0, limit: int = 10, **filters):
         project = self.__db.query(ProjectModels).filter(
-            ProjectModels.id == project_id
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
         ).first()
 
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
         
-        return self.__db.query(DocumentModels).filter(DocumentModels.project_id == project_id).offset(skip).limit(limit).all()
+        return self.__db.query(DocumentModels).filter(*document_filters(project_id, **filters)).offset(skip).limit(limit).all()
+
+    @read_only
+    def get_documents_page(self, project_id: int, cursor: Optional[str] = None, limit: int = 10, **filters) -> Page:
+        if not self.__db.query(ProjectModels.id).filter(ProjectModels.id == project_id, ProjectModels.deleted_at.is_(None)).first():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+        query = keyset(
+            self.__db.query(DocumentModels).filter(*document_filters(project_id, **filters)),
+            DocumentModels.id, cursor, limit,
+        )
+        return paginate(query.all(), limit)
 
     def update_document(self, project_id: int, document_id: int, document_data: DocumentUpdate):
         project = self.__db.query(ProjectModels).filter(
-            ProjectModels.id == project_id
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
         ).first()
 
         if not project:
@@ -70,22 +141,57 @@ class DocumentRepo:
         
         document = self.__db.query(DocumentModels).filter(
             DocumentModels.project_id == project_id,
-            DocumentModels.id == document_id
+            DocumentModels.id == document_id,
+            DocumentModels.deleted_at.is_(None)
         ).first()
 
         if not document:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
-        for key, value in document_data.model_dump(exclude_unset=True).items():
+        changes = document_data.model_dump(exclude_unset=True)
+        previous_file_url = document.file_url
+        if "file_url" in changes and changes["file_url"] != previous_file_url:
+            if blob_store.is_key(changes["file_url"]):
+                blob = self.__get_blob(changes["file_url"])
+                blob_store.acquire(self.__db, [(blob.sha256, blob.size)])
+                document.sha256, document.size = blob.sha256, blob.size
+            else:
+                # a legacy path, whose content is not known
+                document.sha256, document.size = None, None
+            blob_store.release(self.__db, [previous_file_url])
+        for key, value in changes.items():
             setattr(document, key, value)
 
+        bump_content_version(self.__db, project_id)
         self.__db.commit()
         self.__db.refresh(document)
+        if document.file_url != previous_file_url:
+            blob_store.collect([previous_file_url])
         return document
 
+    def __remove_documents(self, project_id: int, documents: List[DocumentModels]):
+        document_ids = [document.id for document in documents]
+        self.__db.query(DocumentPageModels).filter(DocumentPageModels.document_id.in_(document_ids)).delete()
+        self.__db.query(DocumentChunkModels).filter(DocumentChunkModels.document_id.in_(document_ids)).delete()
+        self.__db.query(DocumentModels).filter(DocumentModels.id.in_(document_ids)).delete()
+        blob_store.release(self.__db, [document.file_url for document in documents])
+        self.__db.commit()
+        blob_store.collect(document.file_url for document in documents)
+        for document_id in document_ids:
+            vector_index_service.remove_document(project_id, document_id)
+            search_index_service.remove_document(project_id, document_id)
+        self.__bump_after_indexing(project_id)
+
+    def __bump_after_indexing(self, project_id: int):
+        # only once the indexes changed, or a search in between would cache
+        # their old results under the new version
+        bump_content_version(self.__db, project_id)
+        self.__db.commit()
+
     def delete_document(self, project_id: int, document_id: int):
         project = self.__db.query(ProjectModels).filter(
-            ProjectModels.id == project_id
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
         ).first()
 
         if not project:
@@ -93,24 +199,29 @@ class DocumentRepo:
         
         document = self.__db.query(DocumentModels).filter(
             DocumentModels.project_id == project_id,
-            DocumentModels.id == document_id
+            DocumentModels.id == document_id,
+            DocumentModels.deleted_at.is_(None)
         ).first()
         
         if not document:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
-        document_abspath = os.path.join(get_root_project_dir(), document.file_url)
-        if os.path.exists(document_abspath):
-            os.remove(document_abspath)
-            print("Deleted file: ", document_abspath)
-
-        self.__db.delete(document)
+        # tombstoned only, the storage collector deletes its rows and file in the background
+        self.__db.execute(
+            update(DocumentModels)
+            .where(DocumentModels.id == document.id)
+            .values(deleted_at=func.now(), uploaded_at=DocumentModels.uploaded_at)
+        )
         self.__db.commit()
+        vector_index_service.remove_document(project_id, document.id)
+        search_index_service.remove_document(project_id, document.id)
+        self.__bump_after_indexing(project_id)
         return document
 
     def download_document(self, project_id: int, document_id: int):
         project = self.__db.query(ProjectModels).filter(
-            ProjectModels.id == project_id
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
         ).first()
 
         if not project:
@@ -118,79 +229,339 @@ class DocumentRepo:
 
         document = self.__db.query(DocumentModels).filter(
             DocumentModels.project_id == project_id,
-            DocumentModels.id == document_id
+            DocumentModels.id == document_id,
+            DocumentModels.deleted_at.is_(None)
         ).first()
 
-        project_dir = get_project_dir(project.name)
-        document_path = os.path.join(project_dir, document.file_url)
+        if not document:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+        document_path = blob_store.resolve(document.file_url, project.name)
 
-        if not os.path.exists(document_path):
+        if document_path is None or not os.path.exists(document_path):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
-        
-        return FileResponse(document_path)
+
+        return ConditionalFileResponse(
+            document_path,
+            # blobs have no extension, the type comes from the document's name
+            media_type=mimetypes.guess_type(document.filename)[0],
+            etag=document.sha256,
+            cache_control=config.download.cache_control,
+            chunk_size=config.download.chunk_size,
+        )
     
-    def save_document(self, file: UploadFile, save_dir: str) -> str:
-        file_location = os.path.join(save_dir, file.filename)
+    def save_document(self, file: UploadFile) -> StoredFile:
+        """Stream the upload into the blob store's staging area in fixed-size chunks.
+
+        The SHA-256 and byte count are computed while writing; the staged file
+        is published under its hash only once its document is committed, so a
+        failed or rejected upload never leaves a partial or orphaned blob.
+        """
+        filename = os.path.basename(file.filename or "")
+        if not filename:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File name is required")
+
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in config.upload.allowed_extensions:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"File type '{extension}' is not allowed")
+
+        chunk_size = config.upload.chunk_size
+        max_size = config.upload.max_file_size
+        sha256 = hashlib.sha256()
+        size = 0
+        temp_path = None
 
-        if os.path.exists(file_location):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File with this name already exists")
-        
         try:
-            
-            with open(file_location, "wb") as buffer:
-                buffer.write(file.file.read())
-            return file_location
+            with blob_store.staging_file() as buffer:
+                temp_path = buffer.name
+                while True:
+                    chunk = file.file.read(chunk_size)
+                    if not chunk:
+                        break
+
+                    if size == 0 and not check_file_signature(filename, chunk):
+                        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="File content does not match its extension")
+
+                    size += len(chunk)
+                    if size > max_size:
+                        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"File exceeds the maximum size of {max_size} bytes")
+
+                    sha256.update(chunk)
+                    buffer.write(chunk)
 
+                if size == 0:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File is empty")
+
+                buffer.flush()
+                os.fsync(buffer.fileno())
+
+            stored = StoredFile(filename=filename, path=temp_path, sha256=sha256.hexdigest(), size=size)
+            temp_path = None
+            return stored
+
+        except HTTPException:
+            raise
         except OSError as e:
             # Handle OS-related errors (e.g., permission issues)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error saving file: {str(e)}")
         except Exception as e:
             # Handle any other exceptions
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def __taken_names(self, project_id: int, names: set) -> set:
+        return set(self.__db.scalars(select(DocumentModels.filename).where(
+            DocumentModels.project_id == project_id,
+            DocumentModels.filename.in_(names),
+            DocumentModels.deleted_at.is_(None),
+        )))
+
+    def __insert_documents(self, project_id: int, stored_files: List[StoredFile], ingestible: List[bool]) -> List[DocumentModels]:
+        new_documents = self.__db.scalars(
+            insert(DocumentModels).returning(DocumentModels, sort_by_parameter_order=True),
+            [
+                {
+                    "project_id": project_id,
+                    "filename": stored.filename,
+                    "file_url": stored.sha256,
+                    "sha256": stored.sha256,
+                    "size": stored.size,
+                    "ingestion_status": IngestionStatus.QUEUED if ingest else None,
+                }
+                for stored, ingest in zip(stored_files, ingestible)
+            ],
+        ).all()
+        blob_store.acquire(self.__db, [(stored.sha256, stored.size) for stored in stored_files])
+        bump_content_version(self.__db, project_id)
+        self.__db.commit()
+        return new_documents
 
     def upload_documents(self, project_id: int, files: List[UploadFile]):
+        """Store a batch of uploads and record them in a single transaction.
+
+        Files are staged in parallel on the shared upload pool, then every
+        stored file is inserted with one bulk INSERT ... RETURNING, its blob
+        referenced and the batch committed once. Each file still succeeds or
+        fails on its own.
+        """
         project = self.__db.query(ProjectModels).filter(
-            ProjectModels.id == project_id
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
         ).first()
 
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
         
-        success_documents = []
         error_documents = []
+
+        def add_error(file: UploadFile, e: Exception):
+            error_documents.append({
+                "filename": file.filename,
+                "message": e.detail if isinstance(e, HTTPException) else str(e),
+                "status": e.status_code if isinstance(e, HTTPException) else status.HTTP_500_INTERNAL_SERVER_ERROR,
+            })
+
+        def name_taken(file: UploadFile):
+            add_error(file, HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File with this name already exists"))
+
+        # file names stay unique within a project, as they were when each was a path
+        taken = self.__taken_names(project.id, {os.path.basename(file.filename or "") for file in files})
+        pending = []
         for file in files:
-            try:
-                project_dir = get_project_dir(project.name)
-                os.makedirs(project_dir, exist_ok=True)
-                
-                # file_location = self.save_document(file, project_dir)
-                
-                # Create a DocumentCreate instance
-                new_document = self.create_document(DocumentCreate(
-                    project_id=project.id,
-                    filename=file.filename,
-                    file_url=file.filename
-                ))
-                
-                success_documents.append(new_document)
-            except HTTPException as e:
-                error_documents.append({
-                    "filename": file.filename,
-                    "message": e.detail,
-                    "status": e.status_code,
-                })
+            name = os.path.basename(file.filename or "")
+            if name and name in taken:
+                name_taken(file)
                 continue
+            taken.add(name)
+            pending.append((file, upload_executor.submit(self.save_document, file)))
+
+        stored_files = []
+        for file, future in pending:
+            try:
+                stored_files.append((file, future.result()))
+            except Exception as e:
+                add_error(file, e)
+
+        if not stored_files:
+            return [], error_documents
+
+        while True:
+            ingestible = [config.ingestion.enabled and ingestion_service.is_ingestible(stored.filename) for _, stored in stored_files]
+            try:
+                new_documents = self.__insert_documents(project.id, [stored for _, stored in stored_files], ingestible)
+                break
+            except IntegrityError as e:
+                self.__db.rollback()
+                # a concurrent upload took some of the names since they were checked, the rest is retried
+                taken = self.__taken_names(project.id, {stored.filename for _, stored in stored_files})
+                failed = [(file, stored) for file, stored in stored_files if stored.filename in taken] or stored_files
+                for file, stored in failed:
+                    os.remove(stored.path)
+                    if taken:
+                        name_taken(file)
+                    else:
+                        add_error(file, e)
+                stored_files = [item for item in stored_files if item not in failed]
             except Exception as e:
-                error_documents.append({
-                    "filename": file.filename,
-                    "message": str(e),
-                    "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                })
+                self.__db.rollback()
+                for file, stored in stored_files:
+                    os.remove(stored.path)
+                    add_error(file, e)
+                stored_files = []
+            if not stored_files:
+                return [], error_documents
+
+        published, unpublished = [], []
+        for document, (file, stored), ingest in zip(new_documents, stored_files, ingestible):
+            try:
+                blob_store.publish(stored.path, stored.sha256)
+            except OSError as e:
+                os.remove(stored.path)
+                add_error(file, HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error saving file: {str(e)}"))
+                unpublished.append(document)
                 continue
-        
-        # print("success", success_documents)
-        # print("error", error_documents)
-        
-        return success_documents, error_documents
+            published.append(document)
+            if ingest:
+                ingestion_service.submit(document.id, project.id, document.file_url)
+
+        if unpublished:
+            self.__remove_documents(project.id, unpublished)
+        return published, error_documents
+
+    def retrieve_chunks(self, project_id: int, query: str, k: int) -> List[ChunkResult]:
+        project = self.__db.query(ProjectModels).filter(
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
+        ).first()
+
+        if not project:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+        cache_key = retrieval_cache.key("retrieve", project_id, project.content_version, query, k)
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            return [ChunkResult(**item) for item in cached]
+
+        hits = vector_index_service.search(project_id, query, k)
+        if not hits:
+            retrieval_cache.set(cache_key, [])
+            return []
+
+        chunks = {
+            chunk.id: chunk
+            for chunk in self.__db.query(DocumentChunkModels).join(
+                DocumentModels, DocumentModels.id == DocumentChunkModels.document_id
+            ).filter(
+                DocumentChunkModels.id.in_([chunk_id for chunk_id, _, _ in hits]),
+                # other workers' indexes may still hold a deleted document until it is purged
+                DocumentModels.deleted_at.is_(None),
+            ).all()
+        }
+        results = [
+            ChunkResult(
+                document_id=document_id,
+                chunk_id=chunk_id,
+                page_number=chunks[chunk_id].page_number,
+                score=score,
+                text=chunks[chunk_id].text,
+            )
+            for chunk_id, document_id, score in hits
+            if chunk_id in chunks
+        ]
+        retrieval_cache.set(cache_key, [result.model_dump() for result in results])
+        return results
+
+    def search_chunks(self, project_id: int, query: str, limit: int) -> List[SearchResult]:
+        project = self.__db.query(ProjectModels).filter(
+            ProjectModels.id == project_id,
+            ProjectModels.deleted_at.is_(None)
+        ).first()
+
+        if not project:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+        cache_key = retrieval_cache.key("search", project_id, project.content_version, query, limit)
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            return [SearchResult(**item) for item in cached]
+
+        hits = search_index_service.search(self.__db, project_id, query, limit)
+        if not hits:
+            retrieval_cache.set(cache_key, [])
+            return []
+
+        rows = {
+            chunk_id: (page_number, text, filename)
+            for chunk_id, page_number, text, filename in self.__db.query(
+                DocumentChunkModels.id,
+                DocumentChunkModels.page_number,
+                DocumentChunkModels.text,
+                DocumentModels.filename,
+            ).join(
+                DocumentModels, DocumentModels.id == DocumentChunkModels.document_id
+            ).filter(
+                DocumentChunkModels.id.in_([chunk_id for chunk_id, _, _ in hits]),
+                DocumentModels.deleted_at.is_(None),
+            ).all()
+        }
+        results = [
+            SearchResult(
+                document_id=document_id,
+                filename=rows[chunk_id][2],
+                chunk_id=chunk_id,
+                page_number=rows[chunk_id][0],
+                score=score,
+                snippet=make_snippet(rows[chunk_id][1], query),
+            )
+            for chunk_id, document_id, score in hits
+            if chunk_id in rows
+        ]
+        retrieval_cache.set(cache_key, [result.model_dump() for result in results])
+        return results
+
+DocumentDep = Annotated[DocumentRepo, Depends()]
+
+class AsyncDocumentRepo:
+    """Read side of DocumentRepo for async routes; uploads and deletes also touch the filesystem and stay sync"""
+
+    def __init__(self, db: AsyncSession = Depends(get_async_db)):
+        self.__db = db
+
+    async def __check_project(self, project_id: int):
+        if not await self.__db.scalar(select(ProjectModels.id).where(ProjectModels.id == project_id, ProjectModels.deleted_at.is_(None))):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    @read_only
+    async def get_document(self, project_id: int, document_id: int):
+        await self.__check_project(project_id)
+
+        document = await self.__db.scalar(select(DocumentModels).where(
+            DocumentModels.project_id == project_id,
+            DocumentModels.id == document_id,
+            DocumentModels.deleted_at.is_(None)
+        ))
+        if not document:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+        return document
+
+    @read_only
+    async def get_documents_in_project(self, project_id: int, skip: int = 0, limit: int = 10, **filters):
+        await self.__check_project(project_id)
+
+        return (await self.__db.scalars(
+            select(DocumentModels).where(*document_filters(project_id, **filters)).offset(skip).limit(limit)
+        )).all()
+
+    @read_only
+    async def get_documents_page(self, project_id: int, cursor: Optional[str] = None, limit: int = 10, **filters) -> Page:
+        await self.__check_project(project_id)
+
+        statement = keyset(
+            select(DocumentModels).where(*document_filters(project_id, **filters)),
+            DocumentModels.id, cursor, limit,
+        )
+        return paginate((await self.__db.scalars(statement)).all(), limit)
 
-DocumentDep = Annotated[DocumentRepo, Depends()]
\ No newline at end of file
+AsyncDocumentDep = Annotated[AsyncDocumentRepo, Depends()]
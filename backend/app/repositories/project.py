@@ -1,69 +1,74 @@
-import os, shutil
-from typing import List, Annotated
+from typing import Iterable, List, Annotated, Optional
 from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy import select, update
 from sqlalchemy.sql import func
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, read_only
+from app.core.pagination import Page, keyset, paginate
 from app.models.user import UserModels, UserRole
-from app.models.project import ProjectModels, ProjectAccessModels
+from app.models.project import ProjectModels, ProjectAccessModels, ProjectAccessLevel
 from app.schemas.project import ProjectCreate, ProjectUpdate
-from app.utils import get_project_dir
+from app.services.access_cache import access_cache
+from app.services.blob_store import blob_store
 
-from app.config import Settings
-config = Settings.get_settings()
+def project_filters(owner_id: Optional[int] = None, name: Optional[str] = None, ids: Optional[Iterable[int]] = None) -> list:
+    filters = [ProjectModels.deleted_at.is_(None)]
+    if ids is not None:
+        filters.append(ProjectModels.id.in_(ids))
+    if owner_id is not None:
+        filters.append(ProjectModels.owner_id == owner_id)
+    if name:
+        filters.append(ProjectModels.name.startswith(name, autoescape=True))
+    return filters
 
 class ProjectRepo:
     def __init__(self, db: Session = Depends(get_db)):
         self.__db = db
     
-    def check_project_access(self, project_id: int, user: UserModels):
-        """Check if the user has access to the project, allowing superadmins full access"""
-        if user.role == UserRole.SUPERADMIN:
-            return  # Superadmins can access all projects
-
-        access = self.__db.query(ProjectAccessModels).filter(
-            ProjectAccessModels.project_id == project_id,
-            ProjectAccessModels.user_id == user.id
-        ).first()
-
-        if not access:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this project")
+    def check_project_access(self, project_id: int, user: UserModels, level: ProjectAccessLevel = ProjectAccessLevel.READ):
+        """Check if the user has at least level on the project, allowing superadmins full access"""
+        access_cache.check(self.__db, user, project_id, level)
     
     def create_project(self, project_data: ProjectCreate):
         if " " in project_data.name:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Project name must not include space")
-        
-        os.makedirs(get_project_dir(project_data.name), exist_ok=True)
 
         new_project = ProjectModels(**project_data.model_dump())
         self.__db.add(new_project)
         self.__db.commit()
         self.__db.refresh(new_project)
+        # the owner holds admin on the new project
+        access_cache.invalidate(new_project.owner_id)
         return new_project
 
+    @read_only
     def get_project(self, project_id: int):
-        project = self.__db.query(ProjectModels).filter(ProjectModels.id == project_id).first()
+        project = self.__db.query(ProjectModels).filter(ProjectModels.id == project_id, ProjectModels.deleted_at.is_(None)).first()
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        return project
 
-    def get_all_projects(self, skip: int = 0, limit: int = 10):
-        return self.__db.query(ProjectModels).offset(skip).limit(limit).all()
+    @read_only
+    def get_all_projects(self, skip: int = 0, limit: int = 10, **filters):
+        return self.__db.query(ProjectModels).filter(*project_filters(**filters)).offset(skip).limit(limit).all()
+
+    @read_only
+    def get_projects_page(self, cursor: Optional[str] = None, limit: int = 10, **filters) -> Page:
+        query = keyset(self.__db.query(ProjectModels).filter(*project_filters(**filters)), ProjectModels.id, cursor, limit)
+        return paginate(query.all(), limit)
 
     def update_project(self, project_id: int, project_data: ProjectUpdate):
-        project = self.__db.query(ProjectModels).filter(ProjectModels.id == project_id).first()
+        """Metadata only: files are stored by content, not under the project's name"""
+        project = self.__db.query(ProjectModels).filter(ProjectModels.id == project_id, ProjectModels.deleted_at.is_(None)).first()
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-        project_path = get_project_dir(project.name)
-        new_project_path = get_project_dir(project_data.name)
+        changes = project_data.model_dump(exclude_unset=True)
+        if " " in (changes.get("name") or ""):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Project name must not include space")
 
-        for key, value in project_data.model_dump(exclude_unset=True).items():
-            if key == "name":
-                if not os.path.exists(project_path):
-                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-                
-                os.rename(project_path, new_project_path)
-                
+        for key, value in changes.items():
             setattr(project, key, value)
 
         self.__db.commit()
@@ -71,16 +76,111 @@ class ProjectRepo:
         return project
 
     def delete_project(self, project_id: int):
-        project = self.__db.query(ProjectModels).filter(ProjectModels.id == project_id).first()
+        project = self.__db.query(ProjectModels).filter(ProjectModels.id == project_id, ProjectModels.deleted_at.is_(None)).first()
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
         
-        project_path = get_project_dir(project.name)
-        if os.path.exists(project_path):
-            shutil.rmtree(project_path)
+        affected_users = {project.owner_id, *self.__db.scalars(
+            select(ProjectAccessModels.user_id).where(ProjectAccessModels.project_id == project_id)
+        )}
 
-        self.__db.delete(project)
+        # tombstoned only, the storage collector purges documents, files and indexes in the background
+        self.__db.execute(
+            update(ProjectModels)
+            .where(ProjectModels.id == project_id)
+            .values(deleted_at=func.now(), created_at=ProjectModels.created_at)
+        )
+        self.__db.query(ProjectAccessModels).filter(ProjectAccessModels.project_id == project_id).delete()
         self.__db.commit()
+        for user_id in affected_users:
+            access_cache.invalidate(user_id)
         return project
 
-ProjectDep = Annotated[ProjectRepo, Depends()]
\ No newline at end of file
+    def get_project_access(self, project_id: int) -> List[ProjectAccessModels]:
+        self.get_project(project_id)
+        return self.__db.query(ProjectAccessModels).filter(
+            ProjectAccessModels.project_id == project_id
+        ).order_by(ProjectAccessModels.user_id).all()
+
+    def grant_access(self, project_id: int, user_id: int, level: ProjectAccessLevel) -> ProjectAccessModels:
+        """Give the user level on the project, replacing any previous grant"""
+        project = self.__db.get(ProjectModels, project_id)
+        if not project or project.deleted_at is not None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        if not self.__db.get(UserModels, user_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        access = self.__db.query(ProjectAccessModels).filter(
+            ProjectAccessModels.project_id == project_id,
+            ProjectAccessModels.user_id == user_id
+        ).first()
+        if access:
+            access.access_level = level
+        else:
+            access = ProjectAccessModels(project_id=project_id, user_id=user_id, access_level=level)
+            self.__db.add(access)
+
+        self.__db.commit()
+        self.__db.refresh(access)
+        access_cache.invalidate(user_id)
+        return access
+
+    def revoke_access(self, project_id: int, user_id: int):
+        deleted = self.__db.query(ProjectAccessModels).filter(
+            ProjectAccessModels.project_id == project_id,
+            ProjectAccessModels.user_id == user_id
+        ).delete()
+        if not deleted:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Access grant not found")
+
+        self.__db.commit()
+        access_cache.invalidate(user_id)
+
+    @read_only
+    def get_storage_stats(self) -> dict:
+        return blob_store.stats(self.__db)
+
+ProjectDep = Annotated[ProjectRepo, Depends()]
+
+class AsyncProjectRepo:
+    """Read side of ProjectRepo for async routes; writes also touch the filesystem and stay sync"""
+
+    def __init__(self, db: AsyncSession = Depends(get_async_db)):
+        self.__db = db
+
+    async def check_project_access(self, project_id: int, user: UserModels, level: ProjectAccessLevel = ProjectAccessLevel.READ):
+        await access_cache.check_async(self.__db, user, project_id, level)
+
+    async def get_accessible_project_ids(self, user: UserModels) -> Optional[List[int]]:
+        """Projects the user can read, None when they can read every project"""
+        if user.role == UserRole.SUPERADMIN:
+            return None
+        return list(await access_cache.levels_async(self.__db, user.id))
+
+    @read_only
+    async def get_project(self, project_id: int):
+        project = await self.__db.get(ProjectModels, project_id)
+        if not project or project.deleted_at is not None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        return project
+
+    @read_only
+    async def get_all_projects(self, skip: int = 0, limit: int = 10, **filters):
+        statement = select(ProjectModels).where(*project_filters(**filters)).offset(skip).limit(limit)
+        return (await self.__db.scalars(statement)).all()
+
+    @read_only
+    async def get_projects_page(self, cursor: Optional[str] = None, limit: int = 10, **filters) -> Page:
+        statement = keyset(select(ProjectModels).where(*project_filters(**filters)), ProjectModels.id, cursor, limit)
+        return paginate((await self.__db.scalars(statement)).all(), limit)
+
+AsyncProjectDep = Annotated[AsyncProjectRepo, Depends()]
+
+def bump_content_version(db: Session, project_id: int):
+    """Invalidate cached search results of a project, committed with the caller's transaction"""
+    db.execute(
+        update(ProjectModels)
+        .where(ProjectModels.id == project_id)
+        # created_at has onupdate=now, keep it as is
+        .values(content_version=ProjectModels.content_version + 1, created_at=ProjectModels.created_at)
+    )
@@ -1,136 +1,233 @@
 import enum
-from typing import List
+from typing import List, Optional
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core import security
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, read_only
+from app.core.pagination import Page, keyset, paginate
 from app.models.user import UserModels, UserRole
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.access_cache import access_cache
+from app.services.user_cache import user_cache
+
+def user_filters(role: Optional[UserRole] = None, is_active: Optional[bool] = None) -> list:
+    filters = []
+    if role is not None:
+        filters.append(UserModels.role == role)
+    if is_active is not None:
+        filters.append(UserModels.is_active == is_active)
+    return filters
+
+# statements and checks shared by UserRepo and AsyncUserRepo, which differ only in how they run them
+
+def select_existing_user(user_data: UserCreate):
+    return select(UserModels).where(
+        (UserModels.email == user_data.email) | (UserModels.username == user_data.username)
+    ).limit(1)
+
+def select_user_by(column, value):
+    # write paths read from the primary, never through the replica getters,
+    # and refresh a row a getter may already have loaded from the replica
+    return select(UserModels).where(column == value).limit(1).execution_options(populate_existing=True)
+
+def select_users(skip: int, limit: int, **filters):
+    return select(UserModels).where(*user_filters(**filters)).offset(skip).limit(limit)
+
+def select_users_page(cursor: Optional[str], limit: int, **filters):
+    return keyset(select(UserModels).where(*user_filters(**filters)), UserModels.id, cursor, limit)
+
+def update_password_hash_statement(user_id: int, hashed_password: str):
+    # created_at has onupdate=now, keep it as is
+    return update(UserModels).where(UserModels.id == user_id).values(
+        hashed_password=hashed_password, created_at=UserModels.created_at
+    )
+
+def new_user(user_data: UserCreate, hashed_password: str) -> UserModels:
+    return UserModels(
+        email = user_data.email,
+        username = user_data.username,
+        hashed_password = hashed_password,
+        role = user_data.role,
+        is_active = True,
+        status = 1,
+    )
+
+def check_superadmin_role(target_role: Optional[UserRole], role: enum.Enum, detail: str):
+    """Only a superadmin may create, promote to or delete a superadmin"""
+    if target_role == UserRole.SUPERADMIN and role != UserRole.SUPERADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+def user_not_found():
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+def user_exists():
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User with this email or username already exists")
 
 class UserRepo:
     def __init__(self, db: Session = Depends(get_db)):
         self.__db = db
     
     def create_user(self, user_data: UserCreate):
-        existing_user = self.__db.query(UserModels).filter(
-            (UserModels.email == user_data.email) | (UserModels.username == user_data.username)
-        ).first()
-        if existing_user:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User with this email or username already exists")
-
-        hashed_password = security.get_password_hash(user_data.password)
-
-        new_user = UserModels(
-            email = user_data.email,
-            username = user_data.username,
-            hashed_password = hashed_password,
-            role = user_data.role,
-            is_active = True,
-            status = 1, 
-        )
-        self.__db.add(new_user)
+        if self.__db.scalar(select_existing_user(user_data)):
+            raise user_exists()
+
+        new = new_user(user_data, security.get_password_hash(user_data.password))
+        self.__db.add(new)
         self.__db.commit()
-        self.__db.refresh(new_user)
-        return new_user
+        self.__db.refresh(new)
+        return new
 
     def create_user_with_role(self, user_data: UserCreate, role: enum.Enum):
-
-        if (
-            user_data.role == UserRole.SUPERADMIN and
-            role != UserRole.SUPERADMIN
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only superadmin can create other superadmins"
-            )
-        
+        check_superadmin_role(user_data.role, role, "Only superadmin can create other superadmins")
         return self.create_user(user_data)
     
-    def get_user_by_id(self, user_id: int):
-        user = self.__db.query(UserModels).filter(UserModels.id == user_id).first()
+    def __get_user_by(self, column, value):
+        user = self.__db.scalar(select_user_by(column, value))
         if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-            
+            raise user_not_found()
         return user
 
-    def get_user_by_email(self, email: str):
-        user = self.__db.query(UserModels).filter(UserModels.email == email).first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    @read_only
+    def get_user_by_id(self, user_id: int):
+        return self.__get_user_by(UserModels.id, user_id)
 
-        
-        return user
+    @read_only
+    def get_user_by_email(self, email: str):
+        return self.__get_user_by(UserModels.email, email)
 
+    @read_only
     def get_user_by_username(self, username: str):
-        user = self.__db.query(UserModels).filter(UserModels.username == username).first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        return self.__get_user_by(UserModels.username, username)
 
-        
-        return user
+    @read_only
+    def get_all_users(self, skip: int = 0, limit: int = 100, **filters):
+        return self.__db.scalars(select_users(skip, limit, **filters)).all()
 
-    def get_all_users(self, skip: int = 0, limit: int = 100):
-        return self.__db.query(UserModels).offset(skip).limit(limit).all()
+    @read_only
+    def get_users_page(self, cursor: Optional[str] = None, limit: int = 100, **filters) -> Page:
+        return paginate(self.__db.scalars(select_users_page(cursor, limit, **filters)).all(), limit)
 
     def update_user(self, user_id: int, user_data: UserUpdate):
-        user = self.get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        user = self.__get_user_by(UserModels.id, user_id)
 
-        
+        # cached by username, which may be about to change
+        previous_username = user.username
         for key, value in user_data.model_dump(exclude_unset=True).items():
             if key == "password":
-                hashed_password = security.get_password_hash(value)
-                setattr(user, key, hashed_password)
+                setattr(user, "hashed_password", security.get_password_hash(value))
             else:
                 setattr(user, key, value)
+        user.auth_version = UserModels.auth_version + 1
 
         self.__db.commit()
         self.__db.refresh(user)
+        user_cache.invalidate(previous_username)
         return user
 
+    def update_password_hash(self, user_id: int, hashed_password: str):
+        """Store a rehashed password, without touching the cached profile"""
+        self.__db.execute(update_password_hash_statement(user_id, hashed_password))
+        self.__db.commit()
+
     def update_user_with_role(self, user_id: int, user_data: UserUpdate, role: enum.Enum):
-        if user_data.role:
-            if (
-                user_data.role == UserRole.SUPERADMIN and
-                role != UserRole.SUPERADMIN
-            ):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Only superadmin can assign superadmin role"
-                )
-        
+        check_superadmin_role(user_data.role, role, "Only superadmin can assign superadmin role")
         return self.update_user(user_id, user_data)
 
     def delete_user(self, user_id: int) -> dict:
-        user = self.get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
+        user = self.__get_user_by(UserModels.id, user_id)
 
         self.__db.delete(user)
         self.__db.commit()
+        user_cache.invalidate(user.username)
+        # project_access rows cascade with the user, and SQLite may reuse the id
+        access_cache.invalidate(user.id)
         return {"message": f"User {user.username} deleted successfully"}
     
     def delete_user_with_role(self, user_id: int, role: enum.Enum) -> dict:
-        user = self.get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-        
-        if (
-            user.role == UserRole.SUPERADMIN and
-            role != UserRole.SUPERADMIN
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only superadmin can delete superadmins",
-            )
-        
+        user = self.__get_user_by(UserModels.id, user_id)
+        check_superadmin_role(user.role, role, "Only superadmin can delete superadmins")
         return self.delete_user(user_id)
-    
 
+class AsyncUserRepo:
+    """UserRepo for async routes, awaiting the database instead of blocking the event loop"""
 
-    
-        
\ No newline at end of file
+    def __init__(self, db: AsyncSession = Depends(get_async_db)):
+        self.__db = db
+
+    async def create_user(self, user_data: UserCreate):
+        if await self.__db.scalar(select_existing_user(user_data)):
+            raise user_exists()
+
+        new = new_user(user_data, await security.get_password_hash_async(user_data.password))
+        self.__db.add(new)
+        await self.__db.commit()
+        await self.__db.refresh(new)
+        return new
+
+    async def __get_user_by(self, column, value):
+        user = await self.__db.scalar(select_user_by(column, value))
+        if not user:
+            raise user_not_found()
+        return user
+
+    @read_only
+    async def get_user_by_id(self, user_id: int):
+        return await self.__get_user_by(UserModels.id, user_id)
+
+    @read_only
+    async def get_user_by_email(self, email: str):
+        return await self.__get_user_by(UserModels.email, email)
+
+    @read_only
+    async def get_user_by_username(self, username: str):
+        return await self.__get_user_by(UserModels.username, username)
+
+    @read_only
+    async def get_all_users(self, skip: int = 0, limit: int = 100, **filters):
+        return (await self.__db.scalars(select_users(skip, limit, **filters))).all()
+
+    @read_only
+    async def get_users_page(self, cursor: Optional[str] = None, limit: int = 100, **filters) -> Page:
+        return paginate((await self.__db.scalars(select_users_page(cursor, limit, **filters))).all(), limit)
+
+    async def update_user(self, user_id: int, user_data: UserUpdate):
+        user = await self.__get_user_by(UserModels.id, user_id)
+
+        # cached by username, which may be about to change
+        previous_username = user.username
+        for key, value in user_data.model_dump(exclude_unset=True).items():
+            if key == "password":
+                setattr(user, "hashed_password", await security.get_password_hash_async(value))
+            else:
+                setattr(user, key, value)
+        user.auth_version = UserModels.auth_version + 1
+
+        await self.__db.commit()
+        await self.__db.refresh(user)
+        user_cache.invalidate(previous_username)
+        return user
+
+    async def update_user_with_role(self, user_id: int, user_data: UserUpdate, role: enum.Enum):
+        check_superadmin_role(user_data.role, role, "Only superadmin can assign superadmin role")
+        return await self.update_user(user_id, user_data)
+
+    async def update_password_hash(self, user_id: int, hashed_password: str):
+        """Store a rehashed password, without touching the cached profile"""
+        await self.__db.execute(update_password_hash_statement(user_id, hashed_password))
+        await self.__db.commit()
+
+    async def delete_user(self, user_id: int) -> dict:
+        user = await self.__get_user_by(UserModels.id, user_id)
+
+        await self.__db.delete(user)
+        await self.__db.commit()
+        user_cache.invalidate(user.username)
+        access_cache.invalidate(user.id)
+        return {"message": f"User {user.username} deleted successfully"}
+
+    async def delete_user_with_role(self, user_id: int, role: enum.Enum) -> dict:
+        user = await self.__get_user_by(UserModels.id, user_id)
+        check_superadmin_role(user.role, role, "Only superadmin can delete superadmins")
+        return await self.delete_user(user_id)
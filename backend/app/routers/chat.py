@@ -1,13 +1,29 @@
-from fastapi import APIRouter
-from app.schemas.chat import Message
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.schemas.chat import Message, HistoryStats
+from app.services.auth import check_superadmin_access
 from app.services.message import message_service
+from app.core.responses import JSONRoute
 
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter(prefix="/chat", tags=["chat"], route_class=JSONRoute)
 
 @router.post("/message")
-async def message(message: Message):
+def message(message: Message):
     return message_service.send(message)
 
+@router.post("/message/stream")
+async def message_stream(message: Message):
+    """Relay the model answer token by token as Server-Sent Events"""
+    return StreamingResponse(
+        message_service.stream_events(message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/suggestions")
 async def get_suggestions():
-    return message_service.get_suggestions()
\ No newline at end of file
+    return message_service.get_suggestions()
+
+@router.get("/history/stats", response_model=HistoryStats, dependencies=[Depends(check_superadmin_access)])
+async def get_history_stats():
+    return message_service.history_stats()
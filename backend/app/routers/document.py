@@ -1,23 +1,33 @@
-from typing import List
-from fastapi import APIRouter, UploadFile
-from app.repositories.document import DocumentDep
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Response, UploadFile
+from app.core.pagination import set_next_cursor, use_offset
+from app.models.document import IngestionStatus
+from app.models.project import ProjectAccessLevel
+from app.repositories.document import DocumentDep, AsyncDocumentDep
 from app.schemas.document import DocumentCreate, DocumentUpdate, DocumentResponse, UploadResponse
+from app.services.auth import require_project_access
+from app.core.responses import JSONRoute
 
-from app.config import Settings
-config = Settings.get_settings()
+# every document route needs read access to the project, changes need write access
+router = APIRouter(
+    prefix="/projects/{project_id}/documents",
+    tags=["document"],
+    dependencies=[Depends(require_project_access(ProjectAccessLevel.READ))],
+    route_class=JSONRoute,
+)
+write_access = [Depends(require_project_access(ProjectAccessLevel.WRITE))]
 
-router = APIRouter(prefix="/projects/{project_id}/documents", tags=["document"])
-
-@router.post("/", response_model=DocumentResponse)
+@router.post("/", response_model=DocumentResponse, dependencies=write_access)
 def create_new_document(
     project_id: int,
     document_data: DocumentCreate,
     documents: DocumentDep
 ):
+    """Record a document for a stored file: file_url is the key of an uploaded blob, or a file name in the project's directory"""
     return documents.create_document(project_id, document_data)
 
-@router.post("/upload", response_model=UploadResponse)
-async def upload_documents(
+@router.post("/upload", response_model=UploadResponse, dependencies=write_access)
+def upload_documents(
     project_id: int,
     files: List[UploadFile],
     documents: DocumentDep
@@ -29,21 +39,31 @@ async def upload_documents(
     )
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document_in_project(
+async def get_document_in_project(
     project_id: int,
     document_id: int,
-    documents: DocumentDep
+    documents: AsyncDocumentDep
 ):    
-    return documents.get_document(project_id, document_id)
+    return await documents.get_document(project_id, document_id)
 
 @router.get("/", response_model=list[DocumentResponse])
-def get_documents_in_project(
+async def get_documents_in_project(
     project_id: int,
-    documents: DocumentDep,
+    response: Response,
+    documents: AsyncDocumentDep,
     skip: int = 0,
     limit: int = 10,
-):    
-    return documents.get_documents_in_project(project_id, skip, limit)
+    cursor: Optional[str] = None,
+    ingestion_status: Optional[IngestionStatus] = None,
+    filename: Optional[str] = None,
+):
+    """Documents in upload order, optionally by ingestion status or filename prefix; the next page's cursor is sent in X-Next-Cursor"""
+    filters = {"ingestion_status": ingestion_status, "filename": filename}
+    if use_offset(skip, cursor):
+        return await documents.get_documents_in_project(project_id, skip, limit, **filters)
+    page = await documents.get_documents_page(project_id, cursor, limit, **filters)
+    set_next_cursor(response, page)
+    return page.items
 
 @router.get("/{document_id}/download")
 def download_document_in_project(
@@ -53,7 +73,7 @@ def download_document_in_project(
 ):
     return documents.download_document(project_id, document_id)
 
-@router.put("/{document_id}", response_model=DocumentResponse)
+@router.put("/{document_id}", response_model=DocumentResponse, dependencies=write_access)
 def update_document(
     project_id: int,
     document_id: int,
@@ -62,7 +82,7 @@ def update_document(
 ):    
     return documents.update_document(project_id, document_id, document_data)
 
-@router.delete("/{document_id}")
+@router.delete("/{document_id}", dependencies=write_access)
 def delete_document(
     project_id: int,
     document_id: int,
@@ -1,7 +1,43 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import JSONResponse
+from app.core.admission import admission
+from app.core.database import pool_status
+from app.core.metrics import CONTENT_TYPE, registry
+from app.core.responses import JSONRoute
+from app.services.auth import check_superadmin_access
+from app.services.readiness import readiness_probe
 
-router = APIRouter(tags=["health"])
+from app.config import config
+
+router = APIRouter(tags=["health"], route_class=JSONRoute)
 
 @router.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@router.get("/health/pool", dependencies=[Depends(check_superadmin_access)])
+async def pool_health():
+    """Connection pool occupancy, checkout wait times and saturation counters per engine"""
+    return pool_status()
+
+@router.get("/ready")
+async def readiness():
+    """Whether this worker can take traffic: 503 while its pools, model upstream or admission queues are saturated"""
+    ready, checks = await readiness_probe.check()
+    if not ready:
+        return JSONResponse(
+            {"status": "not_ready", "checks": checks},
+            status_code=503,
+            headers={"Retry-After": str(config.admission.retry_after_seconds)},
+        )
+    return {"status": "ready", "checks": checks}
+
+@router.get("/health/admission", dependencies=[Depends(check_superadmin_access)])
+async def admission_status():
+    """Slots in use and queued requests of each route class"""
+    return admission.status()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of this worker's request, database and LLM metrics"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
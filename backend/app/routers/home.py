@@ -1,16 +1,11 @@
-from pathlib import Path
 from fastapi import APIRouter, Request, Depends
-from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse
 from app.models.user import UserModels
 from app.services.auth import get_current_user
-from app.config import Settings
+from app.core.responses import JSONRoute
+from app.core.templates import get_templates
 
-router = APIRouter(tags=["home"])
-
-config = Settings.get_settings()
-BASE_PATH = config.app.base_path
-resources = Jinja2Templates(directory=str(Path(BASE_PATH, "frontend")))
+router = APIRouter(tags=["home"], route_class=JSONRoute)
 
 @router.get("/", name="index")
 async def index(
@@ -18,7 +13,7 @@ async def index(
     current_user: UserModels = Depends(get_current_user)
 ):
 
-    return resources.TemplateResponse(
+    return get_templates().TemplateResponse(
         "welcome.html",
         {
             "request": request,
@@ -1,27 +1,22 @@
 from datetime import timedelta
-from pathlib import Path
 from fastapi import APIRouter, Response, Depends, HTTPException, status, Request
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from app.models.user import UserModels
-from app.repositories.user import UserRepo
+from app.repositories.user import AsyncUserRepo
 from app.services.auth import get_current_user
 from app.core import security
+from app.core.responses import JSONRoute
+from app.core.templates import get_templates
 
-from app.config import Settings
-config = Settings.get_settings()
-BASE_PATH = config.app.base_path
-resources = Jinja2Templates(directory=str(Path(BASE_PATH, "frontend")))
-
-router = APIRouter(prefix="/login", tags=["login"])
+router = APIRouter(prefix="/login", tags=["login"], route_class=JSONRoute)
 
 @router.get("/")
 async def login_page(request: Request):
     """Render the login page"""
-    return resources.TemplateResponse(
+    return get_templates().TemplateResponse(
         "user/login.html", {"request": request, "base_url": request.base_url}
     )
 
@@ -29,17 +24,21 @@ async def login_page(request: Request):
 async def login(
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    user_repo: UserRepo = Depends(),
+    user_repo: AsyncUserRepo = Depends(),
 ):
     """Handle login authentication and return JWT token"""
-    user = user_repo.get_user_by_username(form_data.username)
+    user = await user_repo.get_user_by_username(form_data.username)
 
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = await security.verify_password_async(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # stored with a different bcrypt cost than configured
+        await user_repo.update_password_hash(user.id, new_hash)
 
     # Create access token
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,62 +1,117 @@
-from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.templating import Jinja2Templates
-from app.repositories.project import ProjectDep
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from app.core.pagination import set_next_cursor, use_offset
+from app.repositories.project import ProjectDep, AsyncProjectDep
 from app.models.user import UserModels
-from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
-from app.services.auth import check_admin_access
+from app.models.project import ProjectAccessLevel
+from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectAccessGrant, ProjectAccessResponse
+from app.services.access_cache import access_cache
+from app.services.storage_gc import storage_collector
+from app.services.auth import check_superadmin_access, get_current_user, require_project_access
+from app.core.responses import JSONRoute
+from app.core.templates import get_templates
 
-from app.config import Settings
-config = Settings.get_settings()
-BASE_PATH = config.app.base_path
-resources = Jinja2Templates(directory=str(Path(BASE_PATH, "frontend")))
-
-router = APIRouter(prefix="/projects", tags=["project"])
+router = APIRouter(prefix="/projects", tags=["project"], route_class=JSONRoute)
 
 @router.get("/page")
 async def project_page(request: Request):
-    return resources.TemplateResponse(
+    return get_templates().TemplateResponse(
         "user/project.html", {"request": request, "base_url": request.base_url}
     )
 
-@router.post("/", response_model=ProjectResponse)
+@router.get("/access/cache/stats", dependencies=[Depends(check_superadmin_access)])
+def access_cache_stats():
+    """Hit and miss counters of the per-user project access cache"""
+    return access_cache.stats()
+
+@router.get("/storage/stats", dependencies=[Depends(check_superadmin_access)])
+def storage_stats(projects: ProjectDep):
+    """Stored versus logical bytes of the deduplicated document storage"""
+    return projects.get_storage_stats()
+
+@router.get("/storage/gc", dependencies=[Depends(check_superadmin_access)])
+def storage_gc_status():
+    """Tombstones waiting for the storage collector and the findings of its last passes"""
+    return storage_collector.status()
+
+@router.post("/storage/gc/reconcile", dependencies=[Depends(check_superadmin_access)])
+def storage_gc_reconcile():
+    """Run the next incremental reconcile pass now and return its report"""
+    report = storage_collector.reconcile()
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another worker is collecting, try again later")
+    return report
+
+@router.post("/", response_model=ProjectResponse, dependencies=[Depends(get_current_user)])
 def create_new_project(
     project_data: ProjectCreate,
     projects: ProjectDep,
 ):
     return projects.create_project(project_data)
 
-@router.get("/{project_id}", response_model=ProjectResponse)
-def get_project_by_id(
+@router.get("/{project_id}", response_model=ProjectResponse, dependencies=[Depends(require_project_access(ProjectAccessLevel.READ))])
+async def get_project_by_id(
     project_id: int,
-    projects: ProjectDep,
+    projects: AsyncProjectDep,
 ):
-    return projects.get_project(project_id)
+    return await projects.get_project(project_id)
 
 @router.get("/", response_model=list[ProjectResponse])
-def get_all_projects_list(
-    projects: ProjectDep,
+async def get_all_projects_list(
+    response: Response,
+    projects: AsyncProjectDep,
+    current_user: UserModels = Depends(get_current_user),
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    name: Optional[str] = None,
 ):
-    return projects.get_all_projects(skip, limit)
+    """Projects the user can read in creation order, optionally by owner or name prefix; the next page's cursor is sent in X-Next-Cursor"""
+    filters = {"owner_id": owner_id, "name": name, "ids": await projects.get_accessible_project_ids(current_user)}
+    if use_offset(skip, cursor):
+        return await projects.get_all_projects(skip, limit, **filters)
+    page = await projects.get_projects_page(cursor, limit, **filters)
+    set_next_cursor(response, page)
+    return page.items
 
-@router.put("/{project_id}", response_model=ProjectResponse)
+@router.put("/{project_id}", response_model=ProjectResponse, dependencies=[Depends(require_project_access(ProjectAccessLevel.WRITE))])
 def update_existing_project(
     project_id: int, 
     project_data: ProjectUpdate,
     projects: ProjectDep,
-    current_user: UserModels = Depends(check_admin_access),
 ):
-    projects.check_project_access(project_id, current_user)
     return projects.update_project(project_id, project_data)
 
-@router.delete("/{project_id}")
+@router.delete("/{project_id}", dependencies=[Depends(require_project_access(ProjectAccessLevel.ADMIN))])
 def delete_existing_project(
     project_id: int,
     projects: ProjectDep,
-    current_user: UserModels = Depends(check_admin_access),
 ):
-    projects.check_project_access(project_id, current_user)
     project = projects.delete_project(project_id)
-    return {"message": f"Project {project.name} deleted successfully"}
\ No newline at end of file
+    return {"message": f"Project {project.name} deleted successfully"}
+
+@router.get("/{project_id}/access", response_model=list[ProjectAccessResponse], dependencies=[Depends(require_project_access(ProjectAccessLevel.ADMIN))])
+def get_project_access_list(
+    project_id: int,
+    projects: ProjectDep,
+):
+    return projects.get_project_access(project_id)
+
+@router.put("/{project_id}/access/{user_id}", response_model=ProjectAccessResponse, dependencies=[Depends(require_project_access(ProjectAccessLevel.ADMIN))])
+def grant_project_access(
+    project_id: int,
+    user_id: int,
+    grant: ProjectAccessGrant,
+    projects: ProjectDep,
+):
+    return projects.grant_access(project_id, user_id, grant.access_level)
+
+@router.delete("/{project_id}/access/{user_id}", dependencies=[Depends(require_project_access(ProjectAccessLevel.ADMIN))])
+def revoke_project_access(
+    project_id: int,
+    user_id: int,
+    projects: ProjectDep,
+):
+    projects.revoke_access(project_id, user_id)
+    return {"message": f"Access of user {user_id} to project {project_id} revoked"}
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from app.models.project import ProjectAccessLevel
+from app.repositories.document import DocumentDep
+from app.schemas.search import ChunkResult, SearchResult
+from app.services.auth import check_superadmin_access, require_project_access
+from app.services.retrieval_cache import retrieval_cache
+from app.core.responses import JSONRoute
+
+from app.config import config
+
+router = APIRouter(tags=["search"], route_class=JSONRoute)
+
+@router.get("/projects/{project_id}/retrieve", response_model=list[ChunkResult], dependencies=[Depends(require_project_access(ProjectAccessLevel.READ))])
+def retrieve_chunks(
+    project_id: int,
+    documents: DocumentDep,
+    q: str = Query(..., min_length=1),
+    k: Optional[int] = Query(None, ge=1, le=100),
+):
+    """Top-k document chunks by embedding similarity to the query"""
+    return documents.retrieve_chunks(project_id, q, k or config.retrieval.top_k)
+
+@router.get("/projects/{project_id}/search", response_model=list[SearchResult], dependencies=[Depends(require_project_access(ProjectAccessLevel.READ))])
+def search_documents(
+    project_id: int,
+    documents: DocumentDep,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Keyword (BM25) search over the extracted text of the project documents"""
+    return documents.search_chunks(project_id, q, limit)
+
+@router.get("/search/cache/stats", dependencies=[Depends(check_superadmin_access)])
+def retrieval_cache_stats():
+    """Hit and miss counters of the retrieval result cache"""
+    return retrieval_cache.stats()
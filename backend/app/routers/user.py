@@ -1,32 +1,35 @@
 from datetime import timedelta
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Response, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
 from app.core import security
-from app.repositories.user import UserRepo
-from app.models.user import UserModels
+from app.core.pagination import set_next_cursor, use_offset
+from app.repositories.user import AsyncUserRepo
+from app.models.user import UserModels, UserRole
 from app.schemas.user import User, UserCreate, UserUpdate, UserResponse, UserToken
 from app.services.auth import check_admin_access, get_current_user
+from app.core.responses import JSONRoute
 
-from app.config import Settings
-config = Settings.get_settings()
-
-router = APIRouter(prefix="/users", tags=["user"])
+router = APIRouter(prefix="/users", tags=["user"], route_class=JSONRoute)
 
 @router.post("/token", response_model=UserToken)
 async def user_token(
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    user_repo: UserRepo = Depends()
+    user_repo: AsyncUserRepo = Depends()
 ):
-    user = user_repo.get_user_by_username(form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await user_repo.get_user_by_username(form_data.username)
+    verified, new_hash = await security.verify_password_async(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # stored with a different bcrypt cost than configured
+        await user_repo.update_password_hash(user.id, new_hash)
     
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
@@ -34,7 +37,6 @@ async def user_token(
         expires_delta=access_token_expires
     )
 
-    print("access token", access_token)
     response.set_cookie(
         key="token_cookie",
         value=access_token,
@@ -48,24 +50,33 @@ async def user_token(
 @router.post("/", response_model=UserResponse)
 async def create_user(
     user: UserCreate,
-    user_repo: UserRepo = Depends(),
+    user_repo: AsyncUserRepo = Depends(),
 ):  
-    return user_repo.create_user(user)
+    return await user_repo.create_user(user)
 
 @router.get("/user/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
     user_id: int,
-    user_repo: UserRepo = Depends(),
+    user_repo: AsyncUserRepo = Depends(),
 ):
-    return user_repo.get_user_by_id(user_id)
+    return await user_repo.get_user_by_id(user_id)
 
 @router.get("/", response_model=List[UserResponse])
 async def get_all_users(
-    user_repo: UserRepo = Depends(),
+    response: Response,
+    user_repo: AsyncUserRepo = Depends(),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    is_active: Optional[bool] = None,
 ):
-    return user_repo.get_all_users(skip, limit)
+    """Users in creation order; the next page's cursor is sent in X-Next-Cursor"""
+    if use_offset(skip, cursor):
+        return await user_repo.get_all_users(skip, limit, role=role, is_active=is_active)
+    page = await user_repo.get_users_page(cursor, limit, role=role, is_active=is_active)
+    set_next_cursor(response, page)
+    return page.items
 
 @router.get("/me", response_model=UserResponse)
 async def get_user_me(
@@ -77,10 +88,10 @@ async def get_user_me(
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    user_repo: UserRepo = Depends(),
+    user_repo: AsyncUserRepo = Depends(),
     _: User = Depends(check_admin_access),
 ):
-    return user_repo.update_user(
+    return await user_repo.update_user(
         user_id = user_id,
         user_data = user_update
     )
@@ -88,10 +99,10 @@ async def update_user(
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: int,
-    user_repo: UserRepo = Depends(),
+    user_repo: AsyncUserRepo = Depends(),
     _: User = Depends(check_admin_access),
 ):
     Depends(check_admin_access)
-    return user_repo.delete_user(
+    return await user_repo.delete_user(
         user_id = user_id,
     )
\ No newline at end of file
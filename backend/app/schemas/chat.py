@@ -1,9 +1,19 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class Message(BaseModel):
     content: str
     is_user: bool = True
+    # the length of chat_messages.conversation_id, rejected before an answer is streamed
+    conversation_id: Optional[str] = Field(default=None, max_length=64)
 
 class ChatHistory(BaseModel):
-    messages: List[Message]
\ No newline at end of file
+    messages: List[Message]
+
+class HistoryStats(BaseModel):
+    backend: str
+    conversations: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
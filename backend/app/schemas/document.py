@@ -1,21 +1,39 @@
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
+from app.models.document import IngestionStatus
+
+def check_file_url(file_url: Optional[str]) -> Optional[str]:
+    # a blob key or the name of a file of the project's directory, never a path
+    if file_url is not None and (file_url in ("", ".", "..") or "/" in file_url or "\\" in file_url):
+        raise ValueError("file_url must be a blob key or a file name")
+    return file_url
 
 class DocumentCreate(BaseModel):
     project_id: int
     filename: str
     file_url: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+
+    _check_file_url = field_validator("file_url")(check_file_url)
 
 class DocumentUpdate(BaseModel):
     filename: Optional[str] = None
     file_url: Optional[str] = None
 
+    _check_file_url = field_validator("file_url")(check_file_url)
+
 class DocumentResponse(BaseModel):
     id: int
     project_id: int
     filename: str
     file_url: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    ingestion_status: Optional[IngestionStatus] = None
+    ingestion_error: Optional[str] = None
+    page_count: Optional[int] = None
     uploaded_at: datetime
 
     class Config:
@@ -1,6 +1,7 @@
 from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime
+from app.models.project import ProjectAccessLevel
 
 class ProjectCreate(BaseModel):
     owner_id: int
@@ -19,4 +20,16 @@ class ProjectResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProjectAccessGrant(BaseModel):
+    access_level: ProjectAccessLevel
+
+class ProjectAccessResponse(BaseModel):
+    project_id: int
+    user_id: int
+    access_level: ProjectAccessLevel
+    granted_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+class ChunkResult(BaseModel):
+    document_id: int
+    chunk_id: int
+    page_number: int
+    score: float
+    text: str
+
+class SearchResult(BaseModel):
+    document_id: int
+    filename: str
+    chunk_id: int
+    page_number: int
+    score: float
+    snippet: str
@@ -0,0 +1,120 @@
+from typing import Dict, Iterable, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config.access_cache import AccessCacheConfig
+from app.core.cache import LRUCache, SharedVersions
+from app.models.project import ProjectModels, ProjectAccessModels, ProjectAccessLevel
+from app.models.user import UserRole
+from app.config import config
+from app.core.lazy import Lazy
+
+LEVEL_RANK = {
+    ProjectAccessLevel.READ: 1,
+    ProjectAccessLevel.WRITE: 2,
+    ProjectAccessLevel.ADMIN: 3,
+}
+
+def allows(level: Optional[ProjectAccessLevel], required: ProjectAccessLevel) -> bool:
+    return level is not None and LEVEL_RANK[level] >= LEVEL_RANK[required]
+
+def _levels_statement(user_id: int):
+    # owned projects come back with a NULL level, owners hold ADMIN
+    return union_all(
+        select(ProjectAccessModels.project_id, ProjectAccessModels.access_level).where(ProjectAccessModels.user_id == user_id),
+        select(ProjectModels.id, null()).where(ProjectModels.owner_id == user_id, ProjectModels.deleted_at.is_(None)),
+    )
+
+def _to_levels(rows: Iterable[Tuple[int, Optional[ProjectAccessLevel]]]) -> Dict[int, ProjectAccessLevel]:
+    levels = {}
+    for project_id, level in rows:
+        level = level or ProjectAccessLevel.ADMIN
+        if not allows(levels.get(project_id), level):
+            levels[project_id] = level
+    return levels
+
+class AccessCache:
+    """project_id -> access level of each user, loaded in one query.
+
+    Levels come from project_access grants, and the owner of a project
+    holds ADMIN on it without a grant (before this cache only grants
+    counted, so an owner without one was refused). ProjectRepo and UserRepo
+    invalidate a user's entry when their grants or owned projects change.
+    That drops the entry of the current process; other workers notice after
+    the TTL, unless shared versions are configured: then every hit compares
+    the version the entry was loaded under with the user's current one, and
+    invalidate() bumps it for every worker, so a revoke applies at once.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, ttl_seconds: float, versions: Optional[SharedVersions] = None):
+        self.enabled = enabled
+        self.__cache = LRUCache(max_entries, ttl_seconds)
+        self.__versions = versions
+
+    def __cached(self, user_id: int) -> Tuple[Optional[Dict[int, ProjectAccessLevel]], Optional[int]]:
+        """The user's cached levels, or None and the version to cache them under once loaded"""
+        if not self.enabled:
+            return None, None
+        entry = self.__cache.get(user_id)
+        current = self.__versions.get(user_id) if self.__versions is not None else None
+        if entry is not None:
+            levels, version = entry
+            if self.__versions is None or (current is not None and current == version):
+                return levels, None
+        return None, current
+
+    def levels(self, db: Session, user_id: int) -> Dict[int, ProjectAccessLevel]:
+        levels, version = self.__cached(user_id)
+        if levels is None:
+            levels = _to_levels(db.execute(_levels_statement(user_id)).all())
+            if self.enabled:
+                self.__cache.set(user_id, (levels, version))
+        return levels
+
+    async def levels_async(self, db: AsyncSession, user_id: int) -> Dict[int, ProjectAccessLevel]:
+        levels, version = self.__cached(user_id)
+        if levels is None:
+            levels = _to_levels((await db.execute(_levels_statement(user_id))).all())
+            if self.enabled:
+                self.__cache.set(user_id, (levels, version))
+        return levels
+
+    @staticmethod
+    def __require(levels: Dict[int, ProjectAccessLevel], project_id: int, required: ProjectAccessLevel):
+        level = levels.get(project_id)
+        if level is None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this project")
+        if not allows(level, required):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Requires {required.value} access to this project")
+
+    def check(self, db: Session, user, project_id: int, required: ProjectAccessLevel = ProjectAccessLevel.READ):
+        """Raise 403 unless the user holds at least the required level, allowing superadmins full access"""
+        if user.role == UserRole.SUPERADMIN:
+            return
+        self.__require(self.levels(db, user.id), project_id, required)
+
+    async def check_async(self, db: AsyncSession, user, project_id: int, required: ProjectAccessLevel = ProjectAccessLevel.READ):
+        if user.role == UserRole.SUPERADMIN:
+            return
+        self.__require(await self.levels_async(db, user.id), project_id, required)
+
+    def invalidate(self, user_id: int):
+        self.__cache.delete(user_id)
+        if self.__versions is not None:
+            self.__versions.bump(user_id)
+
+    def clear(self):
+        self.__cache.clear()
+
+    def stats(self) -> dict:
+        stats = self.__cache.stats()
+        if self.__versions is not None:
+            stats["version_errors"] = self.__versions.errors
+        return stats
+
+def create_access_cache(access_cache_config: AccessCacheConfig) -> AccessCache:
+    versions = SharedVersions.from_url(access_cache_config.redis_url, prefix="access") if access_cache_config.redis_url else None
+    return AccessCache(access_cache_config.enabled, access_cache_config.max_entries, access_cache_config.ttl_seconds, versions)
+
+access_cache: AccessCache = Lazy(lambda: create_access_cache(config.access_cache))
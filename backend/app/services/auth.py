@@ -1,12 +1,15 @@
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status, Cookie
 from fastapi.security import OAuth2PasswordBearer
 from app.models.user import UserModels, UserRole
-from app.repositories.user import UserRepo
-from app.core.database import get_db
-from app.config import Settings
-config = Settings.get_settings()
+from app.models.project import ProjectAccessLevel
+from app.repositories.user import AsyncUserRepo
+from app.core.database import get_db, get_async_db
+from app.services.access_cache import access_cache
+from app.services.user_cache import user_cache
+from app.config import config
 
 # async def get_current_user_regular(token: str, db: Session):
 #     """Check user credentials based on provided token and database session"""
@@ -36,9 +39,8 @@ async def get_token_from_cookie(token_cookie: str = Cookie(None)):
 
 async def get_current_user(
         token: str = Depends(get_token_from_cookie),
-        user_repo: UserRepo = Depends()
+        user_repo: AsyncUserRepo = Depends()
 ):
-    print("token", token)
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials, please login",
@@ -48,20 +50,20 @@ async def get_current_user(
         payload = jwt.decode(token, config.security.jwt_secret, algorithms=[config.security.algorithm])
         username: str = payload.get("sub")
         if username is None:
-            print("Username not found in token.")
             raise credentials_exception
-        print(f"Token payload: {payload}")  # Debugging line
-    except JWTError as e:
-        print(f"JWTError: {str(e)}")  # Debugging line
+    except JWTError:
         raise credentials_exception
-    
-    user = user_repo.get_user_by_username(username)
+
+    cached = user_cache.get(username)
+    if cached is not None:
+        return cached
+
+    version = user_cache.version(username)
+    # the session only opens a connection on this cache miss
+    user = await user_repo.get_user_by_username(username)
     if user is None:
-        print(f"User with username '{username}' not found.")
         raise credentials_exception
-    else:
-        print(f"User found: {user}")
-    return user
+    return user_cache.put(user, version)
 
 def check_admin_access(current_user: UserModels = Depends(get_current_user)):
     if current_user.role not in [UserRole.ADMIN, UserRole.SUPERADMIN]:
@@ -78,3 +80,19 @@ def check_superadmin_access(current_user: UserModels = Depends(get_current_user)
             detail="Not enough permissions"
         )
     return current_user
+
+def require_project_access(level: ProjectAccessLevel = ProjectAccessLevel.READ):
+    """Dependency returning the current user once they hold at least level on the path's project_id.
+
+    Levels are granted per project, the project's owner holds ADMIN on it
+    and superadmins pass every check.
+    """
+    async def check_project_access(
+        project_id: int,
+        current_user: UserModels = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        # the session only opens a connection when the user's levels are not cached
+        await access_cache.check_async(db, current_user, project_id, level)
+        return current_user
+    return check_project_access
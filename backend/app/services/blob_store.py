@@ -0,0 +1,146 @@
+import os, re, tempfile
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, update
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.core.lazy import Lazy
+from app.models.blob import BlobModels
+from app.models.document import DocumentModels
+from app.utils import get_blob_dir, get_root_project_dir
+
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+def _upsert(db: Session):
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(BlobModels)
+
+class BlobStore:
+    """Content-addressed document files, keyed by the hex SHA-256 of their bytes.
+
+    A blob lives at <root>/ab/cd/<key>, so no directory holds more than 65536
+    entries, and documents store the key in file_url. The same file uploaded
+    to many projects is kept once; the blobs table counts the documents
+    pointing at each blob, changed by acquire() and release() in the same
+    transaction as the document rows.
+
+    New content is staged in <root>/tmp and published after that transaction
+    commits. collect() deletes an unreferenced blob's row and file in one
+    transaction, so a concurrent upload of the same content either keeps the
+    row referenced or inserts it again and republishes the file afterwards.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def is_key(value: str) -> bool:
+        return bool(value) and KEY_PATTERN.fullmatch(value) is not None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def resolve(self, file_url: str, project_name: Optional[str] = None) -> Optional[str]:
+        """Path of a document's file, None when file_url leads out of the storage root.
+
+        Rows never migrated keep their old file_url: originally a name relative
+        to the project directory, for a while a path relative to the storage
+        root, so the project directory is tried first.
+        """
+        if self.is_key(file_url):
+            return self.path(file_url)
+        root = get_root_project_dir()
+        path = os.path.join(root, file_url)
+        if project_name:
+            in_project = os.path.join(root, project_name, file_url)
+            if os.path.isfile(in_project):
+                path = in_project
+        # symlinks included, e.g. "../../etc/passwd" or an absolute path
+        real_root = os.path.realpath(root)
+        if os.path.commonpath([real_root, os.path.realpath(path)]) != real_root:
+            return None
+        return path
+
+    def staging_file(self):
+        staging_dir = os.path.join(self.root, "tmp")
+        os.makedirs(staging_dir, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=staging_dir, prefix=".upload-", delete=False)
+
+    def publish(self, staged_path: str, key: str):
+        """Move a staged file into place; content-addressed, so replacing an existing blob is harmless"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staged_path, path)
+
+    def acquire(self, db: Session, blobs: Iterable[Tuple[str, int]]):
+        """Add a reference per (key, size), creating missing rows; committed with the caller"""
+        sizes, counts = {}, Counter()
+        for key, size in blobs:
+            sizes[key] = size
+            counts[key] += 1
+        if not counts:
+            return
+
+        statement = _upsert(db)
+        statement = statement.on_conflict_do_update(
+            index_elements=[BlobModels.sha256],
+            set_={"refcount": BlobModels.refcount + statement.excluded.refcount},
+        )
+        # sorted, so concurrent batches lock rows in the same order
+        db.connection().execute(statement, [
+            {"sha256": key, "size": sizes[key], "refcount": counts[key]} for key in sorted(counts)
+        ])
+
+    def release(self, db: Session, keys: Iterable[str]):
+        """Drop a reference per key, committed with the caller; collect() afterwards"""
+        counts = Counter(key for key in keys if self.is_key(key))
+        if not counts:
+            return
+        db.connection().execute(
+            update(BlobModels.__table__)
+            .where(BlobModels.sha256 == bindparam("key"))
+            .values(refcount=BlobModels.refcount - bindparam("count")),
+            [{"key": key, "count": count} for key, count in sorted(counts.items())],
+        )
+
+    def collect(self, keys: Iterable[str]) -> List[str]:
+        """Delete the rows and files of the given blobs that are no longer referenced"""
+        keys = sorted({key for key in keys if self.is_key(key)})
+        if not keys:
+            return []
+        with SessionLocal() as db:
+            removed = db.scalars(
+                delete(BlobModels)
+                .where(BlobModels.sha256.in_(keys), BlobModels.refcount <= 0)
+                .returning(BlobModels.sha256)
+                .execution_options(synchronize_session=False)
+            ).all()
+            # unlinked before the commit, while the rows are still locked
+            for key in removed:
+                try:
+                    os.remove(self.path(key))
+                except FileNotFoundError:
+                    pass
+            db.commit()
+        return removed
+
+    def stats(self, db: Session) -> dict:
+        blobs, stored_bytes = db.query(func.count(BlobModels.sha256), func.coalesce(func.sum(BlobModels.size), 0)).filter(
+            BlobModels.refcount > 0
+        ).one()
+        documents, logical_bytes = db.query(func.count(DocumentModels.id), func.coalesce(func.sum(BlobModels.size), 0)).join(
+            BlobModels, BlobModels.sha256 == DocumentModels.file_url
+        ).filter(DocumentModels.deleted_at.is_(None)).one()
+        return {
+            "blobs": blobs,
+            "documents": documents,
+            "stored_bytes": stored_bytes,
+            "logical_bytes": logical_bytes,
+            "dedup_ratio": round(logical_bytes / stored_bytes, 3) if stored_bytes else 1.0,
+            "reclaimed_bytes": logical_bytes - stored_bytes,
+        }
+
+blob_store: BlobStore = Lazy(lambda: BlobStore(get_blob_dir()))
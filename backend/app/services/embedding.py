@@ -0,0 +1,99 @@
+"""Text embedders for the vector index.
+
+Embedders are plain picklable objects with no app imports so they can be
+shipped to the ingestion worker processes and embed chunks there.
+"""
+import re, hashlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional, TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+class Embedder(ABC):
+    name = "base"
+    dimension: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """Return an L2-normalized float32 matrix of shape (len(texts), dimension)"""
+
+    def embed_one(self, text: str) -> "np.ndarray":
+        return self.embed([text])[0]
+
+@lru_cache(maxsize=200_000)
+def _feature(token: str, dimension: int) -> Tuple[int, float]:
+    digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dimension, 1.0 if digest >> 63 else -1.0
+
+class HashingEmbedder(Embedder):
+    """Deterministic feature-hashing embedder over words and word bigrams.
+
+    Needs no model or network and gives the same vectors in every process,
+    which makes it the default for local use and tests. Similarity is lexical,
+    not semantic.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        import numpy as np
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                index, sign = _feature(feature, self.dimension)
+                matrix[row, index] += sign
+        return _normalize(matrix)
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings from an OpenAI-compatible /embeddings endpoint"""
+
+    name = "openai"
+
+    def __init__(self, url: str, api_key: str, model: str, dimension: int, timeout: float = 30.0, batch_size: int = 64):
+        self.url = url.rstrip("/") + "/embeddings"
+        self.api_key = api_key
+        self.model = model
+        self.dimension = dimension
+        self.timeout = timeout
+        self.batch_size = batch_size
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        import httpx
+        import numpy as np
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        with httpx.Client(headers={"Authorization": f"Bearer {self.api_key}"}, timeout=self.timeout) as client:
+            for start in range(0, len(texts), self.batch_size):
+                batch = texts[start:start + self.batch_size]
+                response = client.post(self.url, json={"model": self.model, "input": batch})
+                response.raise_for_status()
+                for item in response.json()["data"]:
+                    matrix[start + item["index"]] = np.asarray(item["embedding"], dtype=np.float32)[:self.dimension]
+        return _normalize(matrix)
+
+def _normalize(matrix: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+def create_embedder(name: str, dimension: int, url: Optional[str] = None, api_key: Optional[str] = None, model: Optional[str] = None) -> Embedder:
+    if name == "hashing":
+        return HashingEmbedder(dimension)
+    if name == "openai":
+        if not model:
+            raise ValueError("retrieval.embedding_model is required for the openai embedder")
+        return OpenAIEmbedder(url, api_key, model, dimension)
+    raise ValueError(f"Unknown embedder: {name}")
@@ -0,0 +1,31 @@
+"""Text extraction run inside the ingestion worker processes.
+
+Kept free of app imports so spawned workers only load PyMuPDF (and the
+embedder), not the settings, database engine and routers.
+"""
+from typing import List, Tuple
+
+def extract_pdf_pages(path: str) -> List[str]:
+    import fitz
+
+    with fitz.open(path) as pdf:
+        return [page.get_text() for page in pdf]
+
+def chunk_pages(pages: List[str], chunk_words: int, chunk_overlap: int) -> List[Tuple[int, int, str]]:
+    """Split each page into overlapping word windows of (page_number, position, text)"""
+    step = max(chunk_words - chunk_overlap, 1)
+    chunks = []
+    for page_number, text in enumerate(pages, start=1):
+        words = text.split()
+        for position, start in enumerate(range(0, len(words), step)):
+            chunks.append((page_number, position, " ".join(words[start:start + chunk_words])))
+            if start + chunk_words >= len(words):
+                break
+    return chunks
+
+def extract_document(path: str, chunk_words: int, chunk_overlap: int, embedder=None):
+    """Extract, chunk and (optionally) embed a PDF in one worker round trip"""
+    pages = extract_pdf_pages(path)
+    chunks = chunk_pages(pages, chunk_words, chunk_overlap)
+    vectors = embedder.embed([text for _, _, text in chunks]) if embedder is not None and chunks else None
+    return pages, chunks, vectors
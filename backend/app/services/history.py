@@ -0,0 +1,244 @@
+import time, threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import List, Optional
+from sqlalchemy import DateTime, create_engine, delete, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.functions import FunctionElement
+from app.config.history import HistoryConfig
+from app.models.chat import ChatMessageModels
+from app.schemas.chat import Message
+
+class HistoryStore(ABC):
+    """Conversation history keyed by conversation id."""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, conversation_id: str, limit: Optional[int] = None) -> List[Message]:
+        ...
+
+    @abstractmethod
+    def append(self, conversation_id: str, *messages: Message):
+        ...
+
+    @abstractmethod
+    def clear(self, conversation_id: str):
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+class _Conversation:
+    __slots__ = ("messages", "expires_at")
+
+    def __init__(self, max_messages: int, expires_at: float):
+        # (is_user, content) tuples instead of Message models to keep entries small
+        self.messages = deque(maxlen=max_messages)
+        self.expires_at = expires_at
+
+class MemoryHistoryStore(HistoryStore):
+    """Per-process LRU of conversations with a sliding TTL.
+
+    Every access moves a conversation to the end of the ordered dict and
+    pushes its expiry forward, so both the least recently used and the first
+    expired conversations are always at the front and can be dropped in O(1).
+    """
+
+    name = "memory"
+
+    def __init__(self, max_conversations: int, max_messages: int, ttl_seconds: int):
+        self.__conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__max_conversations = max_conversations
+        self.__max_messages = max_messages
+        self.__ttl = ttl_seconds
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+
+    def __expire(self, now: float):
+        while self.__conversations:
+            conversation = next(iter(self.__conversations.values()))
+            if conversation.expires_at > now:
+                break
+            self.__conversations.popitem(last=False)
+            self.__expirations += 1
+
+    def get(self, conversation_id: str, limit: Optional[int] = None) -> List[Message]:
+        now = time.monotonic()
+        with self.__lock:
+            self.__expire(now)
+            conversation = self.__conversations.get(conversation_id)
+            if conversation is None:
+                self.__misses += 1
+                return []
+
+            self.__hits += 1
+            conversation.expires_at = now + self.__ttl
+            self.__conversations.move_to_end(conversation_id)
+            messages = list(conversation.messages)
+
+        if limit is not None:
+            messages = messages[-limit:] if limit > 0 else []
+        return [Message(content=content, is_user=is_user, conversation_id=conversation_id) for is_user, content in messages]
+
+    def append(self, conversation_id: str, *messages: Message):
+        now = time.monotonic()
+        with self.__lock:
+            self.__expire(now)
+            conversation = self.__conversations.get(conversation_id)
+            if conversation is None:
+                conversation = _Conversation(self.__max_messages, now + self.__ttl)
+                self.__conversations[conversation_id] = conversation
+                while len(self.__conversations) > self.__max_conversations:
+                    self.__conversations.popitem(last=False)
+                    self.__evictions += 1
+            else:
+                conversation.expires_at = now + self.__ttl
+                self.__conversations.move_to_end(conversation_id)
+
+            for message in messages:
+                conversation.messages.append((message.is_user, message.content))
+
+    def clear(self, conversation_id: str):
+        with self.__lock:
+            self.__conversations.pop(conversation_id, None)
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "backend": self.name,
+                "conversations": len(self.__conversations),
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "expirations": self.__expirations,
+            }
+
+class _seconds_ago(FunctionElement):
+    """The database clock minus a number of seconds"""
+
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(_seconds_ago)
+def _seconds_ago_default(element, compiler, **kw):
+    return f"now() - make_interval(secs => {compiler.process(element.clauses, **kw)})"
+
+@compiles(_seconds_ago, "sqlite")
+def _seconds_ago_sqlite(element, compiler, **kw):
+    # the same 'YYYY-MM-DD HH:MM:SS' UTC text CURRENT_TIMESTAMP stamps rows with
+    return f"datetime('now', '-' || {compiler.process(element.clauses, **kw)} || ' seconds')"
+
+class SQLHistoryStore(HistoryStore):
+    """History persisted in the chat_messages table, shared by all workers.
+
+    Reads fetch only the newest max_messages rows through the
+    (conversation_id, id) index; rows older than the TTL are pruned
+    periodically from the write path.
+    """
+
+    name = "sql"
+    PRUNE_EVERY = 1000
+
+    def __init__(self, session_factory: sessionmaker, max_messages: int, ttl_seconds: int):
+        self.__session_factory = session_factory
+        self.__max_messages = max_messages
+        self.__ttl = ttl_seconds
+        self.__lock = threading.Lock()
+        self.__appends = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__expirations = 0
+
+    def __cutoff(self) -> "_seconds_ago":
+        # rows are stamped with the database clock, which may run in another
+        # timezone than this process (UTC on SQLite), so the cutoff is
+        # computed by the database within the statement
+        return _seconds_ago(self.__ttl)
+
+    def get(self, conversation_id: str, limit: Optional[int] = None) -> List[Message]:
+        limit = self.__max_messages if limit is None else min(limit, self.__max_messages)
+        with self.__session_factory() as db:
+            query = (
+                select(ChatMessageModels.is_user, ChatMessageModels.content)
+                .where(
+                    ChatMessageModels.conversation_id == conversation_id,
+                    ChatMessageModels.created_at >= self.__cutoff(),
+                )
+                .order_by(ChatMessageModels.id.desc())
+                .limit(limit)
+            )
+            rows = db.execute(query).all()
+
+        with self.__lock:
+            if rows:
+                self.__hits += 1
+            else:
+                self.__misses += 1
+        return [Message(content=content, is_user=is_user, conversation_id=conversation_id) for is_user, content in reversed(rows)]
+
+    def append(self, conversation_id: str, *messages: Message):
+        with self.__session_factory() as db:
+            db.add_all([
+                ChatMessageModels(conversation_id=conversation_id, is_user=message.is_user, content=message.content)
+                for message in messages
+            ])
+            db.commit()
+
+        with self.__lock:
+            self.__appends += 1
+            prune = self.__appends % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        with self.__session_factory() as db:
+            result = db.execute(delete(ChatMessageModels).where(ChatMessageModels.created_at < self.__cutoff()))
+            db.commit()
+        with self.__lock:
+            self.__expirations += result.rowcount
+        return result.rowcount
+
+    def clear(self, conversation_id: str):
+        with self.__session_factory() as db:
+            db.execute(delete(ChatMessageModels).where(ChatMessageModels.conversation_id == conversation_id))
+            db.commit()
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "backend": self.name,
+                "conversations": -1,  # not tracked, would need a full scan
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": 0,
+                "expirations": self.__expirations,
+            }
+
+def create_history_store(history_config: HistoryConfig) -> HistoryStore:
+    if history_config.backend == "memory":
+        return MemoryHistoryStore(
+            max_conversations=history_config.max_conversations,
+            max_messages=history_config.max_messages,
+            ttl_seconds=history_config.ttl_seconds,
+        )
+
+    if history_config.backend == "sql":
+        if history_config.url:
+            engine = create_engine(history_config.url)
+            session_factory = sessionmaker(bind=engine)
+        else:
+            from app.core.database import engine, SessionLocal as session_factory
+        ChatMessageModels.__table__.create(bind=engine, checkfirst=True)
+        return SQLHistoryStore(
+            session_factory=session_factory,
+            max_messages=history_config.max_messages,
+            ttl_seconds=history_config.ttl_seconds,
+        )
+
+    raise ValueError(f"Unknown history backend: {history_config.backend}")
@@ -0,0 +1,261 @@
+import os, logging, threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from app.core.database import SessionLocal
+from app.models.document import DocumentModels, DocumentPageModels, DocumentChunkModels, IngestionStatus
+from app.models.project import ProjectModels
+from app.repositories.project import bump_content_version
+from app.services.blob_store import blob_store
+from app.services.extraction import extract_document
+from app.services.vector_index import vector_index_service
+from app.services.search_index import search_index_service
+from app.config import config
+from app.core.lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+INGESTIBLE_EXTENSIONS = (".pdf",)
+
+class IngestionService:
+    """Extracts, chunks and embeds uploaded PDFs in a process pool.
+
+    Extraction runs in worker processes so neither the event loop nor the
+    request threads wait on PyMuPDF. One dispatcher thread per worker process
+    hands jobs to the pool and records status transitions, so a document is
+    marked running exactly when a process picks it up.
+
+    Every web worker runs its own service and pool. A document is processed
+    by whichever claims it first: the claim is a conditional update from
+    queued to running, renewed while extraction runs, and a running document
+    whose claim went stale (its worker died) can be claimed again.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, lease_seconds: int = 300):
+        web_workers = int(os.environ.get("WEB_CONCURRENCY") or 1)
+        self.__max_workers = max_workers or max((os.cpu_count() or 1) // web_workers, 1)
+        self.__lease = timedelta(seconds=lease_seconds)
+        self.__pool: Optional[ProcessPoolExecutor] = None
+        self.__dispatcher: Optional[ThreadPoolExecutor] = None
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def is_ingestible(filename: str) -> bool:
+        return os.path.splitext(filename)[1].lower() in INGESTIBLE_EXTENSIONS
+
+    def __create_pool(self, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+        # spawn instead of fork: the server process already runs threads
+        return ProcessPoolExecutor(
+            max_workers=max_workers or self.__max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def start(self):
+        with self.__lock:
+            if self.__pool is not None:
+                return
+            self.__pool = self.__create_pool()
+            self.__dispatcher = ThreadPoolExecutor(
+                max_workers=self.__max_workers,
+                thread_name_prefix="ingestion",
+            )
+
+    def shutdown(self, wait: bool = True):
+        with self.__lock:
+            dispatcher, self.__dispatcher = self.__dispatcher, None
+        # outside the lock, which a running job takes to replace a broken pool
+        if dispatcher is not None:
+            dispatcher.shutdown(wait=wait, cancel_futures=not wait)
+        with self.__lock:
+            pool, self.__pool = self.__pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def submit(self, document_id: int, project_id: int, file_url: str):
+        """Queue a document for extraction, file_url is its blob key or a legacy path"""
+        self.start()
+        self.__dispatcher.submit(self.__run, document_id, project_id, file_url)
+
+    def __claimable(self, now: datetime):
+        return and_(
+            DocumentModels.deleted_at.is_(None),
+            or_(
+                DocumentModels.ingestion_status == IngestionStatus.QUEUED,
+                and_(
+                    DocumentModels.ingestion_status == IngestionStatus.RUNNING,
+                    or_(DocumentModels.ingestion_claimed_at.is_(None), DocumentModels.ingestion_claimed_at < now - self.__lease),
+                ),
+            ),
+        )
+
+    def resume_pending(self):
+        """Re-queue documents left queued, or running by a process that stopped renewing its claim"""
+        with SessionLocal() as db:
+            # claims are stamped with the database clock
+            now = db.scalar(select(func.now()))
+            pending = db.query(DocumentModels.id, DocumentModels.project_id, DocumentModels.file_url).filter(
+                self.__claimable(now)
+            ).all()
+        for document_id, project_id, file_url in pending:
+            self.submit(document_id, project_id, file_url)
+        if pending:
+            logger.info(f"Re-queued {len(pending)} documents for ingestion")
+
+    def claim(self, document_id: int) -> bool:
+        """Mark a document running, False when it is not claimable (e.g. another worker holds it)"""
+        with SessionLocal() as db:
+            now = db.scalar(select(func.now()))
+            result = db.execute(
+                update(DocumentModels)
+                .where(DocumentModels.id == document_id, self.__claimable(now))
+                # keep uploaded_at (it has onupdate=now) untouched by status changes
+                .values(ingestion_status=IngestionStatus.RUNNING, ingestion_error=None, ingestion_claimed_at=now, uploaded_at=DocumentModels.uploaded_at)
+            )
+            db.commit()
+        return result.rowcount == 1
+
+    def __renew(self, document_id: int):
+        with SessionLocal() as db:
+            db.execute(
+                update(DocumentModels)
+                .where(DocumentModels.id == document_id, DocumentModels.ingestion_status == IngestionStatus.RUNNING)
+                .values(ingestion_claimed_at=func.now(), uploaded_at=DocumentModels.uploaded_at)
+            )
+            db.commit()
+
+    def __set_status(self, document_id: int, status: IngestionStatus, **values):
+        with SessionLocal() as db:
+            db.execute(
+                update(DocumentModels)
+                .where(DocumentModels.id == document_id)
+                # keep uploaded_at (it has onupdate=now) untouched by status changes
+                .values(ingestion_status=status, uploaded_at=DocumentModels.uploaded_at, **values)
+            )
+            db.commit()
+
+    def __path(self, project_id: int, file_url: str) -> str:
+        if blob_store.is_key(file_url):
+            return blob_store.path(file_url)
+        # a legacy path, relative to its project's directory
+        with SessionLocal() as db:
+            project_name = db.scalar(select(ProjectModels.name).where(ProjectModels.id == project_id))
+        path = blob_store.resolve(file_url, project_name)
+        if path is None:
+            raise ValueError("file_url is outside the storage root")
+        return path
+
+    def __extract(self, document_id: int, pool: ProcessPoolExecutor, path: str):
+        future = pool.submit(
+            extract_document,
+            path,
+            config.retrieval.chunk_words,
+            config.retrieval.chunk_overlap,
+            vector_index_service.embedder,
+        )
+        while True:
+            try:
+                return future.result(timeout=self.__lease.total_seconds() / 3)
+            except FutureTimeoutError:
+                self.__renew(document_id)
+
+    def __replace_pool(self, pool: ProcessPoolExecutor):
+        # unless another dispatcher thread already replaced this one
+        with self.__lock:
+            if self.__pool is pool:
+                pool.shutdown(wait=False)
+                self.__pool = self.__create_pool()
+
+    def __run(self, document_id: int, project_id: int, file_url: str):
+        pool = self.__pool
+        try:
+            if not self.claim(document_id):
+                logger.info(f"Document {document_id} is no longer queued, skipping it")
+                return
+            path = self.__path(project_id, file_url)
+            try:
+                pages, chunks, vectors = self.__extract(document_id, pool, path)
+            except BrokenProcessPool:
+                # A worker died (e.g. a malformed PDF crashed MuPDF), breaking every
+                # job on the pool, not only its own. Retried alone in a process of
+                # its own, so only the document that crashes it fails.
+                self.__replace_pool(pool)
+                logger.warning(f"Extraction pool broke while extracting document {document_id}, retrying it alone")
+                with self.__create_pool(max_workers=1) as isolated:
+                    pages, chunks, vectors = self.__extract(document_id, isolated, path)
+            if not self.__persist(document_id, project_id, pages, chunks, vectors):
+                logger.info(f"Document {document_id} was deleted while it was extracted, discarding it")
+                return
+            logger.info(f"Ingested document {document_id}: {len(pages)} pages, {len(chunks)} chunks")
+        except BrokenProcessPool as e:
+            self.__set_status(document_id, IngestionStatus.FAILED, ingestion_error=f"Extraction worker crashed: {e}")
+        except Exception as e:
+            logger.error(f"Ingestion failed for document {document_id}: {e}")
+            try:
+                self.__set_status(document_id, IngestionStatus.FAILED, ingestion_error=str(e)[:500])
+            except Exception as status_error:
+                logger.error(f"Could not record ingestion failure for document {document_id}: {status_error}")
+
+    def __persist(self, document_id: int, project_id: int, pages: list, chunks: list, vectors) -> bool:
+        """Store and index the extracted document, False when it was deleted in the meantime"""
+        with SessionLocal() as db:
+            # first, so the row stays locked against a concurrent tombstone until the commit
+            marked = db.execute(
+                update(DocumentModels)
+                .where(DocumentModels.id == document_id, DocumentModels.deleted_at.is_(None))
+                .values(
+                    ingestion_status=IngestionStatus.DONE,
+                    ingestion_error=None,
+                    page_count=len(pages),
+                    uploaded_at=DocumentModels.uploaded_at,
+                )
+            )
+            if marked.rowcount != 1:
+                db.rollback()
+                return False
+
+            db.execute(delete(DocumentPageModels).where(DocumentPageModels.document_id == document_id))
+            db.execute(delete(DocumentChunkModels).where(DocumentChunkModels.document_id == document_id))
+            if pages:
+                db.execute(insert(DocumentPageModels), [
+                    # NUL bytes are valid in PDF text but rejected by Postgres
+                    {"document_id": document_id, "page_number": number, "text": text.replace("\x00", "")}
+                    for number, text in enumerate(pages, start=1)
+                ])
+            chunk_ids = []
+            if chunks:
+                chunk_ids = db.scalars(
+                    insert(DocumentChunkModels).returning(DocumentChunkModels.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "document_id": document_id,
+                            "project_id": project_id,
+                            "page_number": page_number,
+                            "position": position,
+                            "text": text.replace("\x00", ""),
+                        }
+                        for page_number, position, text in chunks
+                    ],
+                ).all()
+
+            # index before committing so a failure leaves the document retryable
+            vector_index_service.add_document(project_id, document_id, chunk_ids, vectors if chunk_ids else [])
+            db.commit()
+
+        search_index_service.add_document(project_id, document_id, [
+            (chunk_id, text) for chunk_id, (_, _, text) in zip(chunk_ids, chunks)
+        ])
+        # only once both indexes hold the document, or a search in between
+        # would cache results without it under the new version
+        with SessionLocal() as db:
+            if db.scalar(select(DocumentModels.deleted_at).where(DocumentModels.id == document_id)) is not None:
+                # deleted right after the commit, its removal may have run before the search index add
+                vector_index_service.remove_document(project_id, document_id)
+                search_index_service.remove_document(project_id, document_id)
+            bump_content_version(db, project_id)
+            db.commit()
+        return True
+
+ingestion_service: IngestionService = Lazy(lambda: IngestionService(config.ingestion.max_workers, config.ingestion.lease_seconds))
@@ -1,29 +1,218 @@
-from groq import Groq
+import asyncio, json, time, logging
+from typing import AsyncIterator, Optional
+import httpx
+from app.core.lazy import Lazy
+from app.core.metrics import registry
 from app.schemas.chat import Message
-from app.config import Settings
-import requests
-config = Settings.get_settings()
+from app.services.history import HistoryStore, create_history_store
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+LLM_REQUEST_SECONDS = registry.histogram(
+    "llm_request_duration_seconds",
+    "Time of a chat completion call, to the last token when streamed",
+    ("model", "mode", "outcome"),
+    buckets=LLM_BUCKETS,
+)
+LLM_FIRST_TOKEN_SECONDS = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time until a streamed completion yields its first token", ("model",), buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total",
+    "Tokens by kind as reported by the upstream usage, streamed chunks count as completion tokens without it",
+    ("model", "kind"),
+)
+LLM_ERRORS = registry.counter("llm_errors_total", "Failed chat completion calls by error", ("model", "mode", "error"))
+
+class MalformedChunkError(ValueError):
+    """A streamed chunk that is not the JSON of a chat completion chunk"""
+
+def _parse_chunk(data: str):
+    """Content delta and usage of one chunk of a chat completion stream"""
+    try:
+        chunk = json.loads(data)
+        choices = chunk.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content"), chunk.get("usage")
+    except (ValueError, AttributeError, IndexError, KeyError, TypeError) as e:
+        raise MalformedChunkError(f"Malformed chat completion chunk: {data[:200]!r}") from e
+
+def _error_kind(e: Exception) -> str:
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"http_{e.response.status_code}"
+    return type(e).__name__
 
 class MessageService:
-    def __init__(self):
-        self.__chat_histories = {}
-        self.__model = "llama-3.3-70b-instant"
-    
-    def send(self, message: Message) -> Message:
+    def __init__(self, history_store: Optional[HistoryStore] = None):
+        self.__chat_histories = history_store or create_history_store(config.history)
+        self.__model = config.gpt.model
+        self.__url = config.gpt.url.rstrip("/") + "/chat/completions"
+        self.__models_url = config.gpt.url.rstrip("/") + "/models"
+        self.__async_client: Optional[httpx.AsyncClient] = None
+
+    def __headers(self) -> dict:
+        return {"Authorization": f"Bearer {config.gpt.api_key}"}
+
+    def __payload(self, message: Message, stream: bool) -> dict:
+        history = self.__chat_histories.get(message.conversation_id) if message.conversation_id else []
+        return {
+            "model": self.__model,
+            "messages": [
+                {"role": "user" if past.is_user else "assistant", "content": past.content}
+                for past in history
+            ] + [{"role": "user", "content": message.content}],
+            "stream": stream,
+        }
+
+    def __remember(self, message: Message, answer: str):
+        if message.conversation_id:
+            self.__chat_histories.append(
+                message.conversation_id,
+                Message(content=message.content, is_user=True),
+                Message(content=answer, is_user=False),
+            )
+
+    def history_stats(self) -> dict:
+        return self.__chat_histories.stats()
+
+    def __guard(self, message: Message) -> Optional[Message]:
         if message.content.strip().lower() == "siapakah nama pemilik akun ini?":
             return Message(
                 content="Maaf, saya tidak dapat membantu dengan informasi pribadi atau identitas pemilik akun. Jika ada pertanyaan lain yang bisa saya bantu, silakan beri tahu!",
                 is_user=False
             )
-    
-        
-        response = requests.post()
-        return Message(content=response, is_user=False)
+        return None
+
+    def __client(self) -> httpx.AsyncClient:
+        if self.__async_client is None or self.__async_client.is_closed:
+            self.__async_client = httpx.AsyncClient(
+                headers=self.__headers(),
+                timeout=httpx.Timeout(config.app.timeout, connect=10.0),
+            )
+        return self.__async_client
+
+    async def check_upstream(self, timeout: float):
+        """Raise unless the upstream API lists its models within timeout seconds"""
+        response = await self.__client().get(self.__models_url, timeout=timeout)
+        response.raise_for_status()
+
+    async def close(self):
+        if self.__async_client is not None:
+            await self.__async_client.aclose()
+            self.__async_client = None
+
+    def send(self, message: Message) -> Message:
+        refusal = self.__guard(message)
+        if refusal:
+            return refusal
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = httpx.post(
+                self.__url,
+                json=self.__payload(message, stream=False),
+                headers=self.__headers(),
+                timeout=config.app.timeout,
+            )
+            response.raise_for_status()
+            body = response.json()
+            content = body["choices"][0]["message"]["content"]
+            outcome = "ok"
+        except Exception as e:
+            LLM_ERRORS.inc(self.__model, "sync", _error_kind(e))
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, self.__model, "sync", outcome)
+        self.__count_usage(body.get("usage"))
+        self.__remember(message, content)
+        return Message(content=content, is_user=False, conversation_id=message.conversation_id)
+
+    def __count_usage(self, usage: Optional[dict], streamed_chunks: int = 0):
+        if usage:
+            LLM_TOKENS.inc(self.__model, "prompt", amount=usage.get("prompt_tokens") or 0)
+            LLM_TOKENS.inc(self.__model, "completion", amount=usage.get("completion_tokens") or 0)
+        elif streamed_chunks:
+            LLM_TOKENS.inc(self.__model, "completion", amount=streamed_chunks)
+
+    async def stream(self, message: Message) -> AsyncIterator[str]:
+        """Yield content deltas from the upstream chat completion stream.
+
+        Tokens are pulled from the upstream connection only as fast as the
+        caller consumes them, and leaving the generator early (e.g. when the
+        client disconnects and the response task is cancelled) closes the
+        upstream request.
+        """
+        refusal = self.__guard(message)
+        if refusal:
+            yield refusal.content
+            return
 
-    def get_suggestions():
+        started = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        usage = None
+        outcome = "error"
+        answer = []
+        try:
+            # The sql history backend does blocking I/O, keep it off the event loop
+            payload = await asyncio.to_thread(self.__payload, message, True)
+            async with self.__client().stream("POST", self.__url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    content, chunk_usage = _parse_chunk(data)
+                    usage = chunk_usage or usage
+                    if not content:
+                        continue
+
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        LLM_FIRST_TOKEN_SECONDS.observe(first_token_at - started, self.__model)
+                        logger.info(f"Chat stream time to first token: {(first_token_at - started) * 1000:.1f} ms")
+                    tokens += 1
+                    answer.append(content)
+                    yield content
+
+            outcome = "ok"
+            await asyncio.to_thread(self.__remember, message, "".join(answer))
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            logger.info("Chat stream cancelled by client, closing upstream request")
+            raise
+        except Exception as e:
+            LLM_ERRORS.inc(self.__model, "stream", _error_kind(e))
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, self.__model, "stream", outcome)
+            self.__count_usage(usage, tokens)
+            logger.info(
+                f"Chat stream finished after {(time.perf_counter() - started) * 1000:.1f} ms "
+                f"with {tokens} chunks{'' if first_token_at else ' (no tokens received)'}"
+            )
+
+    async def stream_events(self, message: Message) -> AsyncIterator[str]:
+        """Format stream() as Server-Sent Events."""
+        try:
+            async for content in self.stream(message):
+                yield f"data: {json.dumps({'content': content})}\n\n"
+        except (httpx.HTTPError, MalformedChunkError) as e:
+            # the 200 and its headers are already sent, the client learns of it from the event
+            logger.error(f"Chat stream upstream error: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Upstream model request failed'})}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+
+    def get_suggestions(self):
         return [
             "Apa yang bisa saya tanyakan?",
             "Bisa bantu saya dengan hal lain?"
         ]
-    
-message_service = MessageService()
+
+message_service: MessageService = Lazy(MessageService)
@@ -0,0 +1,86 @@
+import asyncio, logging, time
+from typing import Optional, Tuple
+from sqlalchemy import text
+from app.core.admission import admission
+from app.core.database import get_async_engine, pool_status
+from app.core.lazy import Lazy
+from app.services.message import message_service
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+class ReadinessProbe:
+    """Whether this worker should get traffic: pool headroom, database, upstream model, admission queues.
+
+    The result is cached for readiness.cache_seconds, so frequent load
+    balancer probes cost one database round trip and one upstream request
+    per period at most. Probes arriving while the cache is refreshed wait
+    for that refresh instead of starting their own.
+    """
+
+    def __init__(self):
+        self.__config = config.admission.readiness
+        self.__cached: Optional[Tuple[float, bool, dict]] = None
+        self.__lock = asyncio.Lock()
+
+    def __fresh(self) -> Optional[Tuple[bool, dict]]:
+        if self.__cached is not None and self.__cached[0] > time.monotonic():
+            return self.__cached[1], self.__cached[2]
+        return None
+
+    async def check(self) -> Tuple[bool, dict]:
+        cached = self.__fresh()
+        if cached is not None:
+            return cached
+        async with self.__lock:
+            cached = self.__fresh()
+            if cached is not None:
+                return cached
+            return await self.__check()
+
+    async def __check(self) -> Tuple[bool, dict]:
+        checks = {"database": await self.__database(), "admission": self.__admission()}
+        if self.__config.check_llm:
+            checks["llm"] = await self.__llm()
+        ready = all(check["ok"] for name, check in checks.items() if name != "llm" or self.__config.require_llm)
+        if not ready:
+            logger.warning(f"Not ready: {checks}")
+        self.__cached = (time.monotonic() + self.__config.cache_seconds, ready, checks)
+        return ready, checks
+
+    async def __database(self) -> dict:
+        headroom = {}
+        for name, status in pool_status().items():
+            if "size" not in status or status["max_overflow"] < 0:
+                continue  # pools without a bound, e.g. SQLite's
+            capacity = status["size"] + status["max_overflow"]
+            headroom[name] = round(1 - status["checked_out"] / capacity, 3) if capacity else 1.0
+        exhausted = [name for name, free in headroom.items() if free < self.__config.min_pool_headroom]
+        if exhausted:
+            return {"ok": False, "pool_headroom": headroom, "error": f"pool nearly exhausted: {', '.join(exhausted)}"}
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.__select_one(), self.__config.db_timeout_seconds)
+        except Exception as e:
+            return {"ok": False, "pool_headroom": headroom, "error": type(e).__name__}
+        return {"ok": True, "pool_headroom": headroom, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    async def __select_one(self):
+        async with get_async_engine().connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    def __admission(self) -> dict:
+        saturated = admission.saturated()
+        return {"ok": not saturated, "saturated": saturated}
+
+    async def __llm(self) -> dict:
+        started = time.perf_counter()
+        try:
+            await message_service.check_upstream(self.__config.llm_timeout_seconds)
+        except Exception as e:
+            return {"ok": False, "error": type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+readiness_probe: ReadinessProbe = Lazy(ReadinessProbe)
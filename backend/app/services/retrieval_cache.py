@@ -0,0 +1,39 @@
+import re
+from typing import Any, Optional
+from app.core.cache import create_cache
+from app.services.text import normalize
+from app.config import config
+from app.core.lazy import Lazy
+
+PUNCTUATION = re.compile(r"[^\w]+", re.UNICODE)
+
+def normalize_query(query: str) -> str:
+    """Case, width and punctuation-insensitive form of a query"""
+    return " ".join(PUNCTUATION.sub(" ", normalize(query)).split())
+
+class RetrievalCache:
+    """Search and retrieval results keyed by the project content version.
+
+    Every document change bumps projects.content_version, once the change
+    is in the database and in this process's indexes, and the version is
+    part of the key, so entries for older content are never looked up again
+    and simply age out.
+    """
+
+    def __init__(self, backend):
+        self.__backend = backend
+
+    @staticmethod
+    def key(kind: str, project_id: int, content_version: int, query: str, limit: int) -> str:
+        return f"{kind}:{project_id}:{content_version}:{limit}:{normalize_query(query)}"
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.__backend.get(key)
+
+    def set(self, key: str, value: Any):
+        self.__backend.set(key, value)
+
+    def stats(self) -> dict:
+        return self.__backend.stats()
+
+retrieval_cache: RetrievalCache = Lazy(lambda: RetrievalCache(create_cache(config.retrieval_cache, prefix="retrieval")))
@@ -0,0 +1,277 @@
+import math, threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.document import DocumentChunkModels, DocumentModels
+from app.services.text import analyze, stem, words
+
+class InvertedIndex:
+    """In-memory BM25 index over the chunks of one project.
+
+    Postings are parallel array('I') columns of internal chunk numbers and
+    term frequencies, so a term costs two compact buffers instead of a dict
+    of Python ints, and scoring runs on zero-copy NumPy views of them.
+    Removing a document only clears its live flags; the arrays are compacted
+    once enough rows are dead.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    COMPACT_RATIO = 0.3
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__postings: Dict[str, Tuple[array, array]] = {}
+        self.__chunk_ids = array("q")
+        self.__document_ids = array("q")
+        self.__lengths = array("I")
+        self.__live = bytearray()
+        self.__by_document: Dict[int, array] = {}
+        self.__live_count = 0
+        self.__live_length = 0
+        # (chunk count, max chunk id) of the live documents' rows this index reflects
+        self.signature: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return self.__live_count
+
+    def add_document(self, document_id: int, chunks: Iterable[Tuple[int, str]]):
+        with self.__lock:
+            self.remove_document(document_id)
+            numbers = array("I")
+            for chunk_id, text in chunks:
+                terms = analyze(text)
+                number = len(self.__chunk_ids)
+                self.__chunk_ids.append(chunk_id)
+                self.__document_ids.append(document_id)
+                self.__lengths.append(len(terms))
+                self.__live.append(1)
+                for term, frequency in Counter(terms).items():
+                    postings = self.__postings.get(term)
+                    if postings is None:
+                        postings = self.__postings[term] = (array("I"), array("I"))
+                    postings[0].append(number)
+                    postings[1].append(frequency)
+                numbers.append(number)
+                self.__live_count += 1
+                self.__live_length += len(terms)
+            if numbers:
+                self.__by_document[document_id] = numbers
+
+    def remove_document(self, document_id: int) -> int:
+        with self.__lock:
+            numbers = self.__by_document.pop(document_id, None)
+            if not numbers:
+                return 0
+            for number in numbers:
+                self.__live[number] = 0
+                self.__live_length -= self.__lengths[number]
+            self.__live_count -= len(numbers)
+
+            if len(self.__chunk_ids) - self.__live_count > self.COMPACT_RATIO * len(self.__chunk_ids):
+                self.__compact()
+            return len(numbers)
+
+    def max_chunk_id(self) -> int:
+        """Largest chunk id still indexed, 0 when empty"""
+        import numpy as np
+
+        with self.__lock:
+            if not self.__live_count:
+                return 0
+            chunk_ids = np.frombuffer(self.__chunk_ids, dtype=np.int64)
+            live = np.frombuffer(self.__live, dtype=np.uint8).view(bool)
+            largest = int(chunk_ids[live].max())
+            del chunk_ids, live
+            return largest
+
+    def __compact(self):
+        import numpy as np
+
+        live = np.frombuffer(self.__live, dtype=np.uint8).astype(bool)
+        renumber = np.cumsum(live, dtype=np.int64) - 1
+        del live
+
+        postings = {}
+        for term, (numbers, frequencies) in self.__postings.items():
+            kept_numbers, kept_frequencies = array("I"), array("I")
+            for number, frequency in zip(numbers, frequencies):
+                if self.__live[number]:
+                    kept_numbers.append(int(renumber[number]))
+                    kept_frequencies.append(frequency)
+            if kept_numbers:
+                postings[term] = (kept_numbers, kept_frequencies)
+
+        chunk_ids, document_ids, lengths = array("q"), array("q"), array("I")
+        by_document: Dict[int, array] = {}
+        for number, alive in enumerate(self.__live):
+            if alive:
+                chunk_ids.append(self.__chunk_ids[number])
+                document_ids.append(self.__document_ids[number])
+                lengths.append(self.__lengths[number])
+                by_document.setdefault(self.__document_ids[number], array("I")).append(len(chunk_ids) - 1)
+
+        self.__postings = postings
+        self.__chunk_ids, self.__document_ids, self.__lengths = chunk_ids, document_ids, lengths
+        self.__live = bytearray(b"\x01" * len(chunk_ids))
+        self.__by_document = by_document
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, int, float]]:
+        """Return (chunk_id, document_id, score) of the best BM25 matches"""
+        import numpy as np
+
+        terms = set(analyze(query))
+        with self.__lock:
+            if not terms or not self.__live_count:
+                return []
+
+            total = len(self.__chunk_ids)
+            average_length = self.__live_length / self.__live_count
+            # views on the arrays must be dropped before the lock is released,
+            # an exported buffer makes array.append() fail
+            lengths = np.frombuffer(self.__lengths, dtype=np.uint32)
+            live = np.frombuffer(self.__live, dtype=np.uint8).view(bool)
+            scores = np.zeros(total, dtype=np.float32)
+            numbers = None
+            for term in terms:
+                postings = self.__postings.get(term)
+                if postings is None:
+                    continue
+                numbers = np.frombuffer(postings[0], dtype=np.uint32)
+                mask = live[numbers]
+                numbers = numbers[mask]
+                if not len(numbers):
+                    continue
+                frequencies = np.frombuffer(postings[1], dtype=np.uint32)[mask].astype(np.float32)
+                idf = math.log(1 + (self.__live_count - len(numbers) + 0.5) / (len(numbers) + 0.5))
+                norm = self.K1 * (1 - self.B + self.B * lengths[numbers] / average_length)
+                # numbers are unique within a posting list, so fancy += is safe
+                scores[numbers] += idf * frequencies * (self.K1 + 1) / (frequencies + norm)
+            del lengths, live, numbers
+
+            matched = np.flatnonzero(scores)
+            if not len(matched):
+                return []
+            if len(matched) > limit:
+                matched = matched[np.argpartition(scores[matched], -limit)[-limit:]]
+            matched = matched[np.argsort(scores[matched])[::-1]]
+            return [(self.__chunk_ids[i], self.__document_ids[i], float(scores[i])) for i in matched]
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the postings and per-chunk columns"""
+        with self.__lock:
+            size = sum(a.itemsize * len(a) for a in (self.__chunk_ids, self.__document_ids, self.__lengths))
+            size += len(self.__live)
+            for term, (numbers, frequencies) in self.__postings.items():
+                size += len(term) + 4 * (len(numbers) + len(frequencies))
+            return size
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "chunks": self.__live_count,
+                "rows": len(self.__chunk_ids),  # dead rows included until the next compaction
+                "terms": len(self.__postings),
+                "postings": sum(len(numbers) for numbers, _ in self.__postings.values()),
+                "memory_bytes": self.memory_bytes(),
+            }
+
+class SearchIndexService:
+    """Per-project inverted indexes, built lazily from document_chunks.
+
+    Uploads and deletes handled by this process update the index in place.
+    Before each search the index is checked against the (count, max id) of
+    the chunk rows of the project's live documents, so changes made by
+    another worker trigger a rebuild instead of serving stale results.
+    Tombstoned documents are left out of both, so neither a delete nor the
+    storage collector purging its rows later forces a rebuild.
+    """
+
+    def __init__(self):
+        self.__indexes: Dict[int, InvertedIndex] = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __live_chunks(query, project_id: int):
+        return query.join(DocumentModels, DocumentModels.id == DocumentChunkModels.document_id).filter(
+            DocumentChunkModels.project_id == project_id,
+            DocumentModels.deleted_at.is_(None),
+        )
+
+    def __signature(self, db: Session, project_id: int) -> Tuple[int, int]:
+        count, max_id = self.__live_chunks(
+            db.query(func.count(DocumentChunkModels.id), func.max(DocumentChunkModels.id)), project_id
+        ).one()
+        return count, max_id or 0
+
+    def build(self, db: Session, project_id: int) -> InvertedIndex:
+        index = InvertedIndex()
+        signature = self.__signature(db, project_id)
+        rows = self.__live_chunks(
+            db.query(DocumentChunkModels.document_id, DocumentChunkModels.id, DocumentChunkModels.text), project_id
+        ).order_by(DocumentChunkModels.document_id, DocumentChunkModels.id).yield_per(2000)
+
+        document_id, chunks = None, []
+        for row_document_id, chunk_id, text in rows:
+            if row_document_id != document_id and chunks:
+                index.add_document(document_id, chunks)
+                chunks = []
+            document_id = row_document_id
+            chunks.append((chunk_id, text or ""))
+        if chunks:
+            index.add_document(document_id, chunks)
+
+        index.signature = signature
+        with self.__lock:
+            self.__indexes[project_id] = index
+        return index
+
+    def get_index(self, db: Session, project_id: int) -> InvertedIndex:
+        with self.__lock:
+            index = self.__indexes.get(project_id)
+        if index is None or index.signature != self.__signature(db, project_id):
+            index = self.build(db, project_id)
+        return index
+
+    def add_document(self, project_id: int, document_id: int, chunks: List[Tuple[int, str]]):
+        with self.__lock:
+            index = self.__indexes.get(project_id)
+        if index is None or index.signature is None:
+            return  # built from the database on first search
+        removed = index.remove_document(document_id)
+        index.add_document(document_id, chunks)
+        count, _ = index.signature
+        index.signature = (count - removed + len(chunks), index.max_chunk_id())
+
+    def remove_document(self, project_id: int, document_id: int):
+        with self.__lock:
+            index = self.__indexes.get(project_id)
+        if index is None or index.signature is None:
+            return
+        removed = index.remove_document(document_id)
+        count, _ = index.signature
+        index.signature = (count - removed, index.max_chunk_id())
+
+    def drop_project(self, project_id: int):
+        with self.__lock:
+            self.__indexes.pop(project_id, None)
+
+    def search(self, db: Session, project_id: int, query: str, limit: int) -> List[Tuple[int, int, float]]:
+        return self.get_index(db, project_id).search(query, limit)
+
+def make_snippet(text: str, query: str, width: int = 30) -> str:
+    """Window of about width words around the first word matching the query"""
+    terms = set(analyze(query))
+    spans = list(words(text))
+    if not spans:
+        return ""
+
+    first = next((i for i, (word, _, _) in enumerate(spans) if stem(word) in terms), 0)
+    start = max(first - width // 3, 0)
+    end = min(start + width, len(spans))
+    snippet = text[spans[start][1]:spans[end - 1][2]]
+    return ("..." if start > 0 else "") + " ".join(snippet.split()) + ("..." if end < len(spans) else "")
+
+search_index_service = SearchIndexService()
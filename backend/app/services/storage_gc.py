@@ -0,0 +1,320 @@
+import os, time, logging, threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import delete, func, select, text
+from app.core.database import SessionLocal, get_engine
+from app.models.blob import BlobModels
+from app.models.document import DocumentModels, DocumentPageModels, DocumentChunkModels
+from app.models.project import ProjectModels, ProjectAccessModels
+from app.services.blob_store import BlobStore, blob_store
+from app.services.vector_index import vector_index_service
+from app.services.search_index import search_index_service
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+# arbitrary key for pg_try_advisory_lock, one collector runs at a time across workers
+LOCK_KEY = 7_146_018
+# findings listed per kind in a reconcile report, the counts are always complete
+REPORT_LIMIT = 100
+PREFIXES = [f"{i:02x}" for i in range(256)]
+
+def _upper(prefix: str) -> str:
+    # sorts after every hex key starting with prefix
+    return prefix + "g"
+
+class StorageCollector:
+    """Purges tombstoned projects and documents and reconciles blob files with the database.
+
+    Deletes only set deleted_at. A daemon thread wakes every interval_seconds
+    and purges tombstones older than grace_seconds, batch_size documents per
+    transaction: their pages, chunks and rows go, their blob references are
+    released and unreferenced files unlinked, pausing so that no more than
+    max_files_per_second are deleted. A project row goes once it has no
+    documents left, together with its indexes.
+
+    Every reconcile_interval_seconds it checks the next reconcile_prefixes of
+    the 256 top-level blob directories against the blobs and documents
+    tables, so a full sweep is spread over many passes, and reports orphans
+    either way. On Postgres an advisory lock keeps the collectors of other
+    workers out while one is running.
+    """
+
+    def __init__(self, store: BlobStore):
+        self.__store = store
+        self.__thread: Optional[threading.Thread] = None
+        self.__wake = threading.Event()
+        self.__stop = threading.Event()
+        self.__cursor = 0
+        self.__last_purge: Optional[dict] = None
+        self.__last_reconcile: Optional[dict] = None
+
+    def start(self):
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="storage-gc", daemon=True)
+        self.__thread.start()
+
+    def shutdown(self, timeout: float = 10):
+        self.__stop.set()
+        self.__wake.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        self.__thread = None
+
+    def wake(self):
+        """Run a purge now instead of at the next interval"""
+        self.__wake.set()
+
+    def __run(self):
+        next_reconcile = time.monotonic() + config.storage_gc.reconcile_interval_seconds
+        while not self.__stop.is_set():
+            try:
+                self.purge()
+                if time.monotonic() >= next_reconcile:
+                    self.reconcile()
+                    next_reconcile = time.monotonic() + config.storage_gc.reconcile_interval_seconds
+            except Exception as e:
+                logger.exception(f"Storage collection failed: {e}")
+            self.__wake.wait(config.storage_gc.interval_seconds)
+            self.__wake.clear()
+
+    @contextmanager
+    def __exclusive(self):
+        engine = get_engine()
+        if engine.dialect.name != "postgresql":
+            yield True
+            return
+        with engine.connect() as connection:
+            acquired = connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY})
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+                connection.commit()
+
+    def __pace(self, files: int):
+        if files and config.storage_gc.max_files_per_second > 0:
+            self.__stop.wait(files / config.storage_gc.max_files_per_second)
+
+    @staticmethod
+    def __db_now(db) -> datetime:
+        # tombstones are stamped with the database clock
+        return db.scalar(select(func.now()))
+
+    def __purge_documents(self, *criteria) -> tuple:
+        """Delete one batch of documents matching criteria, returns (documents, files) removed"""
+        with SessionLocal() as db:
+            documents = db.query(DocumentModels.id, DocumentModels.file_url).filter(*criteria).limit(config.storage_gc.batch_size).all()
+            if not documents:
+                return 0, 0
+            document_ids = [document_id for document_id, _ in documents]
+            db.execute(delete(DocumentPageModels).where(DocumentPageModels.document_id.in_(document_ids)))
+            db.execute(delete(DocumentChunkModels).where(DocumentChunkModels.document_id.in_(document_ids)))
+            db.execute(delete(DocumentModels).where(DocumentModels.id.in_(document_ids)))
+            self.__store.release(db, [file_url for _, file_url in documents])
+            db.commit()
+        removed = self.__store.collect(file_url for _, file_url in documents)
+        self.__pace(len(removed))
+        return len(documents), len(removed)
+
+    def __purge_project(self, project_id: int) -> tuple:
+        documents = files = 0
+        while True:
+            if self.__stop.is_set():
+                return documents, files, False
+            purged, removed = self.__purge_documents(DocumentModels.project_id == project_id)
+            documents, files = documents + purged, files + removed
+            if not purged:
+                break
+
+        with SessionLocal() as db:
+            # chunks an interrupted ingestion left without a document
+            db.execute(delete(DocumentChunkModels).where(DocumentChunkModels.project_id == project_id))
+            db.execute(delete(ProjectAccessModels).where(ProjectAccessModels.project_id == project_id))
+            db.execute(delete(ProjectModels).where(ProjectModels.id == project_id, ProjectModels.deleted_at.is_not(None)))
+            db.commit()
+        vector_index_service.drop_project(project_id)
+        search_index_service.drop_project(project_id)
+        return documents, files, True
+
+    def purge(self) -> Optional[dict]:
+        """Purge tombstones past the grace period, None when another worker is collecting"""
+        with self.__exclusive() as acquired:
+            if not acquired:
+                return None
+            start = time.monotonic()
+            report = Counter()
+            with SessionLocal() as db:
+                cutoff = self.__db_now(db) - timedelta(seconds=config.storage_gc.grace_seconds)
+                project_ids = db.scalars(
+                    select(ProjectModels.id).where(ProjectModels.deleted_at < cutoff).order_by(ProjectModels.id)
+                ).all()
+
+            while not self.__stop.is_set():
+                purged, removed = self.__purge_documents(DocumentModels.deleted_at < cutoff)
+                report["documents"] += purged
+                report["files"] += removed
+                if not purged:
+                    break
+
+            for project_id in project_ids:
+                if self.__stop.is_set():
+                    break
+                purged, removed, done = self.__purge_project(project_id)
+                report["documents"] += purged
+                report["files"] += removed
+                report["projects"] += done
+
+            self.__last_purge = {
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "seconds": round(time.monotonic() - start, 3),
+                "projects": report["projects"],
+                "documents": report["documents"],
+                "files": report["files"],
+            }
+            if report["documents"] or report["projects"]:
+                logger.info(
+                    f"Purged {report['projects']} projects and {report['documents']} documents, "
+                    f"deleted {report['files']} files in {self.__last_purge['seconds']} s"
+                )
+            return self.__last_purge
+
+    def __scan_files(self, prefix: str) -> dict:
+        """key -> (size, mtime) of the blob files under one top-level directory"""
+        files, top = {}, os.path.join(self.__store.root, prefix)
+        for directory, _, names in os.walk(top):
+            for name in names:
+                try:
+                    stat = os.stat(os.path.join(directory, name))
+                except FileNotFoundError:
+                    continue  # collected meanwhile
+                files[name] = (stat.st_size, stat.st_mtime)
+        return files
+
+    def __remove_stale_staging(self, older_than: float) -> int:
+        staging_dir = os.path.join(self.__store.root, "tmp")
+        removed = 0
+        for entry in os.scandir(staging_dir) if os.path.isdir(staging_dir) else []:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < older_than:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # published or cleaned up by its upload meanwhile
+        return removed
+
+    def reconcile(self, prefixes: Optional[List[str]] = None) -> Optional[dict]:
+        """Compare a slice of the blob store with the blobs and documents tables.
+
+        Reports blob files without a referenced row (orphan_files), rows
+        without a file (missing_files), documents whose blob has no row
+        (dangling_documents) and rows whose refcount differs from the number
+        of documents using them (refcount_mismatches). Rows left with no
+        references are collected, stale staged uploads removed, and orphaned
+        files deleted when delete_orphans is set. Returns None when another
+        worker is collecting.
+        """
+        with self.__exclusive() as acquired:
+            if not acquired:
+                return None
+            if prefixes is None:
+                count = max(1, min(config.storage_gc.reconcile_prefixes, len(PREFIXES)))
+                prefixes = [PREFIXES[(self.__cursor + i) % len(PREFIXES)] for i in range(count)]
+                self.__cursor = (self.__cursor + count) % len(PREFIXES)
+
+            start = time.monotonic()
+            orphan_age = config.storage_gc.orphan_age_seconds
+            findings = {"orphan_files": [], "missing_files": [], "dangling_documents": [], "refcount_mismatches": []}
+            counts = Counter()
+            unreferenced = []
+
+            for prefix in prefixes:
+                files = self.__scan_files(prefix)
+                with SessionLocal() as db:
+                    settled = self.__db_now(db) - timedelta(seconds=orphan_age)
+                    blobs = {
+                        key: (refcount, created_at)
+                        for key, refcount, created_at in db.query(BlobModels.sha256, BlobModels.refcount, BlobModels.created_at).filter(
+                            BlobModels.sha256 >= prefix, BlobModels.sha256 < _upper(prefix)
+                        )
+                    }
+                    references = dict(db.query(DocumentModels.file_url, func.count(DocumentModels.id)).filter(
+                        DocumentModels.file_url >= prefix, DocumentModels.file_url < _upper(prefix)
+                    ).group_by(DocumentModels.file_url).all())
+                    dangling = [key for key in references if key not in blobs and self.__store.is_key(key)]
+                    dangling_ids = db.scalars(
+                        select(DocumentModels.id).where(DocumentModels.file_url.in_(dangling)).order_by(DocumentModels.id)
+                    ).all() if dangling else []
+
+                counts["files_checked"] += len(files)
+                counts["blobs_checked"] += len(blobs)
+                findings["dangling_documents"].extend(dangling_ids)
+
+                for key, (refcount, created_at) in blobs.items():
+                    used = references.get(key, 0)
+                    if refcount <= 0 and not used:
+                        unreferenced.append(key)
+                        continue
+                    if created_at is not None and created_at >= settled:
+                        continue  # its upload may still be publishing
+                    if key not in files:
+                        findings["missing_files"].append(key)
+                    if refcount != used:
+                        findings["refcount_mismatches"].append({"sha256": key, "refcount": refcount, "documents": used})
+
+                cutoff = time.time() - orphan_age
+                for key, (_, mtime) in files.items():
+                    if key in blobs or mtime >= cutoff:
+                        continue
+                    findings["orphan_files"].append(key)
+                    if config.storage_gc.delete_orphans and self.__store.is_key(key):
+                        try:
+                            os.remove(self.__store.path(key))
+                            counts["orphan_files_deleted"] += 1
+                        except FileNotFoundError:
+                            pass
+                        self.__pace(1)
+
+                if self.__stop.is_set():
+                    break
+
+            collected = self.__store.collect(unreferenced)
+            counts["collected"] = len(collected)
+            counts["stale_staging_removed"] = self.__remove_stale_staging(time.time() - orphan_age)
+
+            report = {
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "seconds": round(time.monotonic() - start, 3),
+                "prefixes": f"{prefixes[0]}..{prefixes[-1]}" if prefixes else "",
+                **{kind: len(items) for kind, items in findings.items()},
+                **counts,
+                "findings": {kind: items[:REPORT_LIMIT] for kind, items in findings.items()},
+            }
+            self.__last_reconcile = report
+            if any(findings.values()):
+                logger.warning(
+                    f"Storage reconcile of {report['prefixes']}: {report['orphan_files']} orphan files, "
+                    f"{report['missing_files']} missing files, {report['dangling_documents']} dangling documents, "
+                    f"{report['refcount_mismatches']} refcount mismatches"
+                )
+            return report
+
+    def status(self) -> dict:
+        with SessionLocal() as db:
+            pending_projects = db.scalar(select(func.count(ProjectModels.id)).where(ProjectModels.deleted_at.is_not(None)))
+            pending_documents = db.scalar(select(func.count(DocumentModels.id)).where(DocumentModels.deleted_at.is_not(None)))
+        return {
+            "running": self.__thread is not None and self.__thread.is_alive(),
+            "pending_projects": pending_projects,
+            "pending_documents": pending_documents,
+            "reconcile_cursor": PREFIXES[self.__cursor],
+            "last_purge": self.__last_purge,
+            "last_reconcile": self.__last_reconcile,
+        }
+
+storage_collector = StorageCollector(blob_store)
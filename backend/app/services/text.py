@@ -0,0 +1,84 @@
+"""Text analysis for keyword search, tuned for Bahasa Indonesia.
+
+Terms are lowercased, stop words dropped and words reduced with a light,
+dictionary-free Indonesian stemmer (particles, possessives, derivational
+suffixes and prefixes, after Nazief & Adriani). It over-stems some words, but
+the same analysis runs on documents and queries so matches stay consistent.
+"""
+import re, unicodedata
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STOP_WORDS = frozenset("""
+ada adalah agar akan aku anda apa apakah atau bagaimana bagi bahwa banyak
+belum bila bisa boleh dalam dan dapat dari daripada dengan di dia ialah ini
+itu jika juga kami kamu karena ke kepada kita lagi lah maka mana masih mereka
+namun oleh pada para saat saja sampai sangat saya se sebagai sebuah secara
+sedang sehingga sejak semua seperti serta sudah supaya tanpa telah tentang
+tersebut tetapi tidak untuk yaitu yakni yang
+a an and are as at be by for from in is it of on or that the this to was with
+""".split())
+
+PARTICLES = ("lah", "kah", "tah", "pun")
+POSSESSIVES = ("nya", "ku", "mu")
+SUFFIXES = ("kan", "an", "i")
+MIN_STEM = 3
+VOWELS = "aeiou"
+
+def _strip_suffix(word: str, suffixes, min_stem: int = MIN_STEM) -> str:
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+            return word[:-len(suffix)]
+    return word
+
+def _strip_prefix(word: str) -> str:
+    def ok(stem: str) -> bool:
+        return len(stem) >= MIN_STEM
+
+    for prefix in ("di", "ke", "se"):
+        if word.startswith(prefix) and ok(word[2:]):
+            return word[2:]
+
+    if word.startswith(("meny", "peny")) and len(word) > 4 and word[4] in VOWELS and ok(word[3:]):
+        return "s" + word[4:]  # menyapu -> sapu
+    if word.startswith(("meng", "peng")) and ok(word[4:]):
+        return word[4:]  # mengambil -> ambil
+    if word.startswith(("mem", "pem")) and ok(word[3:]):
+        if word[3] in VOWELS:
+            return "p" + word[3:]  # memukul -> pukul
+        return word[3:]  # membaca -> baca
+    if word.startswith(("men", "pen")) and ok(word[3:]):
+        if word[3] in VOWELS:
+            return "t" + word[3:]  # menulis -> tulis
+        return word[3:]  # mendengar -> dengar
+    for prefix in ("ber", "ter", "per"):
+        if word.startswith(prefix) and ok(word[3:]):
+            return word[3:]
+    for prefix in ("me", "pe", "be"):
+        if word.startswith(prefix) and ok(word[2:]):
+            return word[2:]
+    return word
+
+@lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    if len(word) <= MIN_STEM + 1 or word.isdigit():
+        return word
+    stemmed = _strip_suffix(word, PARTICLES)
+    stemmed = _strip_suffix(stemmed, POSSESSIVES)
+    # a longer minimum keeps short roots like "jalan" or "makan" intact
+    stemmed = _strip_suffix(stemmed, SUFFIXES, min_stem=MIN_STEM + 1)
+    return _strip_prefix(stemmed)
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+def words(text: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (word, start, end) for every word in the original text"""
+    for match in WORD_PATTERN.finditer(text):
+        yield normalize(match.group()), match.start(), match.end()
+
+def analyze(text: str) -> List[str]:
+    """Search terms of a text, in order, with stop words removed"""
+    return [stem(word) for word in WORD_PATTERN.findall(normalize(text)) if word not in STOP_WORDS]
@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime
+from typing import Optional, Tuple
+from app.core.cache import LRUCache, SharedVersions
+from app.config.user_cache import UserCacheConfig
+from app.models.user import UserModels, UserRole
+from app.config import config
+from app.core.lazy import Lazy
+
+class CachedUser:
+    """Detached snapshot of the user fields authenticated routes read"""
+
+    __slots__ = ("id", "username", "email", "role", "is_active", "created_at")
+
+    def __init__(self, id: int, username: str, email: str, role: UserRole, is_active: bool, created_at: datetime):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+        self.created_at = created_at
+
+    @classmethod
+    def from_model(cls, user: UserModels) -> "CachedUser":
+        return cls(user.id, user.username, user.email, user.role, user.is_active, user.created_at)
+
+    def __repr__(self) -> str:
+        return f"CachedUser(id={self.id}, username={self.username!r}, role={self.role})"
+
+class UserCache:
+    """Authenticated users by username, so get_current_user skips loading them.
+
+    A hit is a dictionary lookup, no query at all. UserRepo invalidates a
+    user when they are updated or deleted, which drops the entry of the
+    current process. Other workers notice after the TTL, unless shared
+    versions are configured: then every hit compares the version the entry
+    was loaded under with the user's current one, a single Redis GET, and
+    invalidate() bumps it for every worker.
+
+    A user invalidated while a request was loading them is not cached from
+    that load: invalidate() also advances a local generation, which put()
+    compares with the one version() read before the load.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, ttl_seconds: float, versions: Optional[SharedVersions] = None):
+        self.enabled = enabled
+        self.__cache = LRUCache(max_entries, ttl_seconds)
+        self.__versions = versions
+        self.__generation = 0
+        self.__lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[CachedUser]:
+        if not self.enabled:
+            return None
+        entry = self.__cache.get(username)
+        if entry is None:
+            return None
+        snapshot, version = entry
+        if self.__versions is not None:
+            current = self.__versions.get(username)
+            if current is None or current != version:
+                return None
+        return snapshot
+
+    def version(self, username: str) -> Tuple[int, Optional[int]]:
+        """Local generation and shared version to put() a user under, read before loading them"""
+        generation = self.__generation
+        if not self.enabled or self.__versions is None:
+            return generation, None
+        return generation, self.__versions.get(username)
+
+    def put(self, user: UserModels, version: Tuple[int, Optional[int]]) -> CachedUser:
+        snapshot = CachedUser.from_model(user)
+        if self.enabled:
+            generation, shared_version = version
+            with self.__lock:
+                # else invalidated since version(), the user may be deleted or demoted
+                if generation == self.__generation:
+                    self.__cache.set(user.username, (snapshot, shared_version))
+        return snapshot
+
+    def invalidate(self, username: str):
+        with self.__lock:
+            self.__generation += 1
+            self.__cache.delete(username)
+        if self.__versions is not None:
+            self.__versions.bump(username)
+
+    def clear(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__cache.clear()
+
+    def stats(self) -> dict:
+        stats = self.__cache.stats()
+        if self.__versions is not None:
+            stats["version_errors"] = self.__versions.errors
+        return stats
+
+def create_user_cache(user_cache_config: UserCacheConfig) -> UserCache:
+    versions = SharedVersions.from_url(user_cache_config.redis_url, prefix="user") if user_cache_config.redis_url else None
+    return UserCache(user_cache_config.enabled, user_cache_config.max_entries, user_cache_config.ttl_seconds, versions)
+
+user_cache: UserCache = Lazy(lambda: create_user_cache(config.user_cache))
@@ -0,0 +1,280 @@
+import os, json, fcntl, shutil, threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, TYPE_CHECKING, Tuple
+from app.services.embedding import Embedder, create_embedder
+from app.core.lazy import Lazy
+from app.utils import get_project_index_dir
+from app.config import config
+
+if TYPE_CHECKING:
+    import numpy as np
+
+INITIAL_CAPACITY = 1024
+# document id of a removed row, skipped by search until the next compaction
+DEAD = -1
+# share of dead rows above which remove() compacts the index
+COMPACT_RATIO = 0.25
+
+class VectorIndex:
+    """Chunk embeddings of one project in memory-mapped files.
+
+    vectors.f32 is a contiguous (capacity, dimension) float32 matrix, with
+    the chunk id and document id of each row in chunks.i64 / documents.i64.
+    meta.json records how many rows are written and how many of them are
+    dead; it is rewritten atomically after the rows themselves, so a crash
+    mid-write never exposes garbage. Opening an index only maps the files,
+    regardless of its size.
+
+    add() only writes past the written rows. remove() only overwrites the
+    document id of the removed rows with DEAD, which search skips, so it
+    costs a scan of the document ids rather than a copy of the index. Once
+    more than COMPACT_RATIO of the rows are dead, the live rows are copied
+    into the files of a new generation before meta.json switches to it. A
+    search reading a snapshot of the mappings without the lock therefore
+    never sees a torn row, and the files of the previous generation stay
+    mapped until it is done.
+
+    Several server processes may share an index: writers hold an flock on
+    the directory, and every operation reloads meta.json when its mtime
+    changed, so rows added by another process become visible.
+    """
+
+    def __init__(self, directory: str, dimension: int):
+        self.directory = directory
+        self.dimension = dimension
+        self.__lock = threading.RLock()
+        self.__count = 0
+        self.__dead = 0
+        self.__capacity = 0
+        self.__generation = 0
+        self.__vectors: Optional["np.memmap"] = None
+        self.__chunks: Optional["np.memmap"] = None
+        self.__documents: Optional["np.memmap"] = None
+        self.__meta_mtime = None
+        self.__refresh()
+
+    def __path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def __data_path(self, name: str, generation: int) -> str:
+        # generation 0 keeps the names of indexes written before generations
+        if generation:
+            stem, extension = os.path.splitext(name)
+            name = f"{stem}.{generation}{extension}"
+        return self.__path(name)
+
+    def __refresh(self):
+        meta_path = self.__path("meta.json")
+        for _ in range(3):
+            try:
+                mtime = os.stat(meta_path).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self.__meta_mtime:
+                return
+
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["dimension"] != self.dimension:
+                raise ValueError(
+                    f"Index at {self.directory} has dimension {meta['dimension']}, expected {self.dimension}; rebuild it"
+                )
+            generation = meta.get("generation", 0)
+            try:
+                if meta["capacity"] != self.__capacity or generation != self.__generation:
+                    self.__map(meta["capacity"], generation)
+            except FileNotFoundError:
+                continue  # another process replaced that generation meanwhile, read meta.json again
+            self.__meta_mtime = mtime
+            self.__count = meta["count"]
+            self.__dead = meta.get("dead", 0)
+            return
+
+    @contextmanager
+    def __writing(self):
+        with self.__lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.__path("lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.__refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __map(self, capacity: int, generation: int):
+        import numpy as np
+
+        vectors = np.memmap(self.__data_path("vectors.f32", generation), dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        chunks = np.memmap(self.__data_path("chunks.i64", generation), dtype=np.int64, mode="r+", shape=(capacity,))
+        documents = np.memmap(self.__data_path("documents.i64", generation), dtype=np.int64, mode="r+", shape=(capacity,))
+        self.__capacity, self.__generation = capacity, generation
+        self.__vectors, self.__chunks, self.__documents = vectors, chunks, documents
+
+    def __allocate(self, capacity: int, generation: int):
+        for name, row_bytes in (("vectors.f32", 4 * self.dimension), ("chunks.i64", 8), ("documents.i64", 8)):
+            with open(self.__data_path(name, generation), "ab") as f:
+                f.truncate(capacity * row_bytes)
+
+    def __grow(self, needed: int):
+        capacity = max(self.__capacity, INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.__capacity:
+            return
+
+        # growing the files in place leaves the rows mapped by a running search as they are
+        self.__flush()
+        self.__allocate(capacity, self.__generation)
+        self.__map(capacity, self.__generation)
+
+    def __flush(self):
+        for array in (self.__vectors, self.__chunks, self.__documents):
+            if array is not None:
+                array.flush()
+
+    def __write_meta(self):
+        self.__flush()
+        temp_path = self.__path("meta.json.tmp")
+        with open(temp_path, "w") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "count": self.__count,
+                "dead": self.__dead,
+                "capacity": self.__capacity,
+                "generation": self.__generation,
+            }, f)
+        os.replace(temp_path, self.__path("meta.json"))
+        self.__meta_mtime = os.stat(self.__path("meta.json")).st_mtime_ns
+
+    def __len__(self) -> int:
+        with self.__lock:
+            self.__refresh()
+            return self.__count - self.__dead
+
+    def add(self, document_id: int, chunk_ids: List[int], vectors: "np.ndarray"):
+        import numpy as np
+
+        if len(chunk_ids) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(chunk_ids), self.dimension):
+            raise ValueError(f"Expected vectors of shape {(len(chunk_ids), self.dimension)}, got {vectors.shape}")
+
+        with self.__writing():
+            start = self.__count
+            end = start + len(chunk_ids)
+            self.__grow(end)
+            self.__vectors[start:end] = vectors
+            self.__chunks[start:end] = chunk_ids
+            self.__documents[start:end] = document_id
+            self.__count = end
+            self.__write_meta()
+
+    def remove(self, document_id: int) -> int:
+        """Mark every row of a document dead, compacting the index once enough rows are"""
+        import numpy as np
+
+        with self.__writing():
+            if not self.__count:
+                return 0
+            rows = np.flatnonzero(self.__documents[:self.__count] == document_id)
+            if not len(rows):
+                return 0
+
+            self.__documents[rows] = DEAD
+            self.__dead += len(rows)
+            if self.__dead > self.__count * COMPACT_RATIO:
+                self.__compact()
+            else:
+                self.__write_meta()
+            return len(rows)
+
+    def __compact(self):
+        """Copy the live rows into a new generation, called while writing"""
+        import numpy as np
+
+        keep = np.flatnonzero(self.__documents[:self.__count] != DEAD)
+        previous = self.__generation
+        vectors, chunks, documents = self.__vectors, self.__chunks, self.__documents
+        self.__allocate(self.__capacity, previous + 1)
+        self.__map(self.__capacity, previous + 1)
+        self.__vectors[:len(keep)] = vectors[keep]
+        self.__chunks[:len(keep)] = chunks[keep]
+        self.__documents[:len(keep)] = documents[keep]
+        self.__count = len(keep)
+        self.__dead = 0
+        self.__write_meta()
+        # searches still holding the old mappings keep reading them after the unlink
+        for name in ("vectors.f32", "chunks.i64", "documents.i64"):
+            os.remove(self.__data_path(name, previous))
+
+    def search(self, query: "np.ndarray", k: int) -> List[Tuple[int, int, float]]:
+        """Return (chunk_id, document_id, score) of the k most similar rows"""
+        import numpy as np
+
+        # Only snapshot under the lock so concurrent searches don't serialize;
+        # a remap by add() leaves the old mapping valid for this snapshot.
+        with self.__lock:
+            self.__refresh()
+            count = self.__count
+            vectors, chunks, documents = self.__vectors, self.__chunks, self.__documents
+        if not count or k <= 0:
+            return []
+
+        scores = vectors[:count] @ np.asarray(query, dtype=np.float32)
+        scores[documents[:count] == DEAD] = -np.inf
+        k = min(k, count)
+        top = np.argpartition(scores, -k)[-k:] if k < count else np.arange(count)
+        top = top[np.argsort(scores[top])[::-1]]
+        # a row removed since the scores were masked is skipped too
+        hits = [(int(chunks[i]), int(documents[i]), float(scores[i])) for i in top]
+        return [hit for hit in hits if hit[1] != DEAD]
+
+    def close(self):
+        with self.__lock:
+            self.__flush()
+            self.__vectors = self.__chunks = self.__documents = None
+
+class VectorIndexService:
+    """Registry of per-project vector indexes, opened lazily on first use"""
+
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+        self.__indexes: Dict[int, VectorIndex] = {}
+        self.__lock = threading.Lock()
+
+    def get_index(self, project_id: int) -> VectorIndex:
+        with self.__lock:
+            index = self.__indexes.get(project_id)
+            if index is None:
+                index = VectorIndex(get_project_index_dir(project_id), self.embedder.dimension)
+                self.__indexes[project_id] = index
+            return index
+
+    def add_document(self, project_id: int, document_id: int, chunk_ids: List[int], vectors: "np.ndarray"):
+        index = self.get_index(project_id)
+        # re-ingesting a document replaces its rows
+        index.remove(document_id)
+        index.add(document_id, chunk_ids, vectors)
+
+    def remove_document(self, project_id: int, document_id: int) -> int:
+        return self.get_index(project_id).remove(document_id)
+
+    def drop_project(self, project_id: int):
+        with self.__lock:
+            index = self.__indexes.pop(project_id, None)
+        if index is not None:
+            index.close()
+        shutil.rmtree(get_project_index_dir(project_id), ignore_errors=True)
+
+    def search(self, project_id: int, text: str, k: int) -> List[Tuple[int, int, float]]:
+        return self.get_index(project_id).search(self.embedder.embed_one(text), k)
+
+vector_index_service: VectorIndexService = Lazy(lambda: VectorIndexService(create_embedder(
+    config.retrieval.embedder,
+    config.retrieval.dimension,
+    url=config.gpt.url,
+    api_key=config.gpt.api_key,
+    model=config.retrieval.embedding_model,
+)))
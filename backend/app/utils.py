@@ -1,6 +1,5 @@
 import os
-from app.config import Settings
-config = Settings.get_settings()
+from app.config import config
 
 def get_root_project_dir():
     try:
@@ -16,8 +15,33 @@ def init_root_project_dir():
 def get_project_dir(project_name: str):
     return os.path.join(get_root_project_dir(), project_name)
 
+def get_project_index_dir(project_id: int):
+    # keyed by id rather than name so renaming a project never touches it
+    return os.path.join(get_root_project_dir(), ".indexes", str(project_id))
+
+def get_blob_dir():
+    return os.path.join(get_root_project_dir(), ".blobs")
+
+def get_profile_dir():
+    return config.profiling.directory or os.path.join(get_root_project_dir(), ".profiles")
+
 def get_relative_path(target_file: str, base_directory: str) -> str:
     base_directory = os.path.abspath(base_directory)
     relative_path = os.path.relpath(target_file, base_directory)
     
-    return relative_path
\ No newline at end of file
+    return relative_path
+
+# Leading bytes expected for each accepted upload extension
+FILE_SIGNATURES = {
+    ".pdf": (b"%PDF-",),
+    ".docx": (b"PK\x03\x04",),
+    ".pptx": (b"PK\x03\x04",),
+    ".xlsx": (b"PK\x03\x04",),
+}
+
+def check_file_signature(filename: str, head: bytes) -> bool:
+    extension = os.path.splitext(filename)[1].lower()
+    signatures = FILE_SIGNATURES.get(extension)
+    if signatures is None:
+        return False
+    return any(head.startswith(signature) for signature in signatures)
@@ -0,0 +1,87 @@
+"""Requests per second and queries per request of project-scoped routes with and without the access cache.
+
+Drives GET /projects/{id} in-process through the ASGI app as a user holding
+grants on many projects, once with the access cache disabled (the user's
+levels are loaded on every request) and once with it enabled.
+
+    python benchmarks/bench_access_cache.py --requests 5000 --grants 200
+"""
+import argparse
+import asyncio
+import time
+
+from common import setup_environment
+
+
+async def drive(app, token: str, project_ids: list, requests: int, concurrency: int) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    remaining = iter(range(requests))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies={"token_cookie": token}) as client:
+        async def worker():
+            for i in remaining:
+                response = await client.get(f"/projects/{project_ids[i % len(project_ids)]}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--grants", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_environment()
+    from sqlalchemy import event
+    from app.core.database import Base, SessionLocal, dispose_async_engine, engine, get_async_engine
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.project import ProjectModels, ProjectAccessModels, ProjectAccessLevel
+    from app.models.user import UserModels, UserRole
+    from app.services.access_cache import access_cache
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add_all([
+            UserModels(id=1, email="owner@example.com", username="owner", hashed_password="x", role=UserRole.USER),
+            UserModels(id=2, email="bench@example.com", username="bench", hashed_password="x", role=UserRole.USER),
+        ])
+        db.add_all(ProjectModels(id=i, owner_id=1, name=f"project-{i}") for i in range(1, args.grants + 1))
+        db.flush()
+        db.add_all(
+            ProjectAccessModels(project_id=i, user_id=2, access_level=ProjectAccessLevel.READ)
+            for i in range(1, args.grants + 1)
+        )
+        db.commit()
+    token = create_access_token({"sub": "bench"})
+    project_ids = list(range(1, args.grants + 1))
+
+    statements = 0
+
+    @event.listens_for(get_async_engine().sync_engine, "before_cursor_execute")
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    # warm up imports, the connection pool and route compilation
+    asyncio.run(drive(app, token, project_ids, 200, args.concurrency))
+
+    print(f"{'cache':<10} {'req/s':>10} {'queries/req':>12}")
+    for enabled in (False, True):
+        access_cache.enabled = enabled
+        access_cache.clear()
+        statements = 0
+        rps = asyncio.run(drive(app, token, project_ids, args.requests, args.concurrency))
+        print(f"{'enabled' if enabled else 'disabled':<10} {rps:>10.0f} {statements / args.requests:>12.2f}")
+    print(access_cache.stats())
+    # aiosqlite connection threads would otherwise keep the interpreter alive
+    asyncio.run(dispose_async_engine())
+
+
+if __name__ == "__main__":
+    main()
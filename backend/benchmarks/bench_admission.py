@@ -0,0 +1,98 @@
+"""A chat spike with and without admission control.
+
+Fires --burst concurrent chat streams at the app (in-process ASGI) backed
+by the fake model, with the chat class limited to --concurrency slots and
+--queue waiters, while probing a CRUD route. Without admission every
+stream is accepted and waits on the upstream; with it the excess gets 503
+and Retry-After in milliseconds, and the CRUD probe is unaffected.
+
+    python benchmarks/bench_admission.py --burst 200 --concurrency 16 --queue 16
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from common import setup_environment
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else float("nan")
+
+
+def serve(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def spike(app, burst: int) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        results = {}
+
+        async def chat(i: int):
+            start = time.perf_counter()
+            response = await client.post("/api/chat/message/stream", json={"content": f"pertanyaan {i}"})
+            results.setdefault(response.status_code, []).append(time.perf_counter() - start)
+
+        probes = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                (await client.get("/projects/page")).raise_for_status()
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(chat(i) for i in range(burst)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return {"elapsed": elapsed, "results": results, "probes": probes}
+
+
+def report(label: str, outcome: dict):
+    print(f"{label}: burst done in {outcome['elapsed']:.2f} s, CRUD probe p99 {percentile(outcome['probes'], 0.99) * 1000:.1f} ms")
+    for status, latencies in sorted(outcome["results"].items()):
+        print(f"  {status}: {len(latencies):>5}  p50 {percentile(latencies, 0.5) * 1000:>8.1f} ms  p99 {percentile(latencies, 0.99) * 1000:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=1.0)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    setup_environment({
+        "ingestion": {"enabled": False},
+        "storage_gc": {"enabled": False},
+        "admission": {"classes": {"chat": {"concurrency": args.concurrency, "queue": args.queue, "queue_timeout_seconds": args.queue_timeout}}},
+    })
+    from fake_llm import create_fake_llm
+    from app.config import Settings
+    from app.main import create_app
+
+    config = Settings.get_settings()
+    serve(create_fake_llm(latency=args.llm_latency, tokens_per_second=200, answer_tokens=32), 9999)
+
+    config.admission.enabled = False
+    report("without admission", asyncio.run(spike(create_app(), args.burst)))
+    config.admission.enabled = True
+    report("with admission", asyncio.run(spike(create_app(), args.burst)))
+
+
+if __name__ == "__main__":
+    main()
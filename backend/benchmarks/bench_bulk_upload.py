@@ -0,0 +1,79 @@
+"""Wall time of multi-file uploads: per-file commits versus the batch path.
+
+``per-file`` reproduces the old one-commit-per-file behaviour by calling
+upload_documents once per file (project lookup, save, insert, commit);
+``batch`` uploads all of them with one DocumentRepo.upload_documents call. Ingestion
+is disabled so only the upload itself is measured. --size-kib is the size
+of each file; they are still read in upload.chunk_size (1 MiB) chunks.
+
+    python benchmarks/bench_bulk_upload.py --batches 10 100 1000 --size-kib 64
+"""
+import argparse
+import io
+import os
+import time
+
+from common import setup_environment
+
+
+def make_files(count: int, size: int, batch: int):
+    from fastapi import UploadFile
+
+    # distinct contents, identical ones would be stored once
+    return [
+        UploadFile(file=io.BytesIO(b"%PDF-1.7\n" + os.urandom(size)), filename=f"batch{batch}-{i}.pdf")
+        for i in range(count)
+    ]
+
+
+def per_file(repo, project_id: int, files):
+    success, error = [], []
+    for file in files:
+        stored, failed = repo.upload_documents(project_id, [file])
+        success.extend(stored)
+        error.extend(failed)
+    return success, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batches", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--size-kib", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    args = parser.parse_args()
+
+    overrides = {"ingestion": {"enabled": False}, "upload": {"write_workers": args.workers}}
+    if args.database_url:
+        overrides["database"] = {"url": args.database_url}
+    setup_environment(overrides)
+    from app.core.database import Base, SessionLocal, engine
+    from app.models.project import ProjectModels
+    from app.repositories.document import DocumentRepo
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        project = ProjectModels(owner_id=1, name="bench")
+        db.add(project)
+        db.commit()
+        project_id = project.id
+
+    print(f"{'files':>6} {'per-file s':>11} {'batch s':>9} {'speedup':>8}")
+    batch = 0
+    for count in args.batches:
+        timings = {}
+        for mode in ("per-file", "batch"):
+            batch += 1
+            files = make_files(count, args.size_kib * 1024, batch)
+            with SessionLocal() as db:
+                repo = DocumentRepo(db)
+                start = time.perf_counter()
+                success, error = (per_file(repo, project_id, files) if mode == "per-file"
+                                  else repo.upload_documents(project_id, files))
+                timings[mode] = time.perf_counter() - start
+            assert len(success) == count and not error, error
+        print(f"{count:>6} {timings['per-file']:>11.3f} {timings['batch']:>9.3f} {timings['per-file'] / timings['batch']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Cold start: import time of app.main and time until a new worker serves /health.
+
+Each measurement is a fresh interpreter, as when the autoscaler adds a pod:
+
+* ``python -X importtime -c "import app.main"``, reporting the total and
+  the modules that cost the most on their own;
+* that the heavy optional libraries (model clients, PDF parsing, numpy,
+  the template engine) are not imported until a request needs them;
+* uvicorn started on ``create_app()`` until the first 200 from /health,
+  lifespan startup (migrations, background services) included.
+
+Fails when a module in LAZY_MODULES is imported eagerly or the median of
+either time exceeds its budget:
+
+    python benchmarks/bench_cold_start.py --runs 5 --import-budget-ms 1500 --ready-budget-ms 3000
+
+tests/test_cold_start.py gates the same budgets in the test suite; this
+script adds the per-module breakdown.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from common import BACKEND_DIR, setup_environment
+
+# loaded on first use, never by importing the app
+LAZY_MODULES = ("groq", "fitz", "pymupdf", "numpy", "jinja2", "streamlit")
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def python(args: list, workdir: str, **kwargs) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    return subprocess.Popen([sys.executable, *args], cwd=workdir, env=env, **kwargs)
+
+
+def import_time(workdir: str) -> tuple:
+    """Seconds to import app.main, and the self time of each module in seconds"""
+    process = python(["-X", "importtime", "-c", "import app.main"], workdir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    _, stderr = process.communicate()
+    if process.returncode:
+        raise SystemExit(f"importing app.main failed:\n{stderr}")
+    modules, total = {}, None
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(1)) / 1e6
+            if match.group(4) == "app.main":
+                total = int(match.group(2)) / 1e6
+    return total, modules
+
+
+def eager_modules(workdir: str) -> list:
+    code = f"import sys, json, app.main; print(json.dumps(sorted(m for m in {LAZY_MODULES!r} if m in sys.modules)))"
+    process = python(["-c", code], workdir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    stdout, _ = process.communicate()
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def time_to_ready(workdir: str, timeout: float = 60) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = python(
+        ["-m", "uvicorn", "app.main:create_app", "--factory", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        workdir,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise SystemExit(f"uvicorn exited with {server.returncode} before serving /health")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"/health not ready after {timeout:.0f} s")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--ready-budget-ms", type=float, default=3000)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules listed")
+    args = parser.parse_args()
+
+    workdir = setup_environment()
+    import_time(workdir)  # compiles the .pyc files, which a deployed image already has
+
+    imports, self_times = [], {}
+    for _ in range(args.runs):
+        total, modules = import_time(workdir)
+        imports.append(total)
+        for name, seconds in modules.items():
+            self_times.setdefault(name, []).append(seconds)
+    readiness = [time_to_ready(workdir) for _ in range(args.runs)]
+
+    print(f"slowest modules by median self time (of {len(self_times)} imported):")
+    for name, samples in sorted(self_times.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:args.top]:
+        print(f"  {statistics.median(samples) * 1000:>7.1f} ms  {name}")
+    import_ms = statistics.median(imports) * 1000
+    ready_ms = statistics.median(readiness) * 1000
+    print(f"import app.main  {import_ms:>8.0f} ms median, {min(imports) * 1000:.0f}-{max(imports) * 1000:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+    print(f"first /health    {ready_ms:>8.0f} ms median, {min(readiness) * 1000:.0f}-{max(readiness) * 1000:.0f} ms (budget {args.ready_budget_ms:.0f} ms)")
+
+    eager = eager_modules(workdir)
+    assert not eager, f"imported by app.main although only needed on first use: {', '.join(eager)}"
+    assert import_ms <= args.import_budget_ms, f"importing app.main takes {import_ms:.0f} ms, over the {args.import_budget_ms:.0f} ms budget"
+    assert ready_ms <= args.ready_budget_ms, f"first /health after {ready_ms:.0f} ms, over the {args.ready_budget_ms:.0f} ms budget"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Bytes saved by response compression against the CPU it costs.
+
+Seeds users, projects and documents, then fetches the large JSON lists
+(/users/, /projects/, a project's documents) once per encoding:
+
+* size on the wire and the compression ratio;
+* CPU time per response spent compressing, at the configured level and at
+  the fastest and densest levels of each encoding;
+* end-to-end requests per second through the app, identity versus each
+  encoding (all in one process, so this is the CPU price, not the network
+  time saved).
+
+zstd and br are measured when the 'zstandard' and 'brotli' packages are
+installed.
+
+    python benchmarks/bench_compression.py --rows 500 --repeat 200
+"""
+import argparse
+import time
+
+from common import setup_environment
+
+LEVEL_RANGE = {"gzip": (1, 9), "br": (0, 11), "zstd": (1, 19)}
+
+
+def cpu_per_call(encoder_class, level: int, body: bytes, repeat: int) -> tuple:
+    start = time.process_time()
+    for _ in range(repeat):
+        encoder = encoder_class(level)
+        data = encoder.compress(body) + encoder.finish()
+    return (time.process_time() - start) / repeat, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500, help="users, projects and documents seeded")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_environment({"ingestion": {"enabled": False}, "storage_gc": {"enabled": False}})
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from app.config import Settings
+    from app.core.compression import ENCODERS, match_content_type
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.document import DocumentModels, IngestionStatus
+    from app.models.project import ProjectModels
+    from app.models.user import UserModels, UserRole
+
+    config = Settings.get_settings().compression
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.execute(insert(UserModels), [
+            {"id": i, "email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x",
+             "role": UserRole.SUPERADMIN if i == 1 else UserRole.USER}
+            for i in range(1, args.rows + 1)
+        ])
+        db.execute(insert(ProjectModels), [
+            {"id": i, "owner_id": 1 + i % args.rows, "name": f"project-{i}", "description": f"Course material for group {i % 37}"}
+            for i in range(1, args.rows + 1)
+        ])
+        db.execute(insert(DocumentModels), [
+            {"project_id": 1, "filename": f"lecture-{i:04d}.pdf", "file_url": f"{i:064x}", "sha256": f"{i:064x}",
+             "size": 100_000 + i * 37, "ingestion_status": IngestionStatus.DONE, "page_count": 10 + i % 50}
+            for i in range(args.rows)
+        ])
+        db.commit()
+
+    urls = {
+        "users": f"/users/?limit={args.rows}",
+        "projects": f"/projects/?limit={args.rows}",
+        "documents": f"/projects/1/documents/?limit={args.rows}",
+    }
+    with TestClient(app, cookies={"token_cookie": create_access_token({"sub": "user1"})}) as client:
+        bodies = {}
+        for name, url in urls.items():
+            response = client.get(url, headers={"Accept-Encoding": "identity"})
+            response.raise_for_status()
+            bodies[name] = (response.content, response.headers["content-type"])
+
+        print(f"{'response':<10} {'encoding':<8} {'level':>5} {'bytes':>9} {'ratio':>6} {'cpu us':>8}")
+        for name, (body, content_type) in bodies.items():
+            print(f"{name:<10} {'identity':<8} {'':>5} {len(body):>9} {1:>6.2f} {0:>8.0f}")
+            levels = config.levels[match_content_type(config.levels, content_type)]
+            for encoding, encoder_class in ENCODERS.items():
+                low, high = LEVEL_RANGE[encoding]
+                for level in sorted({low, levels[encoding], high}):
+                    seconds, size = cpu_per_call(encoder_class, level, body, max(args.repeat // (10 if level == high else 1), 1))
+                    marker = "*" if level == levels[encoding] else " "
+                    print(f"{'':<10} {encoding:<8} {level:>4}{marker} {size:>9} {len(body) / size:>6.2f} {seconds * 1e6:>8.0f}")
+        print("* the configured level")
+
+        print(f"\n{'end to end':<10} {'encoding':<8} {'req/s':>9} {'bytes/response':>15}")
+        for encoding in ["identity", *ENCODERS]:
+            sent, start = 0, time.perf_counter()
+            for _ in range(args.repeat):
+                for url in urls.values():
+                    response = client.get(url, headers={"Accept-Encoding": encoding})
+                    sent += int(response.headers.get("content-length", len(response.content)))
+            elapsed = time.perf_counter() - start
+            requests = args.repeat * len(urls)
+            print(f"{'':<10} {encoding:<8} {requests / elapsed:>9.0f} {sent / requests:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Bandwidth of repeated document downloads and time to first byte of a mid-file seek.
+
+Serves the app with uvicorn on a local port and fetches one large document:
+
+* repeated downloads, unconditional versus revalidated with If-None-Match
+  (the client already holds the ETag from the first download);
+* time to first byte of 64 KiB in the middle of the file, with a Range
+  request versus a client that has to stream from the start;
+* full-download throughput for a few read chunk sizes.
+
+    python benchmarks/bench_download.py --size-mb 64 --repeat 20
+"""
+import argparse
+import hashlib
+import os
+import socket
+import threading
+import time
+
+from common import setup_environment
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def ttfb(client, url: str, headers: dict, offset: int) -> float:
+    """Seconds until the byte at offset of the file has arrived"""
+    start = time.perf_counter()
+    with client.stream("GET", url, headers=headers) as response:
+        received = 0
+        for chunk in response.iter_bytes():
+            received += len(chunk)
+            if received > offset:
+                return time.perf_counter() - start
+    raise RuntimeError("response ended before the offset")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_environment()
+    import httpx
+    from app.config import Settings
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.blob import BlobModels
+    from app.models.document import DocumentModels, IngestionStatus
+    from app.models.project import ProjectModels
+    from app.models.user import UserModels, UserRole
+    from app.services.blob_store import blob_store
+
+    size = args.size_mb * 1024 * 1024
+    data = b"%PDF-1.4\n" + os.urandom(size - 9)
+    key = hashlib.sha256(data).hexdigest()
+    os.makedirs(os.path.dirname(blob_store.path(key)), exist_ok=True)
+    with open(blob_store.path(key), "wb") as f:
+        f.write(data)
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add(UserModels(id=1, email="bench@example.com", username="bench", hashed_password="x", role=UserRole.SUPERADMIN))
+        db.add(ProjectModels(id=1, owner_id=1, name="bench"))
+        db.add(BlobModels(sha256=key, size=size, refcount=1))
+        db.flush()
+        db.add(DocumentModels(
+            id=1, project_id=1, filename="large.pdf", file_url=key,
+            sha256=key, size=size, ingestion_status=IngestionStatus.DONE,
+        ))
+        db.commit()
+    del data
+
+    port = free_port()
+    serve(app, port)
+    url = "/projects/1/documents/1/download"
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", cookies={"token_cookie": create_access_token({"sub": "bench"})}, timeout=60)
+    etag = client.get(url).headers["etag"]
+
+    print(f"{'repeated download':<28} {'seconds':>8} {'MB sent':>9}")
+    for name, headers in (("unconditional", {}), ("If-None-Match", {"If-None-Match": etag})):
+        sent = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            response = client.get(url, headers=headers)
+            sent += len(response.content)
+        print(f"{name:<28} {time.perf_counter() - start:>8.3f} {sent / 2**20:>9.1f}")
+
+    middle = size // 2
+    print(f"\n{'mid-file seek':<28} {'ttfb ms':>8}")
+    for name, headers, offset in (
+        ("stream from start", {}, middle),
+        ("Range", {"Range": f"bytes={middle}-{middle + 65535}"}, 0),
+    ):
+        times = sorted(ttfb(client, url, headers, offset) for _ in range(args.repeat))
+        print(f"{name:<28} {times[len(times) // 2] * 1000:>8.1f}")
+
+    config = Settings.get_settings()
+    print(f"\n{'read chunk size':<28} {'MB/s':>8}")
+    for chunk_size in (64 * 1024, 256 * 1024, 1024 * 1024):
+        config.download.chunk_size = chunk_size
+        start = time.perf_counter()
+        for _ in range(max(args.repeat // 4, 1)):
+            client.get(url).raise_for_status()
+        elapsed = time.perf_counter() - start
+        print(f"{chunk_size // 1024:>6} KiB{'':<18} {max(args.repeat // 4, 1) * size / 2**20 / elapsed:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
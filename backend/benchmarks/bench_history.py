@@ -0,0 +1,73 @@
+"""Memory and throughput of the conversation history stores.
+
+Simulates many concurrent conversations appending turns and reports the
+traced heap size as the number of distinct conversations grows, plus the
+hit/eviction counters, for the bounded in-memory store and for an unbounded
+dict (the previous behaviour).
+
+    python benchmarks/bench_history.py --conversations 1000 10000 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+from common import setup_environment
+
+
+class UnboundedStore:
+    def __init__(self):
+        self.data = {}
+
+    def append(self, conversation_id, *messages):
+        self.data.setdefault(conversation_id, []).extend(messages)
+
+    def get(self, conversation_id, limit=None):
+        return self.data.get(conversation_id, [])
+
+    def stats(self):
+        return {"conversations": len(self.data)}
+
+
+def run(store, conversations: int, turns: int):
+    from app.schemas.chat import Message
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for turn in range(turns):
+        for i in range(conversations):
+            conversation_id = f"conv-{i}"
+            store.get(conversation_id)
+            # fresh strings per turn, as real requests would produce
+            question = Message(content=f"[{i}:{turn}] " + "Apa isi dokumen proyek ini? " * 4, is_user=True)
+            answer = Message(content=f"[{i}:{turn}] " + "Dokumen ini membahas rencana proyek dan jadwalnya. " * 8, is_user=False)
+            store.append(conversation_id, question, answer)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / (1024 * 1024), (conversations * turns) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-conversations", type=int, default=5000)
+    parser.add_argument("--max-messages", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_environment()
+    from app.services.history import MemoryHistoryStore
+
+    print(f"{'store':<10} {'conversations':>13} {'heap MiB':>9} {'turns/s':>10}  counters")
+    for conversations in args.conversations:
+        for name in ("unbounded", "memory"):
+            if name == "unbounded":
+                store = UnboundedStore()
+            else:
+                store = MemoryHistoryStore(args.max_conversations, args.max_messages, ttl_seconds=3600)
+            heap, rate = run(store, conversations, args.turns)
+            print(f"{name:<10} {conversations:>13} {heap:>9.1f} {rate:>10.0f}  {store.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Pages per second of PDF text extraction at different process pool sizes.
+
+Generates a corpus of synthetic PDFs, then extracts them with the same worker
+function and pool settings the ingestion service uses.
+
+    python benchmarks/bench_ingestion.py --documents 64 --pages 40 --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.extraction import extract_pdf_pages
+
+PARAGRAPH = (
+    "Laporan ini menjelaskan kemajuan proyek pembangunan, anggaran yang telah "
+    "digunakan, serta risiko yang perlu ditangani pada kuartal berikutnya. "
+)
+
+
+def make_corpus(directory: str, documents: int, pages: int) -> list:
+    import fitz
+
+    paths = []
+    for i in range(documents):
+        pdf = fitz.open()
+        for page_number in range(pages):
+            page = pdf.new_page()
+            page.insert_textbox(page.rect + (36, 36, -36, -36), f"Dokumen {i} halaman {page_number}. " + PARAGRAPH * 12)
+        path = os.path.join(directory, f"doc-{i}.pdf")
+        pdf.save(path)
+        pdf.close()
+        paths.append(path)
+    return paths
+
+
+def run(paths: list, workers: int) -> tuple:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # warm up the workers so process start-up is not measured
+        list(pool.map(extract_pdf_pages, paths[:workers]))
+        start = time.perf_counter()
+        pages = sum(len(result) for result in pool.map(extract_pdf_pages, paths))
+        elapsed = time.perf_counter() - start
+    return pages, elapsed
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=64)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpus}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_corpus(directory, args.documents, args.pages)
+        print(f"{'workers':>7} {'pages':>7} {'seconds':>8} {'pages/s':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            pages, elapsed = run(paths, workers)
+            rate = pages / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>7} {pages:>7} {elapsed:>8.2f} {rate:>9.0f} {rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
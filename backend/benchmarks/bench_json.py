@@ -0,0 +1,132 @@
+"""Response serialization per endpoint: dict + json.dumps() versus FastJSONRoute.
+
+For the response model of each list and detail endpoint, times what a plain
+APIRoute does with the endpoint's ORM rows (validate, dump to a dict of
+JSON types, json.dumps() in JSONResponse) against FastJSONField (validate,
+TypeAdapter.dump_json) and checks both produce the same JSON. Then measures
+requests per second through the app in the mode selected by --fast-json.
+
+    python benchmarks/bench_json.py --rows 500 --repeat 200
+    python benchmarks/bench_json.py --rows 500 --repeat 200 --fast-json
+"""
+import argparse
+import json
+import time
+
+from common import setup_environment
+
+
+def per_call(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--fast-json", action="store_true", help="serve the app with app.fast_json enabled")
+    args = parser.parse_args()
+
+    setup_environment({
+        "app": {"fast_json": args.fast_json},
+        "ingestion": {"enabled": False},
+        "storage_gc": {"enabled": False},
+        "compression": {"enabled": False},
+    })
+    import dataclasses
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+    from fastapi._compat import ModelField
+    from sqlalchemy import insert
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.responses import FastJSONField, FastJSONResponse
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.document import DocumentModels, IngestionStatus
+    from app.models.project import ProjectAccessLevel, ProjectAccessModels, ProjectModels
+    from app.models.user import UserModels, UserRole
+    from app.routers import document, project, user
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.execute(insert(UserModels), [
+            {"id": i, "email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x",
+             "role": UserRole.SUPERADMIN if i == 1 else UserRole.USER}
+            for i in range(1, args.rows + 1)
+        ])
+        db.execute(insert(ProjectModels), [
+            {"id": i, "owner_id": 1 + i % args.rows, "name": f"project-{i}", "description": f"Course material for group {i % 37}"}
+            for i in range(1, args.rows + 1)
+        ])
+        db.execute(insert(DocumentModels), [
+            {"project_id": 1, "filename": f"lecture-{i:04d}.pdf", "file_url": f"{i:064x}", "sha256": f"{i:064x}",
+             "size": 100_000 + i * 37, "ingestion_status": IngestionStatus.DONE, "page_count": 10 + i % 50}
+            for i in range(args.rows)
+        ])
+        db.execute(insert(ProjectAccessModels), [
+            {"project_id": 1, "user_id": i, "access_level": list(ProjectAccessLevel)[i % 3]}
+            for i in range(2, args.rows + 1)
+        ])
+        db.commit()
+
+    # path, method -> ORM rows the endpoint returns
+    with SessionLocal() as db:
+        endpoints = {
+            ("/users/", "GET"): db.query(UserModels).all(),
+            ("/users/user/{user_id}", "GET"): db.get(UserModels, 1),
+            ("/projects/", "GET"): db.query(ProjectModels).all(),
+            ("/projects/{project_id}", "GET"): db.get(ProjectModels, 1),
+            ("/projects/{project_id}/documents/", "GET"): db.query(DocumentModels).all(),
+            ("/projects/{project_id}/documents/{document_id}", "GET"): db.get(DocumentModels, 1),
+            ("/projects/{project_id}/access", "GET"): db.query(ProjectAccessModels).all(),
+        }
+        routes = {
+            (route.path, method): route
+            for router in (user.router, project.router, document.router)
+            for route in router.routes if isinstance(route, APIRoute) for method in route.methods
+        }
+
+        print(f"{'endpoint':<52} {'rows':>5} {'dict+dumps us':>14} {'dump_json us':>13} {'speedup':>8}")
+        for (path, method), content in endpoints.items():
+            field = routes[(path, method)].response_field
+            plain = ModelField(**{f.name: getattr(field, f.name) for f in dataclasses.fields(field)})
+            fast = FastJSONField.from_field(field)
+
+            def default_path():
+                value, _ = plain.validate(content, {}, loc=("response",))
+                return JSONResponse(plain.serialize(value, mode="json")).body
+
+            def fast_path():
+                value, _ = fast.validate(content, {}, loc=("response",))
+                return FastJSONResponse(fast.serialize(value, mode="json")).body
+
+            assert json.loads(default_path()) == json.loads(fast_path()), path
+            default_seconds = per_call(default_path, args.repeat)
+            fast_seconds = per_call(fast_path, args.repeat)
+            rows = len(content) if isinstance(content, list) else 1
+            print(f"{method + ' ' + path:<52} {rows:>5} {default_seconds * 1e6:>14.0f} {fast_seconds * 1e6:>13.0f} "
+                  f"{default_seconds / fast_seconds:>7.2f}x")
+
+    mode = "FastJSONRoute" if args.fast_json else "APIRoute"
+    print(f"\nend to end, {mode}")
+    urls = {
+        "/users/": f"/users/?limit={args.rows}",
+        "/projects/": f"/projects/?limit={args.rows}",
+        "/projects/{project_id}/documents/": f"/projects/1/documents/?limit={args.rows}",
+        "/projects/{project_id}/access": "/projects/1/access",
+    }
+    with TestClient(app, cookies={"token_cookie": create_access_token({"sub": "user1"})}) as client:
+        for name, url in urls.items():
+            client.get(url).raise_for_status()
+            start = time.perf_counter()
+            for _ in range(args.repeat // 4 or 1):
+                client.get(url)
+            print(f"GET {name:<36} {(args.repeat // 4 or 1) / (time.perf_counter() - start):>8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
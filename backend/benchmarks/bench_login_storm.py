@@ -0,0 +1,105 @@
+"""/health latency while a burst of logins is being verified.
+
+Runs the ASGI app in-process, fires --logins concurrent POSTs to
+/login/api/access-token and meanwhile probes /health every few
+milliseconds. ``inline`` reproduces the old behaviour (bcrypt on the event
+loop); ``executor`` is the current implementation.
+
+    python benchmarks/bench_login_storm.py --logins 50 --rounds 12
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import setup_environment
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def storm(app, logins: int, probe_interval: float) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        done = asyncio.Event()
+        latencies = []
+
+        async def probe():
+            due = time.perf_counter()
+            while not done.is_set():
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # measured from when the probe was due, so time the event loop
+                # was blocked before it could even send counts as latency
+                (await client.get("/health")).raise_for_status()
+                now = time.perf_counter()
+                latencies.append((now - due) * 1000)
+                due = max(due + probe_interval, now)
+
+        async def login():
+            response = await client.post("/login/api/access-token", data={"username": "bench", "password": "secret"})
+            response.raise_for_status()
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    return {
+        "logins_per_s": logins / elapsed,
+        "probes": len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost")
+    parser.add_argument("--workers", type=int, default=2, help="hash executor threads")
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    parser.add_argument("--modes", nargs="+", default=["inline", "executor"])
+    args = parser.parse_args()
+
+    setup_environment({"security": {"bcrypt_rounds": args.rounds, "hash_workers": args.workers}})
+    from app.core import security
+    from app.core.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.models.user import UserModels, UserRole
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add(UserModels(
+            email="bench@example.com",
+            username="bench",
+            hashed_password=security.get_password_hash("secret"),
+            role=UserRole.USER,
+        ))
+        db.commit()
+
+    executor_verify = security.verify_password_async
+
+    async def inline_verify(plain_password, hashed_password):
+        return security.pwd_context.verify_and_update(plain_password, hashed_password)
+
+    print(f"{'mode':<10} {'logins/s':>9} {'probes':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in args.modes:
+        security.verify_password_async = inline_verify if mode == "inline" else executor_verify
+        result = asyncio.run(storm(app, args.logins, args.probe_interval))
+        print(
+            f"{mode:<10} {result['logins_per_s']:>9.1f} {result['probes']:>7} "
+            f"{result['p50']:>8.1f} {result['p99']:>8.1f} {result['max']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Overhead of the built-in metrics on every request.
+
+Calls the ASGI app directly (no sockets, so the instrumentation is not
+hidden behind network noise) with GET /health, with and without the
+metrics middleware, and times SELECT 1 through a pooled connection with
+and without the query hooks. Fails if the middleware plus one query's
+hooks add more than --budget-us microseconds per request, then times a
+scrape of /metrics with the series the run produced.
+
+    python benchmarks/bench_metrics.py --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+from common import setup_environment
+
+
+async def call(app, path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def per_request_us(app, path: str, requests: int) -> float:
+    for _ in range(min(requests, 500)):
+        await call(app, path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def per_query_us(engine, queries: int) -> float:
+    from sqlalchemy import text
+    with engine.connect() as connection:
+        for _ in range(min(queries, 500)):
+            connection.execute(text("SELECT 1"))
+        start = time.perf_counter()
+        for _ in range(queries):
+            connection.execute(text("SELECT 1"))
+        return (time.perf_counter() - start) / queries * 1e6
+
+
+def best(measure, rounds: int) -> float:
+    return min(measure() for _ in range(rounds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5, help="best of, to leave scheduler noise out")
+    parser.add_argument("--budget-us", type=float, default=50.0)
+    args = parser.parse_args()
+
+    setup_environment({"ingestion": {"enabled": False}, "storage_gc": {"enabled": False}, "compression": {"enabled": False}})
+    from sqlalchemy import create_engine
+    from app.config import Settings
+    from app.core.database import engine
+    from app.core.metrics import registry
+    from app.main import create_app
+
+    config = Settings.get_settings()
+    instrumented = create_app()
+    config.metrics.enabled = False
+    plain = create_app()
+    config.metrics.enabled = True
+    assert asyncio.run(call(instrumented, "/health")) == 200
+
+    with_metrics = best(lambda: asyncio.run(per_request_us(instrumented, "/health", args.requests)), args.rounds)
+    without = best(lambda: asyncio.run(per_request_us(plain, "/health", args.requests)), args.rounds)
+    middleware = with_metrics - without
+    print(f"GET /health      {without:>8.1f} us without metrics, {with_metrics:>8.1f} us with  (+{middleware:.1f} us)")
+
+    hooked = engine
+    bare = create_engine(config.database.url)
+    with_hooks = best(lambda: per_query_us(hooked, args.requests), args.rounds)
+    without_hooks = best(lambda: per_query_us(bare, args.requests), args.rounds)
+    hooks = with_hooks - without_hooks
+    print(f"SELECT 1         {without_hooks:>8.1f} us without hooks,   {with_hooks:>8.1f} us with  (+{hooks:.1f} us)")
+
+    overhead = middleware + hooks
+    print(f"overhead         {overhead:>8.1f} us per request with one query (budget {args.budget_us:.0f} us)")
+
+    start = time.perf_counter()
+    body = registry.render()
+    print(f"render /metrics  {(time.perf_counter() - start) * 1000:>8.2f} ms for {body.count(chr(10))} lines")
+    assert overhead < args.budget_us, f"metrics add {overhead:.1f} us per request, over the {args.budget_us:.0f} us budget"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Latency of deep pages: OFFSET versus keyset cursors.
+
+Seeds one project with --documents rows and times fetching page 1 and
+page --page of the document listing through DocumentRepo, in offset mode
+(skip/limit) and in cursor mode. The cursor for the deep page is built from
+the row just before it, as a client paging through would have received.
+
+    python benchmarks/bench_pagination.py --documents 200000 --page 1000 --limit 50
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from common import setup_environment
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=200000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    if args.page * args.limit > args.documents:
+        parser.error("--page * --limit exceeds --documents")
+
+    setup_environment()
+    from sqlalchemy import insert
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.pagination import encode_cursor
+    from app.models.document import DocumentModels, IngestionStatus
+    from app.models.project import ProjectModels
+    from app.repositories.document import DocumentRepo
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        project = ProjectModels(owner_id=1, name="bench")
+        db.add(project)
+        db.commit()
+        project_id = project.id
+        start = datetime(2025, 1, 1)
+        for offset in range(0, args.documents, 10000):
+            db.execute(insert(DocumentModels), [
+                {
+                    "project_id": project_id,
+                    "filename": f"doc-{i}.pdf",
+                    "file_url": f"bench/doc-{i}.pdf",
+                    "ingestion_status": IngestionStatus.DONE,
+                    # a few uploads share a second, which must not matter to paging
+                    "uploaded_at": start + timedelta(seconds=i // 3),
+                }
+                for i in range(offset, min(offset + 10000, args.documents))
+            ])
+        db.commit()
+
+    with SessionLocal() as db:
+        repo = DocumentRepo(db)
+        deep_skip = (args.page - 1) * args.limit
+        before = db.query(DocumentModels).filter(DocumentModels.project_id == project_id).order_by(
+            DocumentModels.id
+        ).offset(deep_skip - 1).first()
+        deep_cursor = encode_cursor(before.id)
+
+        # offset page 1 is skip=0, which the routes serve in cursor mode as well
+        cases = [
+            ("offset", 1, lambda: repo.get_documents_in_project(project_id, 0, args.limit)),
+            ("offset", args.page, lambda: repo.get_documents_in_project(project_id, deep_skip, args.limit)),
+            ("cursor", 1, lambda: repo.get_documents_page(project_id, None, args.limit)),
+            ("cursor", args.page, lambda: repo.get_documents_page(project_id, deep_cursor, args.limit)),
+        ]
+        assert [d.id for d in cases[1][2]()] == [d.id for d in cases[3][2]().items], "modes disagree on the deep page"
+
+        print(f"{'mode':<8} {'page':>6} {'median ms':>10}")
+        for mode, page, fn in cases:
+            fn()
+            db.expunge_all()
+            print(f"{mode:<8} {page:>6} {timed(fn, args.repeat):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
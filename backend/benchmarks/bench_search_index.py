@@ -0,0 +1,71 @@
+"""Build time, size and query latency of the BM25 index as the corpus grows.
+
+Chunks are generated from a Zipf-distributed Indonesian vocabulary with
+common affixes, so stemming and posting-list lengths look like real text.
+
+    python benchmarks/bench_search_index.py --chunks 10000 50000 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from common import setup_environment
+
+ROOTS = (
+    "bangun jembatan jalan proyek anggaran biaya jadwal laporan risiko kontrak "
+    "kerja tenaga material beton baja desain gambar survei tanah air listrik "
+    "izin lokasi kota desa warga rapat hasil keputusan tahap selesai mulai "
+    "periksa uji mutu standar aman sehat lingkungan dana bayar tagih pajak "
+    "pasok kirim gudang alat berat sewa beli jual harga nilai tambah kurang"
+).split()
+PREFIXES = ["", "", "", "di", "me", "pe", "ber", "ter", "ke", "per"]
+SUFFIXES = ["", "", "", "an", "kan", "i", "nya", "lah"]
+STOP = ["yang", "dan", "di", "ke", "dari", "untuk", "dengan", "pada", "ini", "itu"]
+
+
+def make_word(rng):
+    root = ROOTS[min(int(rng.paretovariate(1.2)) - 1, len(ROOTS) - 1)]
+    return rng.choice(PREFIXES) + root + rng.choice(SUFFIXES)
+
+
+def make_chunk(rng, words=200):
+    return " ".join(rng.choice(STOP) if rng.random() < 0.3 else make_word(rng) for _ in range(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--chunks-per-document", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_environment()
+    from app.services.search_index import InvertedIndex
+
+    rng = random.Random(0)
+    queries = [" ".join(make_word(rng) for _ in range(rng.randint(2, 5))) for _ in range(args.queries)]
+    print(f"{'chunks':>8} {'build s':>8} {'chunks/s':>9} {'size MiB':>9} {'terms':>7} {'p50 ms':>7} {'p95 ms':>7}")
+    for total in args.chunks:
+        texts = [make_chunk(rng) for _ in range(total)]
+        index = InvertedIndex()
+        start = time.perf_counter()
+        for document_id, offset in enumerate(range(0, total, args.chunks_per_document)):
+            batch = texts[offset:offset + args.chunks_per_document]
+            index.add_document(document_id, [(offset + i, text) for i, text in enumerate(batch)])
+        build = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, 10)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+
+        stats = index.stats()
+        print(f"{total:>8} {build:>8.2f} {total / build:>9.0f} {stats['memory_bytes'] / 2**20:>9.1f} {stats['terms']:>7} "
+              f"{statistics.median(latencies):>7.2f} {latencies[int(0.95 * len(latencies))]:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
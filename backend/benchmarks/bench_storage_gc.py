@@ -0,0 +1,121 @@
+"""Latency of deleting a large project and throughput of the storage collector.
+
+Creates a project with --files small documents of distinct content, then:
+
+* times DELETE /projects/{id}, which only tombstones the project;
+* times the collector purging it, at the configured file delete rate and
+  unthrottled, the work the request used to do inline;
+* plants orphans in both directions and times full and incremental
+  reconcile passes, checking that each planted orphan is reported.
+
+    python benchmarks/bench_storage_gc.py --files 5000 --rate 2000
+"""
+import argparse
+import os
+import time
+
+from common import setup_environment
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=2000, help="max_files_per_second of the throttled purge")
+    args = parser.parse_args()
+
+    setup_environment({
+        "ingestion": {"enabled": False},
+        "storage_gc": {"enabled": False, "grace_seconds": 0, "orphan_age_seconds": 0, "batch_size": 500},
+    })
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from app.config import Settings
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.blob import BlobModels
+    from app.models.document import DocumentModels
+    from app.models.project import ProjectModels
+    from app.models.user import UserModels, UserRole
+    from app.services.blob_store import blob_store
+    from app.services.storage_gc import PREFIXES, storage_collector
+
+    config = Settings.get_settings()
+    Base.metadata.create_all(engine)
+
+    def seed(project_id: int):
+        keys = []
+        for i in range(args.files):
+            data = f"project {project_id} document {i}".encode()
+            key = os.urandom(32).hex()
+            os.makedirs(os.path.dirname(blob_store.path(key)), exist_ok=True)
+            with open(blob_store.path(key), "wb") as f:
+                f.write(data)
+            keys.append((key, len(data)))
+        with SessionLocal() as db:
+            db.add(ProjectModels(id=project_id, owner_id=1, name=f"bench-{project_id}"))
+            db.flush()
+            db.execute(insert(BlobModels), [{"sha256": key, "size": size, "refcount": 1} for key, size in keys])
+            db.execute(insert(DocumentModels), [
+                {"project_id": project_id, "filename": f"doc-{i}.pdf", "file_url": key, "sha256": key, "size": size}
+                for i, (key, size) in enumerate(keys)
+            ])
+            db.commit()
+
+    def purge(project_id: int, rate: float) -> float:
+        seed(project_id)
+        client.delete(f"/projects/{project_id}").raise_for_status()
+        time.sleep(1)  # tombstones are stamped with a one second resolution on SQLite
+        config.storage_gc.max_files_per_second = rate
+        start = time.perf_counter()
+        report = storage_collector.purge()
+        elapsed = time.perf_counter() - start
+        assert report["files"] == args.files, report
+        return elapsed
+
+    with SessionLocal() as db:
+        db.add(UserModels(id=1, email="bench@example.com", username="bench", hashed_password="x", role=UserRole.SUPERADMIN))
+        db.commit()
+
+    with TestClient(app, cookies={"token_cookie": create_access_token({"sub": "bench"})}) as client:
+        seed(1)
+        start = time.perf_counter()
+        client.delete("/projects/1").raise_for_status()
+        print(f"DELETE /projects/1 ({args.files} documents)   {(time.perf_counter() - start) * 1000:>8.1f} ms")
+        assert client.get("/projects/1").status_code == 404
+
+        time.sleep(1)
+        config.storage_gc.max_files_per_second = 0
+        start = time.perf_counter()
+        storage_collector.purge()
+        print(f"purge, unthrottled                    {time.perf_counter() - start:>8.2f} s")
+        print(f"purge, {args.rate:.0f} files/s{'':<19} {purge(2, args.rate):>8.2f} s")
+
+        seed(3)
+        orphan = os.urandom(32).hex()
+        os.makedirs(os.path.dirname(blob_store.path(orphan)), exist_ok=True)
+        open(blob_store.path(orphan), "wb").close()
+        with SessionLocal() as db:
+            missing = db.query(DocumentModels.file_url).filter(DocumentModels.project_id == 3).first()[0]
+        os.remove(blob_store.path(missing))
+
+        start = time.perf_counter()
+        report = storage_collector.reconcile(PREFIXES)
+        print(f"reconcile, all 256 prefixes           {time.perf_counter() - start:>8.2f} s  "
+              f"({report['files_checked']} files, {report['blobs_checked']} blobs)")
+        assert report["findings"]["orphan_files"] == [orphan], report["findings"]
+        assert report["findings"]["missing_files"] == [missing], report["findings"]
+
+        start = time.perf_counter()
+        passes = 0
+        while True:
+            report = storage_collector.reconcile()
+            passes += 1
+            if report["prefixes"].endswith("ff"):
+                break
+        print(f"reconcile, {config.storage_gc.reconcile_prefixes} prefixes per pass        "
+              f"{(time.perf_counter() - start) / passes * 1000:>8.1f} ms per pass, {passes} passes per sweep")
+
+
+if __name__ == "__main__":
+    main()
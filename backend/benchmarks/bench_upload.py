@@ -0,0 +1,93 @@
+"""Peak RSS of DocumentRepo.save_document as the uploaded file grows.
+
+Each measurement runs in a fresh interpreter so ``ru_maxrss`` reflects only
+that upload. ``buffered`` reproduces the old ``file.file.read()`` behaviour for
+comparison; ``streaming`` is the current implementation.
+
+    python benchmarks/bench_upload.py --sizes 8 64 256 512
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import setup_environment
+
+
+def _rss_mib() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _make_input(path: str, size_mib: int):
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        for _ in range(size_mib):
+            f.write(block)
+
+
+def run_child(mode: str, size_mib: int):
+    setup_environment({"upload": {"max_file_size": (size_mib + 1) * 1024 * 1024}})
+
+    from fastapi import UploadFile
+    from app.repositories.document import DocumentRepo
+
+    source_dir = tempfile.mkdtemp()
+    target_dir = tempfile.mkdtemp()
+    source = os.path.join(source_dir, "input.pdf")
+    _make_input(source, size_mib)
+
+    repo = DocumentRepo(db=None)
+    baseline = _rss_mib()
+    start = time.perf_counter()
+    with open(source, "rb") as f:
+        upload = UploadFile(file=f, filename="input.pdf")
+        if mode == "buffered":
+            with open(os.path.join(target_dir, "input.pdf"), "wb") as buffer:
+                buffer.write(upload.file.read())
+        else:
+            repo.save_document(upload)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": mode,
+        "size_mib": size_mib,
+        "baseline_rss_mib": round(baseline, 1),
+        "peak_rss_mib": round(_rss_mib(), 1),
+        "growth_mib": round(_rss_mib() - baseline, 1),
+        "seconds": round(elapsed, 3),
+        "mib_per_s": round(size_mib / elapsed, 1) if elapsed else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 64, 256, 512], help="file sizes in MiB")
+    parser.add_argument("--modes", nargs="+", default=["buffered", "streaming"])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.mode, args.size)
+        return
+
+    print(f"{'mode':<10} {'size MiB':>9} {'peak RSS':>9} {'growth':>8} {'MiB/s':>8}")
+    for mode in args.modes:
+        for size in args.sizes:
+            output = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), "--child", "--mode", mode, "--size", str(size)],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            print(f"{mode:<10} {size:>9} {result['peak_rss_mib']:>9} {result['growth_mib']:>8} {result['mib_per_s']:>8}")
+
+
+if __name__ == "__main__":
+    main()
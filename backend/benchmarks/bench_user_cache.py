@@ -0,0 +1,66 @@
+"""Requests per second of an authenticated endpoint with and without the user cache.
+
+Drives GET /users/me in-process through the ASGI app with a number of
+concurrent clients, once with the user cache disabled (a users query per
+request, the previous behaviour) and once with it enabled, where a hit is
+an in-process LRU lookup with no query. With user_cache.redis_url set a
+hit also costs one Redis GET of the user's version, not measured here.
+
+    python benchmarks/bench_user_cache.py --requests 5000 --concurrency 8
+"""
+import argparse
+import asyncio
+import time
+
+from common import setup_environment
+
+
+async def drive(app, token: str, requests: int, concurrency: int) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    remaining = iter(range(requests))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies={"token_cookie": token}) as client:
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/users/me")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    setup_environment()
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.user import UserModels, UserRole
+    from app.services.user_cache import user_cache
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add(UserModels(email="bench@example.com", username="bench", hashed_password="x", role=UserRole.USER))
+        db.commit()
+    token = create_access_token({"sub": "bench"})
+
+    # warm up imports, the connection pool and route compilation
+    asyncio.run(drive(app, token, 200, args.concurrency))
+
+    print(f"{'cache':<10} {'req/s':>10}")
+    for enabled in (False, True):
+        user_cache.enabled = enabled
+        user_cache.clear()
+        rps = asyncio.run(drive(app, token, args.requests, args.concurrency))
+        print(f"{'enabled' if enabled else 'disabled':<10} {rps:>10.0f}")
+    print(user_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Open time and top-k query latency of the memory-mapped vector index.
+
+Builds an index of random unit vectors, then measures how long it takes to
+open it from disk and the latency of top-k searches, with and without
+embedding the query text.
+
+    python benchmarks/bench_vector_index.py --chunks 10000 100000 --dimension 256
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+from common import setup_environment
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_environment({"retrieval": {"dimension": args.dimension}})
+    import numpy as np
+    from app.services.embedding import HashingEmbedder
+    from app.services.vector_index import VectorIndex
+
+    embedder = HashingEmbedder(args.dimension)
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>8} {'build s':>8} {'open ms':>8} {'p50 ms':>7} {'p99 ms':>7} {'p50+embed ms':>13}")
+    for chunks in args.chunks:
+        directory = tempfile.mkdtemp()
+        index = VectorIndex(directory, args.dimension)
+        start = time.perf_counter()
+        batch = 5_000
+        for offset in range(0, chunks, batch):
+            n = min(batch, chunks - offset)
+            vectors = rng.standard_normal((n, args.dimension), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            index.add(offset // batch, list(range(offset, offset + n)), vectors)
+        build = time.perf_counter() - start
+        index.close()
+
+        start = time.perf_counter()
+        index = VectorIndex(directory, args.dimension)
+        opened = (time.perf_counter() - start) * 1000
+
+        queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+        index.search(queries[0], args.k)  # fault the pages in once
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        embedded = []
+        for i in range(args.queries):
+            start = time.perf_counter()
+            index.search(embedder.embed_one(f"berapa anggaran proyek jembatan tahap {i}"), args.k)
+            embedded.append((time.perf_counter() - start) * 1000)
+
+        print(f"{chunks:>8} {build:>8.2f} {opened:>8.2f} {statistics.median(latencies):>7.2f} "
+              f"{percentile(latencies, 0.99):>7.2f} {statistics.median(embedded):>13.2f}")
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
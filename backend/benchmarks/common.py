@@ -0,0 +1,74 @@
+"""Shared helpers for the benchmark scripts.
+
+Every benchmark runs against a throwaway working directory with its own
+config.yaml, SQLite database and project storage, so it never touches a real
+deployment. Call ``setup_environment()`` before importing anything from ``app``.
+"""
+import os
+import sys
+import tempfile
+
+import yaml
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_config(workdir: str) -> dict:
+    return {
+        "app": {
+            "env": "bench",
+            "base_url": "http://127.0.0.1:8000/",
+            "base_path": workdir,
+            "host": "127.0.0.1",
+            "port": 8000,
+            "cors_origins": ["*"],
+            "cors_methods": ["*"],
+            "cors_headers": ["*"],
+            "components": [],
+            "debug": False,
+            "api_prefix": "/api",
+            "docs_url": "/docs",
+            "timeout": 30,
+        },
+        "logging": {
+            "level": "WARNING",
+            "filename": os.path.join(workdir, "bench.log"),
+            "format": "%(asctime)s %(levelname)s %(name)s %(message)s",
+        },
+        "security": {
+            "jwt_secret": "bench-secret",
+            "algorithm": "HS256",
+            "access_token_expire_minutes": 60,
+        },
+        "database": {
+            "url": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "ssl_cert_file": "",
+            "ssl_key_file": "",
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+        },
+        "gpt": {
+            "url": "http://127.0.0.1:9999/v1",
+            "api_key": "bench",
+            "model": "fake-model",
+        },
+        "project": {"path": os.path.join(workdir, "project_storage")},
+    }
+
+
+def setup_environment(overrides: dict = None, workdir: str = None) -> str:
+    """Create a temp workdir with config.yaml and chdir into it."""
+    workdir = workdir or tempfile.mkdtemp(prefix="gpt-dtskul-bench-")
+    config = default_config(workdir)
+    for section, values in (overrides or {}).items():
+        config.setdefault(section, {}).update(values)
+
+    with open(os.path.join(workdir, "config.yaml"), "w") as f:
+        yaml.safe_dump(config, f)
+
+    os.makedirs(config["project"]["path"], exist_ok=True)
+    os.chdir(workdir)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return workdir
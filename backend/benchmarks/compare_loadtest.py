@@ -0,0 +1,88 @@
+"""Compares two loadtest.py result files route by route.
+
+Prints p50/p95/p99 latency and throughput of the baseline and the
+candidate with their relative change, and exits with status 1 when a
+route got slower at p95 or p99, or lost throughput, by more than
+--threshold (and by more than --min-ms, so sub-millisecond jitter on fast
+routes is not a regression), or started failing requests it served
+before. Runs made with different arguments are compared with a warning.
+
+    python benchmarks/compare_loadtest.py base.json new.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+LATENCIES = ("p50_ms", "p95_ms", "p99_ms")
+# the latencies a regression is judged on; p50 is shown for context
+GATED = ("p95_ms", "p99_ms")
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare_route(before: dict, after: dict, threshold: float, min_ms: float) -> list:
+    problems = []
+    for key in GATED:
+        if key in before and key in after:
+            if change(before[key], after[key]) > threshold and after[key] - before[key] > min_ms:
+                problems.append(f"{key} {before[key]:.1f} -> {after[key]:.1f}")
+    if change(before["throughput_rps"], after["throughput_rps"]) < -threshold:
+        problems.append(f"throughput {before['throughput_rps']:.1f} -> {after['throughput_rps']:.1f} rps")
+    if after["errors"] > before["errors"] and after["errors"] > 0.01 * max(after["count"], 1):
+        problems.append(f"errors {before['errors']} -> {after['errors']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="smallest latency increase counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    ignored = {"output", "database_url", "seed"}
+    before_args = {k: v for k, v in baseline["meta"]["args"].items() if k not in ignored}
+    after_args = {k: v for k, v in candidate["meta"]["args"].items() if k not in ignored}
+    differing = sorted(k for k in {*before_args, *after_args} if before_args.get(k) != after_args.get(k))
+    if differing or baseline["meta"]["database"] != candidate["meta"]["database"]:
+        print(f"warning: the runs differ in {', '.join(differing + ['database'] * (baseline['meta']['database'] != candidate['meta']['database']))}")
+    print(f"baseline  {baseline['meta']['git_commit']} at {baseline['meta']['started_at']}")
+    print(f"candidate {candidate['meta']['git_commit']} at {candidate['meta']['started_at']}\n")
+
+    regressions = {}
+    routes = [*sorted({*baseline["routes"], *candidate["routes"]}), "total"]
+    print(f"{'route':<52} " + " ".join(f"{key[:3]:>22}" for key in LATENCIES) + f" {'rps':>22}")
+    for route in routes:
+        before = baseline["total"] if route == "total" else baseline["routes"].get(route)
+        after = candidate["total"] if route == "total" else candidate["routes"].get(route)
+        if before is None or after is None:
+            print(f"{route:<52} only in the {'candidate' if before is None else 'baseline'}")
+            continue
+        cells = []
+        for key in (*LATENCIES, "throughput_rps"):
+            if key in before and key in after:
+                cells.append(f"{before[key]:>8.1f} {after[key]:>8.1f} {change(before[key], after[key]):>+5.0%}")
+            else:
+                cells.append(f"{'-':>22}")
+        problems = compare_route(before, after, args.threshold, args.min_ms)
+        if problems:
+            regressions[route] = problems
+        print(f"{route:<52} " + " ".join(cells) + ("  REGRESSION" if problems else ""))
+
+    if regressions:
+        print()
+        for route, problems in regressions.items():
+            print(f"{route}: {'; '.join(problems)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Local stand-in for an OpenAI/Groq-compatible chat completions endpoint.
+
+Supports both the plain JSON response and ``stream: true`` (SSE chunks ending
+with ``data: [DONE]``), with configurable time to first token and token rate,
+so the chat endpoints can be exercised without a real model:
+
+    python benchmarks/fake_llm.py --port 9999 --latency 0.3 --tokens-per-second 40
+
+Point ``gpt.url`` at ``http://127.0.0.1:9999/v1``.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_ANSWER = (
+    "Ini adalah jawaban palsu dari server model lokal yang dipakai untuk "
+    "pengujian dan benchmark tanpa memanggil layanan model yang sebenarnya."
+)
+
+
+def create_fake_llm(latency: float = 0.1, tokens_per_second: float = 50.0, answer_tokens: int = 64) -> FastAPI:
+    app = FastAPI(title="fake-llm")
+    app.state.stats = {"requests": 0, "streams": 0, "cancelled": 0, "completed": 0}
+    words = DEFAULT_ANSWER.split()
+    tokens = [words[i % len(words)] + " " for i in range(answer_tokens)]
+
+    def _chunk(completion_id: str, model: str, content: str = None, finish_reason: str = None) -> str:
+        delta = {"content": content} if content is not None else {}
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        app.state.stats["requests"] += 1
+        usage = {"prompt_tokens": sum(len(m.get("content", "").split()) for m in body.get("messages", [])),
+                 "completion_tokens": len(tokens)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency + len(tokens) / tokens_per_second)
+            app.state.stats["completed"] += 1
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens).strip()}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        async def events():
+            app.state.stats["streams"] += 1
+            try:
+                await asyncio.sleep(latency)
+                yield _chunk(completion_id, model, content="")
+                for token in tokens:
+                    yield _chunk(completion_id, model, content=token)
+                    await asyncio.sleep(1 / tokens_per_second)
+                yield _chunk(completion_id, model, finish_reason="stop")
+                yield "data: [DONE]\n\n"
+                app.state.stats["completed"] += 1
+            except asyncio.CancelledError:
+                app.state.stats["cancelled"] += 1
+                raise
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--answer-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    app = create_fake_llm(args.latency, args.tokens_per_second, args.answer_tokens)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
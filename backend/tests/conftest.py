@@ -0,0 +1,78 @@
+"""Shared fixtures.
+
+The session runs in a throwaway working directory with its own config.yaml,
+SQLite database and project storage, written here before any test module
+imports app, since the settings are read once per process.
+"""
+import os
+import tempfile
+
+import pytest
+import yaml
+
+WORKDIR = tempfile.mkdtemp(prefix="gpt-dtskul-test-")
+CONFIG = {
+    "app": {
+        "env": "test",
+        "base_url": "http://testserver/",
+        "base_path": WORKDIR,
+        "host": "127.0.0.1",
+        "port": 8000,
+        "cors_origins": ["*"],
+        "cors_methods": ["*"],
+        "cors_headers": ["*"],
+        "components": [],
+        "debug": False,
+        "api_prefix": "/api",
+        "docs_url": "/docs",
+        "timeout": 30,
+    },
+    "logging": {
+        "level": "WARNING",
+        "filename": os.path.join(WORKDIR, "test.log"),
+        "format": "%(asctime)s %(levelname)s %(name)s %(message)s",
+    },
+    "security": {"jwt_secret": "test-secret", "algorithm": "HS256", "access_token_expire_minutes": 60},
+    "database": {
+        "url": f"sqlite:///{os.path.join(WORKDIR, 'test.db')}",
+        "ssl_cert_file": "",
+        "ssl_key_file": "",
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    },
+    "gpt": {"url": "http://127.0.0.1:9/v1", "api_key": "test", "model": "test-model"},
+    "project": {"path": os.path.join(WORKDIR, "project_storage")},
+    "ingestion": {"enabled": False},
+    "storage_gc": {"enabled": False},
+}
+
+with open(os.path.join(WORKDIR, "config.yaml"), "w") as f:
+    yaml.safe_dump(CONFIG, f)
+os.makedirs(CONFIG["project"]["path"], exist_ok=True)
+os.chdir(WORKDIR)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.core.database import engine
+    from app.migrations import run_migrations
+
+    run_migrations(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    """A session on a migrated database, emptied after the test"""
+    from app.core.database import Base, SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+        session.close()
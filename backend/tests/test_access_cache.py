@@ -0,0 +1,49 @@
+from app.core.cache import SharedVersions
+from app.models.project import ProjectAccessLevel, ProjectModels
+from app.models.user import UserModels, UserRole
+from app.repositories import project as project_repository
+from app.repositories.project import ProjectRepo
+from app.services.access_cache import AccessCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+
+
+def users(db, *names):
+    rows = [UserModels(username=name, email=f"{name}@example.com", hashed_password="x", role=UserRole.USER) for name in names]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def test_owners_hold_admin_without_a_grant(db):
+    owner, = users(db, "owner")
+    project = ProjectModels(owner_id=owner.id, name="p")
+    db.add(project)
+    db.commit()
+
+    assert AccessCache(True, 100, 60).levels(db, owner.id) == {project.id: ProjectAccessLevel.ADMIN}
+
+
+def test_a_revoke_by_another_worker_applies_at_once_with_shared_versions(db, monkeypatch):
+    owner, reader = users(db, "owner", "reader")
+    project = ProjectModels(owner_id=owner.id, name="p")
+    db.add(project)
+    db.commit()
+    redis = FakeRedis()
+    workers = [AccessCache(True, 100, 60, SharedVersions(redis, "access")) for _ in range(2)]
+
+    monkeypatch.setattr(project_repository, "access_cache", workers[1])
+    ProjectRepo(db).grant_access(project.id, reader.id, ProjectAccessLevel.READ)
+    assert workers[0].levels(db, reader.id) == {project.id: ProjectAccessLevel.READ}
+
+    ProjectRepo(db).revoke_access(project.id, reader.id)
+    assert workers[0].levels(db, reader.id) == {}
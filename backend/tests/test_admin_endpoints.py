@@ -0,0 +1,27 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.models.user import UserModels, UserRole
+
+ENDPOINTS = ["/projects/access/cache/stats", "/search/cache/stats", "/health/pool", "/health/admission", "/api/chat/history/stats"]
+
+
+@pytest.fixture
+def client(db):
+    from app.main import create_app
+
+    for username, role in (("user", UserRole.USER), ("root", UserRole.SUPERADMIN)):
+        db.add(UserModels(username=username, email=f"{username}@example.com", hashed_password="x", role=role, is_active=True))
+    db.commit()
+    with TestClient(create_app()) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_operational_endpoints_are_for_superadmins(client, path):
+    assert client.get(path).status_code == 401
+    client.cookies.set("token_cookie", create_access_token({"sub": "user"}))
+    assert client.get(path).status_code == 403
+    client.cookies.set("token_cookie", create_access_token({"sub": "root"}))
+    assert client.get(path).status_code == 200
@@ -0,0 +1,85 @@
+"""Startup budget, as in benchmarks/bench_cold_start.py but gating.
+
+Each measurement is a fresh interpreter. The import runs in a directory
+without config.yaml, since importing the app must not read the settings.
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from conftest import WORKDIR
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# loaded on first use, never by importing the app
+LAZY_MODULES = ("groq", "fitz", "pymupdf", "numpy", "jinja2", "streamlit")
+IMPORT_BUDGET_MS = 1500
+READY_BUDGET_MS = 3000
+RUNS = 3
+
+
+def python(args: list, workdir: str, **kwargs) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    return subprocess.Popen([sys.executable, *args], cwd=workdir, env=env, **kwargs)
+
+
+def import_app(workdir: str) -> dict:
+    code = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        "import app.main\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'ms': elapsed * 1000, 'eager': sorted(m for m in {LAZY_MODULES!r} if m in sys.modules)}}))\n"
+    )
+    process = python(["-c", code], workdir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    stdout, stderr = process.communicate(timeout=60)
+    assert process.returncode == 0, f"importing app.main failed:\n{stderr}"
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_ready(workdir: str, timeout: float = 60) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = python(
+        ["-m", "uvicorn", "app.main:create_app", "--factory", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        workdir,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            assert server.poll() is None, f"uvicorn exited with {server.returncode} before serving /health"
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise AssertionError(f"/health not ready after {timeout:.0f} s")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def test_import_needs_no_config_and_stays_within_budget():
+    with tempfile.TemporaryDirectory() as workdir:
+        import_app(workdir)  # compiles the .pyc files, which a deployed image already has
+        runs = [import_app(workdir) for _ in range(RUNS)]
+
+    assert not runs[0]["eager"], f"imported by app.main although only needed on first use: {', '.join(runs[0]['eager'])}"
+    import_ms = statistics.median(run["ms"] for run in runs)
+    assert import_ms <= IMPORT_BUDGET_MS, f"importing app.main takes {import_ms:.0f} ms, over the {IMPORT_BUDGET_MS} ms budget"
+
+
+def test_first_health_within_budget():
+    ready_ms = statistics.median(time_to_ready(WORKDIR) for _ in range(RUNS))
+    assert ready_ms <= READY_BUDGET_MS, f"first /health after {ready_ms:.0f} ms, over the {READY_BUDGET_MS} ms budget"
@@ -0,0 +1,39 @@
+import asyncio
+import gzip
+
+from app.config.compression import CompressionConfig
+from app.core.compression import CompressionMiddleware
+
+
+def respond(messages, accept_encoding="gzip"):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        for message in messages:
+            await send(message)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    middleware = CompressionMiddleware(app, CompressionConfig(encodings=["gzip"]))
+    asyncio.run(middleware(scope, None, send))
+    return sent
+
+
+def test_buffered_body_goes_out_before_an_extension_message():
+    extension = {"type": "http.response.pathsend", "path": "/tmp/x"}
+    sent = respond([{"type": "http.response.body", "body": b'{"a": 1}', "more_body": True}, extension])
+
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.body", "http.response.pathsend"]
+    assert sent[1] == {"type": "http.response.body", "body": b'{"a": 1}', "more_body": True}
+    assert (b"content-encoding", b"gzip") not in sent[0]["headers"]
+
+
+def test_large_bodies_are_compressed():
+    body = b'{"a": 1}' * 1000
+    sent = respond([{"type": "http.response.body", "body": body}])
+
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+    assert gzip.decompress(sent[1]["body"]) == body
@@ -0,0 +1,26 @@
+from app.models.document import DocumentModels, IngestionStatus
+from app.models.project import ProjectModels
+from app.repositories import document as document_repository
+from app.repositories.document import DocumentRepo
+
+
+def test_delete_bumps_the_version_after_the_indexes_dropped_the_document(db, monkeypatch):
+    project = ProjectModels(owner_id=1, name="p", content_version=3)
+    db.add(project)
+    db.commit()
+    document = DocumentModels(project_id=project.id, filename="a.pdf", file_url="a", ingestion_status=IngestionStatus.DONE)
+    db.add(document)
+    db.commit()
+
+    seen = []
+
+    def remove_document(project_id, document_id):
+        with db.bind.connect() as connection:
+            seen.append(connection.scalar(ProjectModels.__table__.select().with_only_columns(ProjectModels.content_version)))
+
+    monkeypatch.setattr(document_repository.search_index_service, "remove_document", remove_document)
+    DocumentRepo(db).delete_document(project.id, document.id)
+
+    assert seen == [3]
+    db.refresh(project)
+    assert project.content_version == 4
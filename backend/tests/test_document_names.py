@@ -0,0 +1,127 @@
+import io
+import os
+import sys
+import types
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app import migrations
+from app.core.database import SessionLocal, create_db_engine
+from app.migrations.operations import after_commit
+from app.models.document import DocumentModels
+from app.models.project import ProjectModels
+from app.repositories.document import DocumentRepo
+from app.schemas.document import DocumentCreate, DocumentUpdate
+from app.utils import get_project_dir
+
+
+@pytest.fixture
+def project(db):
+    project = ProjectModels(owner_id=1, name="p")
+    db.add(project)
+    db.commit()
+    return project
+
+
+def upload(name: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(b"%PDF-1.7\n" + name.encode()), filename=name)
+
+
+def test_live_documents_of_a_project_have_unique_names(db, project):
+    db.add(DocumentModels(project_id=project.id, filename="a.pdf", file_url="a"))
+    db.commit()
+    db.add(DocumentModels(project_id=project.id, filename="a.pdf", file_url="b"))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    db.execute(text("UPDATE documents SET deleted_at = CURRENT_TIMESTAMP"))
+    db.add(DocumentModels(project_id=project.id, filename="a.pdf", file_url="b"))
+    db.commit()
+
+
+def test_a_name_taken_by_a_concurrent_upload_fails_only_that_file(db, project, monkeypatch):
+    save_document = DocumentRepo.save_document
+
+    def racing_save_document(self, file):
+        stored = save_document(self, file)
+        if file.filename == "a.pdf":
+            # another request stores a.pdf after this one checked the names
+            with SessionLocal() as other:
+                other.add(DocumentModels(project_id=project.id, filename="a.pdf", file_url="other"))
+                other.commit()
+        return stored
+
+    monkeypatch.setattr(DocumentRepo, "save_document", racing_save_document)
+    success, error = DocumentRepo(db).upload_documents(project.id, [upload("a.pdf"), upload("b.pdf")])
+
+    assert [document.filename for document in success] == ["b.pdf"]
+    assert [(e["filename"], e["status"]) for e in error] == [("a.pdf", 400)]
+
+
+def test_callbacks_run_only_after_their_migration_committed(tmp_path, monkeypatch):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'callbacks.db'}", "callbacks")
+    ran = []
+
+    def committed(connection):
+        after_commit(connection, lambda: ran.append("committed"))
+
+    def failing(connection):
+        after_commit(connection, lambda: ran.append("rolled back"))
+        raise RuntimeError("migration failed")
+
+    for name, upgrade in (("m9998_committed", committed), ("m9999_failing", failing)):
+        monkeypatch.setitem(sys.modules, f"app.migrations.{name}", types.SimpleNamespace(upgrade=upgrade))
+    monkeypatch.setattr(migrations, "MIGRATIONS", ["m9998_committed", "m9999_failing"])
+
+    with pytest.raises(RuntimeError):
+        migrations.run_migrations(engine)
+    assert ran == ["committed"]
+    engine.dispose()
+
+
+def test_a_document_can_still_be_created_for_a_file_of_the_project_directory(db, project):
+    path = os.path.join(get_project_dir(project.name), "legacy.pdf")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\nlegacy")
+
+    document = DocumentRepo(db).create_document(project.id, DocumentCreate(project_id=project.id, filename="legacy.pdf", file_url="legacy.pdf"))
+
+    assert document.file_url == "legacy.pdf"
+    assert DocumentRepo(db).download_document(project.id, document.id).path == path
+
+
+def test_a_document_is_created_in_the_project_of_the_path(db, project):
+    other = ProjectModels(owner_id=2, name="other", content_version=1)
+    db.add(other)
+    db.commit()
+
+    document = DocumentRepo(db).create_document(project.id, DocumentCreate(project_id=other.id, filename="a.pdf", file_url="a.pdf"))
+
+    assert document.project_id == project.id
+    db.refresh(other)
+    assert other.content_version == 1
+
+
+@pytest.mark.parametrize("file_url", ["../../etc/passwd", "/etc/passwd", "..", "a\\b.pdf"])
+def test_file_urls_must_not_be_paths(file_url):
+    with pytest.raises(ValidationError):
+        DocumentCreate(project_id=1, filename="a.pdf", file_url=file_url)
+    with pytest.raises(ValidationError):
+        DocumentUpdate(file_url=file_url)
+
+
+def test_a_stored_file_url_leading_out_of_the_storage_root_is_not_served(db, project):
+    # e.g. written before file_url was validated
+    document = DocumentModels(project_id=project.id, filename="passwd", file_url="../../../../../../etc/passwd")
+    db.add(document)
+    db.commit()
+
+    with pytest.raises(HTTPException) as error:
+        DocumentRepo(db).download_document(project.id, document.id)
+    assert error.value.status_code == 404
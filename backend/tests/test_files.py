@@ -0,0 +1,41 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.files import ConditionalFileResponse
+
+ETAG = "0" * 64
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(bytes(range(256)) * 4)
+
+    async def download(request):
+        return ConditionalFileResponse(str(path), etag=ETAG, cache_control="private, no-cache", media_type="application/pdf")
+
+    return TestClient(Starlette(routes=[Route("/a.pdf", download)]))
+
+
+def test_a_matching_etag_is_answered_with_304(client):
+    response = client.get("/a.pdf", headers={"If-None-Match": f'W/"{ETAG}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == f'"{ETAG}"'
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_a_stale_etag_gets_the_file(client):
+    response = client.get("/a.pdf", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert len(response.content) == 1024
+
+
+def test_ranges_are_served(client):
+    response = client.get("/a.pdf", headers={"Range": "bytes=256-259"})
+    assert response.status_code == 206
+    assert response.content == bytes([0, 1, 2, 3])
+    assert response.headers["content-range"] == "bytes 256-259/1024"
+    assert client.get("/a.pdf", headers={"Range": "bytes=5000-"}).status_code == 416
@@ -0,0 +1,64 @@
+import time
+from datetime import timedelta
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+
+from app.core.database import SessionLocal
+from app.models.chat import ChatMessageModels
+from app.schemas.chat import Message
+from app.services.history import HistoryStore, MemoryHistoryStore, SQLHistoryStore
+
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    """This process's local time seven hours ahead of UTC, SQLite's clock"""
+    monkeypatch.setenv("TZ", "Asia/Jakarta")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def exchange(question, answer):
+    return Message(content=question, is_user=True), Message(content=answer, is_user=False)
+
+
+def test_conversation_ids_fit_the_history_table():
+    Message(content="hi", conversation_id="c" * 64)
+    with pytest.raises(ValidationError):
+        Message(content="hi", conversation_id="c" * 65)
+
+
+def test_history_store_is_abstract():
+    with pytest.raises(TypeError):
+        HistoryStore()
+
+
+def test_memory_store_keeps_the_newest_messages():
+    store = MemoryHistoryStore(max_conversations=2, max_messages=3, ttl_seconds=60)
+    store.append("c1", *exchange("q1", "a1"))
+    store.append("c1", *exchange("q2", "a2"))
+    assert [m.content for m in store.get("c1")] == ["a1", "q2", "a2"]
+    assert [m.content for m in store.get("c1", limit=1)] == ["a2"]
+
+
+def test_sql_store_reads_back_in_another_timezone(db, local_timezone):
+    store = SQLHistoryStore(SessionLocal, max_messages=10, ttl_seconds=3600)
+    store.append("c1", *exchange("q1", "a1"))
+
+    assert [m.content for m in store.get("c1")] == ["q1", "a1"]
+    assert store.prune() == 0
+    assert len(store.get("c1")) == 2
+
+
+def test_sql_store_prunes_only_expired_rows(db, local_timezone):
+    store = SQLHistoryStore(SessionLocal, max_messages=10, ttl_seconds=3600)
+    store.append("c1", *exchange("q1", "a1"))
+    now = db.scalar(select(func.now()))
+    db.add(ChatMessageModels(conversation_id="c1", is_user=True, content="old", created_at=now - timedelta(hours=2)))
+    db.commit()
+
+    assert store.prune() == 1
+    assert [m.content for m in store.get("c1")] == ["q1", "a1"]
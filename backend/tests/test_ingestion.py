@@ -0,0 +1,106 @@
+import os
+import time
+from datetime import timedelta
+
+from sqlalchemy import func, select, update
+
+from app.models.document import DocumentModels, DocumentPageModels, IngestionStatus
+from app.models.project import ProjectModels
+from app.services import ingestion
+from app.services.ingestion import IngestionService
+
+
+def document(db, status, claimed_ago=None):
+    project = ProjectModels(owner_id=1, name="p")
+    db.add(project)
+    db.commit()
+    now = db.scalar(select(func.now()))
+    row = DocumentModels(
+        project_id=project.id, filename="a.pdf", file_url="a", ingestion_status=status,
+        ingestion_claimed_at=None if claimed_ago is None else now - claimed_ago,
+    )
+    db.add(row)
+    db.commit()
+    return row.id
+
+
+def test_a_queued_document_is_claimed_once(db):
+    document_id = document(db, IngestionStatus.QUEUED)
+    workers = [IngestionService(1, lease_seconds=60) for _ in range(2)]
+
+    assert [worker.claim(document_id) for worker in workers] == [True, False]
+    assert db.get(DocumentModels, document_id).ingestion_status == IngestionStatus.RUNNING
+
+
+def test_a_running_document_is_claimed_only_after_its_lease(db):
+    service = IngestionService(1, lease_seconds=60)
+
+    assert not service.claim(document(db, IngestionStatus.RUNNING, claimed_ago=timedelta(seconds=10)))
+    assert service.claim(document(db, IngestionStatus.RUNNING, claimed_ago=timedelta(minutes=5)))
+    # running before claims were recorded
+    assert service.claim(document(db, IngestionStatus.RUNNING))
+
+
+def test_finished_documents_are_not_claimed(db):
+    service = IngestionService(1, lease_seconds=60)
+
+    assert not service.claim(document(db, IngestionStatus.DONE))
+    assert not service.claim(document(db, IngestionStatus.FAILED))
+
+
+def extract_or_crash(path, chunk_words, chunk_overlap, embedder=None):
+    """Stands in for extract_document in the worker processes"""
+    if path.endswith("crash.pdf"):
+        os._exit(1)
+    time.sleep(2)
+    return ["kucing"], [], None
+
+
+def queued_documents(db, *file_urls):
+    project = ProjectModels(owner_id=1, name="p")
+    db.add(project)
+    db.commit()
+    rows = [
+        DocumentModels(project_id=project.id, filename=file_url, file_url=file_url, ingestion_status=IngestionStatus.QUEUED)
+        for file_url in file_urls
+    ]
+    db.add_all(rows)
+    db.commit()
+    return project.id, [row.id for row in rows]
+
+
+def test_a_crashing_worker_fails_only_its_own_document(db, monkeypatch):
+    monkeypatch.setattr(ingestion, "extract_document", extract_or_crash)
+    project_id, (ok_id, crash_id) = queued_documents(db, "ok.pdf", "crash.pdf")
+    service = IngestionService(2, lease_seconds=60)
+
+    service.submit(ok_id, project_id, "ok.pdf")
+    service.submit(crash_id, project_id, "crash.pdf")
+    service.shutdown(wait=True)
+
+    db.expire_all()
+    assert db.get(DocumentModels, ok_id).ingestion_status == IngestionStatus.DONE
+    crashed = db.get(DocumentModels, crash_id)
+    assert crashed.ingestion_status == IngestionStatus.FAILED
+    assert crashed.ingestion_error.startswith("Extraction worker crashed")
+
+
+def test_a_document_deleted_during_extraction_is_not_stored(db, monkeypatch):
+    monkeypatch.setattr(ingestion, "extract_document", extract_or_crash)
+    project_id, (document_id,) = queued_documents(db, "ok.pdf")
+    claim = IngestionService.claim
+
+    def claim_then_delete(self, document_id):
+        claimed = claim(self, document_id)
+        db.execute(update(DocumentModels).where(DocumentModels.id == document_id).values(deleted_at=func.now()))
+        db.commit()
+        return claimed
+
+    monkeypatch.setattr(IngestionService, "claim", claim_then_delete)
+    service = IngestionService(1, lease_seconds=60)
+    service.submit(document_id, project_id, "ok.pdf")
+    service.shutdown(wait=True)
+
+    db.expire_all()
+    assert db.get(DocumentModels, document_id).ingestion_status == IngestionStatus.RUNNING
+    assert db.query(DocumentPageModels).filter(DocumentPageModels.document_id == document_id).count() == 0
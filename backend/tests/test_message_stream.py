@@ -0,0 +1,53 @@
+import asyncio
+import functools
+import json
+
+import httpx
+import pytest
+
+from app.schemas.chat import Message
+from app.services.history import MemoryHistoryStore
+from app.services.message import MessageService
+
+
+def upstream(*lines):
+    body = "".join(f"{line}\n\n" for line in lines).encode()
+    return httpx.MockTransport(lambda request: httpx.Response(200, content=body, headers={"content-type": "text/event-stream"}))
+
+
+def events(service, message):
+    async def collect():
+        return [event async for event in service.stream_events(message)]
+    return asyncio.run(collect())
+
+
+def service_with(transport, monkeypatch):
+    monkeypatch.setattr(httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+    history = MemoryHistoryStore(max_conversations=10, max_messages=10, ttl_seconds=60)
+    return MessageService(history_store=history), history
+
+
+def chunk(content):
+    return "data: " + json.dumps({"choices": [{"delta": {"content": content}}]})
+
+
+def test_stream_relays_deltas_and_records_the_answer(monkeypatch):
+    service, history = service_with(upstream(chunk("Halo"), chunk(" dunia"), "data: [DONE]"), monkeypatch)
+    sent = events(service, Message(content="hai", conversation_id="c1"))
+
+    assert sent == [
+        'data: {"content": "Halo"}\n\n',
+        'data: {"content": " dunia"}\n\n',
+        "event: done\ndata: {}\n\n",
+    ]
+    assert [past.content for past in history.get("c1")] == ["hai", "Halo dunia"]
+
+
+@pytest.mark.parametrize("bad", ["data: {not json", "data: []", 'data: {"choices": "x"}', 'data: {"choices": [{"delta": 3}]}'])
+def test_malformed_chunk_ends_with_an_error_event(monkeypatch, bad):
+    service, history = service_with(upstream(chunk("Halo"), bad, chunk("lagi")), monkeypatch)
+    sent = events(service, Message(content="hai", conversation_id="c1"))
+
+    assert sent[0] == 'data: {"content": "Halo"}\n\n'
+    assert sent[-1].startswith("event: error\n")
+    assert history.get("c1") == []
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app.core.database import create_db_engine
+from app.migrations import MIGRATIONS, migration_status, run_migrations
+from app.services.blob_store import blob_store
+from app.utils import get_project_dir
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A SQLite database whose original tables were created by hand, without foreign keys"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}", "legacy")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE projects (id INTEGER PRIMARY KEY, owner_id INTEGER, name VARCHAR, description VARCHAR, created_at DATETIME)")
+        connection.exec_driver_sql("CREATE TABLE documents (id INTEGER PRIMARY KEY, project_id INTEGER, filename VARCHAR, file_url VARCHAR, uploaded_at DATETIME)")
+        connection.exec_driver_sql("INSERT INTO projects (id, name) VALUES (1, 'kept')")
+        connection.exec_driver_sql("INSERT INTO documents (id, project_id, filename) VALUES (1, 1, 'a.pdf'), (2, 99, 'orphan.pdf'), (3, 1, 'a.pdf')")
+    yield engine
+    engine.dispose()
+
+
+def test_legacy_sqlite_tables_get_their_foreign_keys(legacy_engine):
+    run_migrations(legacy_engine)
+
+    with legacy_engine.begin() as connection:
+        foreign_keys = {foreign_key["name"] for foreign_key in inspect(connection).get_foreign_keys("documents")}
+        assert "fk_documents_project_id" in foreign_keys
+        assert "ix_documents_project_id_id" in {index["name"] for index in inspect(connection).get_indexes("documents")}
+        # the orphan is gone and the later duplicate name deleted like any document
+        assert connection.execute(text("SELECT id, filename, deleted_at IS NULL FROM documents")).all() == [(1, "a.pdf", 1), (3, "a.pdf", 0)]
+
+        connection.execute(text("INSERT INTO document_pages (document_id, page_number, text) VALUES (1, 1, 'x')"))
+        connection.execute(text("DELETE FROM projects WHERE id = 1"))
+        assert connection.scalar(text("SELECT count(*) FROM documents")) == 0
+        assert connection.scalar(text("SELECT count(*) FROM document_pages")) == 0
+        assert connection.scalar(text("PRAGMA foreign_keys")) == 1
+
+
+def test_concurrent_runners_apply_each_migration_once(tmp_path):
+    engines = [create_db_engine(f"sqlite:///{tmp_path / 'fresh.db'}", f"fresh{i}") for i in range(4)]
+    applied, errors = [], []
+
+    def run(engine):
+        try:
+            applied.extend(run_migrations(engine))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(engine,)) for engine in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(applied) == MIGRATIONS
+    assert all(done for _, done in migration_status(engines[0]))
+    for engine in engines:
+        engine.dispose()
+
+
+def test_baseline_files_in_project_directories_move_into_the_blob_store(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'baseline.db'}", "baseline")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE projects (id INTEGER PRIMARY KEY, owner_id INTEGER, name VARCHAR, description VARCHAR, created_at DATETIME)")
+        connection.exec_driver_sql("CREATE TABLE documents (id INTEGER PRIMARY KEY, project_id INTEGER, filename VARCHAR, file_url VARCHAR, uploaded_at DATETIME)")
+        connection.exec_driver_sql("INSERT INTO projects (id, name) VALUES (1, 'baseline-course')")
+        # the baseline stored the bare file name, relative to the project's directory
+        connection.exec_driver_sql("INSERT INTO documents (id, project_id, filename, file_url) VALUES (1, 1, 'notes.pdf', 'notes.pdf')")
+        # neither linked nor removed, out of the storage root
+        outside = tmp_path / "outside.pdf"
+        outside.write_bytes(b"%PDF-1.7\noutside")
+        connection.exec_driver_sql("INSERT INTO documents (id, project_id, filename, file_url) VALUES (2, 1, 'outside.pdf', ?)", (str(outside),))
+    content = b"%PDF-1.7\nbaseline notes"
+    path = os.path.join(get_project_dir("baseline-course"), "notes.pdf")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+    run_migrations(engine)
+
+    key = hashlib.sha256(content).hexdigest()
+    with engine.begin() as connection:
+        assert connection.execute(text("SELECT file_url, sha256, size FROM documents")).all() == [(key, key, len(content)), (str(outside), None, None)]
+        assert connection.execute(text("SELECT sha256, refcount FROM blobs")).all() == [(key, 1)]
+    with open(blob_store.path(key), "rb") as f:
+        assert f.read() == content
+    assert not os.path.exists(path)
+    assert outside.exists()
+    engine.dispose()
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.document import DocumentModels, IngestionStatus
+from app.models.project import ProjectModels
+from app.repositories.document import DocumentRepo
+from app.repositories.project import ProjectRepo
+from app.schemas.project import ProjectUpdate
+
+SECOND = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def pages(fetch, limit):
+    ids, cursor = [], None
+    while True:
+        page = fetch(cursor, limit)
+        ids.append([row.id for row in page.items])
+        if not page.next_cursor:
+            return ids
+        cursor = page.next_cursor
+
+
+def test_projects_created_in_the_same_second_are_all_paged(db):
+    projects = [ProjectModels(owner_id=1, name=f"p{i}", created_at=SECOND) for i in range(7)]
+    db.add_all(projects)
+    db.commit()
+
+    repo = ProjectRepo(db)
+    assert pages(repo.get_projects_page, 2) == [
+        [projects[0].id, projects[1].id],
+        [projects[2].id, projects[3].id],
+        [projects[4].id, projects[5].id],
+        [projects[6].id],
+    ]
+
+
+def test_documents_uploaded_in_the_same_second_are_all_paged(db):
+    project = ProjectModels(owner_id=1, name="p")
+    db.add(project)
+    db.commit()
+    documents = [
+        DocumentModels(project_id=project.id, filename=f"d{i}.pdf", file_url=f"d{i}", ingestion_status=IngestionStatus.DONE, uploaded_at=SECOND)
+        for i in range(5)
+    ]
+    db.add_all(documents)
+    db.commit()
+
+    repo = DocumentRepo(db)
+    ids = pages(lambda cursor, limit: repo.get_documents_page(project.id, cursor, limit), 2)
+    assert sum(ids, []) == [document.id for document in documents]
+
+
+def test_an_update_between_pages_does_not_move_a_row(db):
+    projects = [ProjectModels(owner_id=1, name=f"p{i}", created_at=SECOND) for i in range(4)]
+    db.add_all(projects)
+    db.commit()
+
+    repo = ProjectRepo(db)
+    first = repo.get_projects_page(None, 2)
+    # bumps created_at, which has onupdate=now
+    repo.update_project(projects[0].id, ProjectUpdate(description="changed"))
+    second = repo.get_projects_page(first.next_cursor, 2)
+    assert [p.id for p in first.items + second.items] == [p.id for p in projects]
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+    # handed out before paging by id
+    assert decode_cursor("WyIyMDI2LTAxLTAxVDEyOjAwOjAwIiw3XQ") == 7
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "bm90IGpzb24", "W10"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,48 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.admission import admission
+from app.core.database import dispose_async_engine
+from app.services.message import message_service
+from app.services.readiness import ReadinessProbe
+
+
+def test_concurrent_probes_make_one_check(engine, monkeypatch):
+    calls = []
+
+    async def check_upstream(timeout):
+        calls.append(timeout)
+        await asyncio.sleep(0.05)
+        raise ConnectionError("upstream down")
+
+    monkeypatch.setattr(message_service, "check_upstream", check_upstream)
+    readiness = ReadinessProbe()
+
+    async def probes():
+        try:
+            return await asyncio.gather(*(readiness.check() for _ in range(5)))
+        finally:
+            await dispose_async_engine()
+
+    results = asyncio.run(probes())
+
+    assert len(calls) == 1
+    # the upstream model is reported, but does not fail the probe by default
+    for ready, checks in results:
+        assert ready
+        assert checks["llm"] == {"ok": False, "error": "ConnectionError"}
+
+
+def test_refused_requests_carry_cors_headers(db, monkeypatch):
+    from app.main import create_app
+
+    async def refuse():
+        return False
+
+    with TestClient(create_app()) as client:
+        monkeypatch.setattr(admission.limiters["crud"], "acquire", refuse)
+        response = client.get("/projects/", headers={"Origin": "http://example.com"})
+
+    assert response.status_code == 503
+    assert "access-control-allow-origin" in response.headers
@@ -0,0 +1,92 @@
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from fastapi import APIRouter, FastAPI, Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.config import config
+from app.core.responses import FastJSONRoute
+from app.models.user import UserRole
+
+
+class Item(BaseModel):
+    id: int
+    role: UserRole
+    created_at: datetime
+    note: Optional[str] = None
+
+
+ROW = SimpleNamespace(id=1, role=UserRole.ADMIN, created_at=datetime(2024, 5, 1, 12, 30), note=None, secret="x")
+
+
+@pytest.fixture(autouse=True)
+def fast_json(monkeypatch):
+    monkeypatch.setattr(config.app, "fast_json", True)
+
+
+def create_client(route_class) -> TestClient:
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/items", response_model=List[Item])
+    def items(response: Response):
+        response.headers["link"] = '</items?cursor=2>; rel="next"'
+        return [ROW]
+
+    @router.post("/items", response_model=Item, status_code=201, response_model_exclude_none=True)
+    async def create_item():
+        return ROW
+
+    @router.get("/broken", response_model=Item)
+    def broken():
+        return {"id": "not a number"}
+
+    @router.get("/plain")
+    def plain():
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("method, path", [("get", "/items"), ("post", "/items"), ("get", "/plain")])
+def test_responses_match_fastapi(method, path):
+    fast = getattr(create_client(FastJSONRoute), method)(path)
+    plain = getattr(create_client(APIRoute), method)(path)
+
+    assert fast.status_code == plain.status_code
+    assert fast.json() == plain.json()
+    assert fast.headers.get("link") == plain.headers.get("link")
+
+
+def test_invalid_responses_are_rejected():
+    with pytest.raises(ResponseValidationError):
+        create_client(FastJSONRoute).get("/broken")
+
+
+def test_openapi_schema_is_unchanged():
+    fast = create_client(FastJSONRoute).get("/openapi.json").json()
+    plain = create_client(APIRoute).get("/openapi.json").json()
+    assert fast["components"] == plain["components"]
+    assert fast["paths"]["/items"]["get"]["responses"] == plain["paths"]["/items"]["get"]["responses"]
+
+
+def test_fast_path_follows_the_setting(monkeypatch):
+    monkeypatch.setattr("app.core.responses.FastJSONResponse.render", lambda self, content: b"[]")
+    assert create_client(FastJSONRoute).get("/items").json() == []
+
+    # off, handlers are built from the plain endpoint
+    monkeypatch.setattr(config.app, "fast_json", False)
+    assert create_client(FastJSONRoute).get("/items").json()[0]["id"] == 1
+
+
+def test_a_route_created_again_from_its_endpoint_is_wrapped_once():
+    route = FastJSONRoute("/items", lambda: [ROW], response_model=List[Item])
+    again = FastJSONRoute(route.path, route.endpoint, response_model=List[Item])
+
+    assert again.endpoint.fast_json_endpoint is route.endpoint.fast_json_endpoint
@@ -0,0 +1,45 @@
+from app.models.document import DocumentChunkModels, DocumentModels, IngestionStatus
+from app.models.project import ProjectModels
+from app.repositories.document import DocumentRepo
+from app.services.search_index import InvertedIndex, search_index_service
+
+
+def test_stats_and_search():
+    index = InvertedIndex()
+    index.add_document(1, [(10, "kucing hitam tidur"), (11, "anjing coklat")])
+    index.add_document(2, [(20, "kucing putih")])
+
+    assert [(chunk, document) for chunk, document, _ in index.search("kucing", 10)] == [(20, 2), (10, 1)]
+    stats = index.stats()
+    assert (stats["chunks"], stats["terms"], stats["postings"]) == (3, 6, 7)
+    assert stats["memory_bytes"] == index.memory_bytes() > 0
+
+    index.remove_document(1)
+    assert index.stats()["chunks"] == 1
+    assert [document for _, document, _ in index.search("kucing", 10)] == [2]
+
+
+def test_a_deleted_document_uses_no_search_slots_and_forces_no_rebuild(db, monkeypatch):
+    project = ProjectModels(owner_id=1, name="p")
+    db.add(project)
+    db.commit()
+    documents = [DocumentModels(project_id=project.id, filename=f"{i}.pdf", file_url=f"{i}", ingestion_status=IngestionStatus.DONE) for i in range(3)]
+    db.add_all(documents)
+    db.commit()
+    db.add_all([
+        DocumentChunkModels(document_id=document.id, project_id=project.id, page_number=1, position=0, text="kucing tidur")
+        for document in documents
+    ])
+    db.commit()
+    builds = []
+    build = search_index_service.build
+    monkeypatch.setattr(search_index_service, "build", lambda *args: builds.append(args) or build(*args))
+    repo = DocumentRepo(db)
+
+    assert len(repo.search_chunks(project.id, "kucing", limit=2)) == 2
+    # the newest document holds the largest chunk id
+    repo.delete_document(project.id, documents[2].id)
+
+    assert {result.document_id for result in repo.search_chunks(project.id, "kucing", limit=2)} == {documents[0].id, documents[1].id}
+    assert len(builds) == 1
+    search_index_service.drop_project(project.id)
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+
+from app.core.cache import SharedVersions
+from app.core.database import dispose_async_engine, get_async_sessionmaker
+from app.core.security import create_access_token
+from app.models.user import UserModels, UserRole
+from app.repositories.user import AsyncUserRepo, UserRepo
+from app.schemas.user import UserUpdate
+from app.services import auth
+from app.services.auth import get_current_user
+from app.services.user_cache import UserCache, user_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+
+
+def current_user(username: str):
+    async def run():
+        try:
+            async with get_async_sessionmaker()() as session:
+                return await get_current_user(create_access_token({"sub": username}), AsyncUserRepo(session))
+        finally:
+            # pooled connections belong to this event loop
+            await dispose_async_engine()
+    return asyncio.run(run())
+
+
+def add_alice(db):
+    user = UserModels(username="alice", email="alice@example.com", hashed_password="x", role=UserRole.USER, is_active=True)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_a_hit_is_served_without_the_database(db):
+    user = add_alice(db)
+    assert current_user("alice").role == UserRole.USER
+
+    # gone from the table behind the repository's back, the cached user is still served
+    db.execute(delete(UserModels).where(UserModels.id == user.id))
+    db.commit()
+    assert current_user("alice").id == user.id
+
+    user_cache.invalidate("alice")
+    with pytest.raises(HTTPException):
+        current_user("alice")
+
+
+def test_shared_versions_invalidate_the_user_in_every_worker(db, monkeypatch):
+    redis = FakeRedis()
+    workers = [UserCache(True, 100, 60, SharedVersions(redis, "user")) for _ in range(2)]
+    user = add_alice(db)
+
+    monkeypatch.setattr(auth, "user_cache", workers[0])
+    assert current_user("alice").role == UserRole.USER
+    assert workers[0].get("alice") is not None
+
+    # another worker's update bumps the shared version
+    monkeypatch.setattr("app.repositories.user.user_cache", workers[1])
+    UserRepo(db).update_user(user.id, UserUpdate(role=UserRole.ADMIN))
+
+    assert workers[0].get("alice") is None
+    assert current_user("alice").role == UserRole.ADMIN
+    assert workers[0].get("alice").role == UserRole.ADMIN
+
+
+def test_a_user_invalidated_while_loading_is_not_cached(db, monkeypatch):
+    add_alice(db)
+    load = AsyncUserRepo.get_user_by_username
+
+    async def load_then_invalidate(self, username):
+        user = await load(self, username)
+        # e.g. an update or delete commits while this request holds the old row
+        user_cache.invalidate(username)
+        return user
+
+    monkeypatch.setattr(AsyncUserRepo, "get_user_by_username", load_then_invalidate)
+    assert current_user("alice").role == UserRole.USER
+    assert user_cache.get("alice") is None
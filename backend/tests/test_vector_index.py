@@ -0,0 +1,90 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.embedding import Embedder, HashingEmbedder
+from app.services.vector_index import VectorIndex
+
+DIMENSION = 16
+
+
+def vectors_of(document_id, rows):
+    # every row of a document points the same way, so a torn row shows as a wrong score
+    vectors = np.zeros((rows, DIMENSION), dtype=np.float32)
+    vectors[:, document_id % DIMENSION] = 1.0
+    return vectors
+
+
+def add(index, document_id, rows=5):
+    index.add(document_id, [document_id * 1000 + row for row in range(rows)], vectors_of(document_id, rows))
+
+
+def test_remove_keeps_the_other_documents(tmp_path):
+    index = VectorIndex(str(tmp_path), DIMENSION)
+    for document_id in (1, 2, 3):
+        add(index, document_id)
+
+    assert index.remove(2) == 5
+    assert index.remove(2) == 0
+    assert len(index) == 10
+    reopened = VectorIndex(str(tmp_path), DIMENSION)
+    assert {document for _, document, _ in reopened.search(vectors_of(3, 1)[0], 20)} == {1, 3}
+    assert sorted(chunk for chunk, _, score in reopened.search(vectors_of(3, 1)[0], 20) if score > 0) == [3000 + row for row in range(5)]
+    # only the current generation is left on disk
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("vectors")) == ["vectors.1.f32"]
+
+
+def test_remove_marks_rows_until_enough_are_dead(tmp_path):
+    index = VectorIndex(str(tmp_path), DIMENSION)
+    for document_id in range(1, 9):
+        add(index, document_id)
+
+    assert index.remove(2) == 5
+    assert len(index) == 35
+    # a few dead rows are only skipped, nothing is copied
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("vectors")) == ["vectors.f32"]
+    assert 2 not in {document for _, document, _ in VectorIndex(str(tmp_path), DIMENSION).search(vectors_of(2, 1)[0], 40)}
+    assert len(index.search(vectors_of(2, 1)[0], 40)) == 35
+
+    for document_id in (3, 4):
+        index.remove(document_id)
+    assert len(index) == 25
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("vectors")) == ["vectors.1.f32"]
+    assert {document for _, document, _ in index.search(vectors_of(1, 1)[0], 40)} == {1, 5, 6, 7, 8}
+
+
+def test_search_during_removes_never_sees_a_torn_row(tmp_path):
+    index = VectorIndex(str(tmp_path), DIMENSION)
+    for document_id in range(1, 9):
+        add(index, document_id, rows=20)
+    torn = []
+    stop = threading.Event()
+
+    # scores each row by the document its vector belongs to
+    query = np.arange(DIMENSION, dtype=np.float32)
+
+    def search():
+        while not stop.is_set():
+            for chunk, document, score in index.search(query, 400):
+                if chunk // 1000 != document or score != document:
+                    torn.append((chunk, document, score))
+
+    searcher = threading.Thread(target=search)
+    searcher.start()
+    try:
+        for _ in range(40):
+            for document_id in range(2, 9):
+                index.remove(document_id)
+                add(index, document_id, rows=20)
+    finally:
+        stop.set()
+        searcher.join()
+    assert not torn
+
+
+def test_embedder_is_abstract():
+    with pytest.raises(TypeError):
+        Embedder()
+    assert HashingEmbedder(DIMENSION).embed(["a b"]).shape == (1, DIMENSION)